@@ -0,0 +1,174 @@
+import itertools
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+# Online backups with SQLite's backup API. The copy is taken BACKUP_PAGES
+# at a time with a short pause between steps, so it shares the disk and
+# the GIL with the window instead of taking them over. Backups are written
+# to BACKUP_DIR as <database>-<time>.db (<database>-<time>-<n>.db for the
+# n-th one within a second), and only the newest BACKUP_KEEP are kept.
+# Labelled backups, e.g. the copy taken before a restore, are named
+# <database>-<label>-<time>.db and are neither counted nor rotated
+BACKUP_DIR = 'backups'
+BACKUP_KEEP = 7
+BACKUP_INTERVAL_MINUTES = 60
+BACKUP_PAGES = 256
+BACKUP_PAUSE = 0.001
+
+class BackupCancelled(Exception):
+    pass
+
+def backup_database(path, target, pages=BACKUP_PAGES, pause=BACKUP_PAUSE, progress=None, cancelled=None):
+    # Copies the database at path to target while other connections keep
+    # reading and writing it, and checks the copy; returns its
+    # {'path', 'pages', 'bytes', 'steps', 'seconds'}. progress(copied, total)
+    # runs after every step in pages; once cancelled() returns True the
+    # backup is abandoned with BackupCancelled. target only appears once it
+    # is complete.
+    #
+    # A backup restarts from the first page whenever another connection
+    # writes between two of its steps, so under steady edits a stepped
+    # backup would never finish. The source connection holds one read
+    # transaction for the whole copy instead: every step reads the same
+    # snapshot, and in WAL mode the writers go on meanwhile (the WAL is only
+    # checkpointed past the snapshot once the backup is done)
+    partial = target + '.part'
+    source = sqlite3.connect(path)
+    destination = None
+    started = time.perf_counter()
+    steps = 0
+
+    def step(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if progress is not None:
+            progress(total - remaining, total)
+        if cancelled is not None and cancelled():
+            raise BackupCancelled()
+        if remaining and pause:
+            time.sleep(pause)
+
+    try:
+        source.execute('BEGIN')
+        page_size, page_count = (source.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in ('page_size', 'page_count'))
+        # A copy left behind by an earlier run is started over. The file is
+        # emptied rather than removed: create_backup reserves target with it
+        open(partial, 'w').close()
+        destination = sqlite3.connect(partial)
+        source.backup(destination, pages=pages, progress=step)
+        # The copy is in WAL mode like the database; a backup is a single file
+        destination.execute('PRAGMA journal_mode=DELETE')
+        check = destination.execute('PRAGMA quick_check').fetchone()[0]
+        destination.close()
+        destination = None
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"backup failed its integrity check: {check}")
+        os.replace(partial, target)
+    except BaseException:
+        if destination is not None:
+            destination.close()
+        for file_path in (partial, partial + '-wal', partial + '-shm'):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        raise
+    finally:
+        source.close()
+    return {
+        'path': target,
+        'pages': page_count,
+        'bytes': page_count * page_size,
+        'steps': steps,
+        'seconds': time.perf_counter() - started
+    }
+
+def list_backups(directory, path):
+    # The backups of the database at path in directory, newest first,
+    # without the labelled ones
+    name = os.path.splitext(os.path.basename(path))[0]
+    if not os.path.isdir(directory):
+        return []
+    pattern = re.compile(re.escape(name) + r'-(\d{8}-\d{6})(?:-(\d+))?\.db')
+    backups = []
+    for file_name in os.listdir(directory):
+        match = pattern.fullmatch(file_name)
+        if match:
+            backups.append((match.group(1), int(match.group(2) or 1), file_name))
+    # By the time in the name, then the number within the second
+    return [os.path.join(directory, file_name) for _, _, file_name in sorted(backups, reverse=True)]
+
+def reserve_target(directory, stem):
+    # Returns <stem>.db in directory, or <stem>-<n>.db if that is taken, and
+    # reserves it by creating its partial copy (see backup_database), which
+    # list_backups never matches: a backup started within the same second,
+    # by this process or another one, never overwrites it. The partial copy
+    # becomes the backup at once, so a name is taken from its reservation on
+    for number in itertools.count(1):
+        target = os.path.join(directory, stem + (f"-{number}" if number > 1 else '') + '.db')
+        try:
+            open(target + '.part', 'x').close()
+        except FileExistsError:
+            continue
+        if not os.path.exists(target):
+            return target
+        os.remove(target + '.part')
+
+def create_backup(path, directory=BACKUP_DIR, keep=BACKUP_KEEP, label=None, **options):
+    # A new backup of the database at path in directory, named after the
+    # time it was started (and label, if any); the backups beyond the newest
+    # keep (all of them for None) are deleted once it is complete. options
+    # are passed on to backup_database
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.splitext(os.path.basename(path))[0]
+    if label is not None:
+        name = f"{name}-{label}"
+    # backup_database removes the reservation if the backup fails
+    target = reserve_target(directory, f"{name}-{datetime.now():%Y%m%d-%H%M%S}")
+    stats = backup_database(path, target, **options)
+    if keep is not None:
+        for old in list_backups(directory, path)[keep:]:
+            os.remove(old)
+    return stats
+
+def last_backup_age(directory, path):
+    # Seconds since the newest backup was written, or None if there is none
+    backups = list_backups(directory, path)
+    if not backups:
+        return None
+    return max(0, time.time() - os.path.getmtime(backups[0]))
+
+def check_backup(backup):
+    # Checks that backup is an intact application database; returns its
+    # number of applications
+    if not os.path.isfile(backup):
+        # sqlite3.connect would create it
+        raise FileNotFoundError(f"no such backup {backup}")
+    source = sqlite3.connect(backup)
+    try:
+        check = source.execute('PRAGMA quick_check').fetchone()[0]
+        if check != 'ok':
+            raise sqlite3.DatabaseError(f"{backup} failed its integrity check: {check}")
+        if source.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='applications'").fetchone()[0] == 0:
+            raise sqlite3.DatabaseError(f"{backup} is not an application database")
+        return source.execute('SELECT COUNT(*) FROM applications').fetchone()[0]
+    finally:
+        source.close()
+
+def restore_backup(backup, path):
+    # Replaces the contents of the database at path with a backup, through
+    # the backup API: other connections (windows, the API server) keep
+    # working and see the restored data on their next read. The backup is
+    # checked first; returns its number of applications
+    applications = check_backup(backup)
+    source = sqlite3.connect(backup)
+    try:
+        target = sqlite3.connect(path, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+    finally:
+        source.close()
+    return applications
@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import tempfile
+
+from benchmarks.bench_visualization import best_of, create_applications
+from store import connect_database, count_statuses, date_conditions, search_status_counts
+
+# Run from the repository root: python -m benchmarks.bench_aggregation
+
+SIZES = (100000, 1000000)
+SEARCHES = (
+    ('all rows', (None, None, None, False, False)),
+    ('2 years', (None, '2020-01-01', '2021-12-31', False, False)),
+    ('1 month', (None, '2021-03-01', '2021-03-31', False, False)),
+    ('text', ('"company"*', None, None, False, False))
+)
+
+def count_grouped(cursor, condition='', params=()):
+    # The previous aggregation: GROUP BY the category columns, then classify
+    # each group in Python
+    query = 'SELECT status, received_interview, received_coding_challenge, COUNT(*) FROM applications'
+    if condition:
+        query += f" WHERE {condition}"
+    query += ' GROUP BY status, received_interview, received_coding_challenge'
+    status_counts = {}
+    for status, received_interview, received_coding_challenge, count in cursor.execute(query, params):
+        if status == 'Rejected':
+            if received_interview:
+                status = 'Rejected after Interview'
+            elif received_coding_challenge:
+                status = 'Rejected after Coding Challenge'
+            else:
+                status = 'Rejected without Interview'
+        status_counts[status] = status_counts.get(status, 0) + count
+    return status_counts
+
+def search_condition(search):
+    conditions, params = date_conditions(search)
+    if search[0]:
+        conditions.insert(0, 'id IN (SELECT rowid FROM applications_fts WHERE applications_fts MATCH ?)')
+        params.insert(0, search[0])
+    return ' AND '.join(conditions), params
+
+def main():
+    print(f"{'rows':>8} {'search':>9} {'matching':>9} {'grouped (ms)':>13} {'filtered (ms)':>14} {'chart (ms)':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_{size}.db")
+            conn = sqlite3.connect(path)
+            create_applications(conn, size)
+            conn.close()
+            conn = connect_database(path)
+            cursor = conn.cursor()
+            for label, search in SEARCHES:
+                condition, params = search_condition(search)
+                before, expected = best_of(3, count_grouped, cursor, condition, params)
+                after, status_counts = best_of(3, count_statuses, cursor, condition, params)
+                # What the chart runs: the status summary when nothing is filtered
+                chart, chart_counts = best_of(3, search_status_counts, cursor, search)
+                assert expected == {status: count for status, count in status_counts.items() if count}
+                assert chart_counts == status_counts
+                print(
+                    f"{size:>8} {label:>9} {sum(expected.values()):>9} {before * 1000:>13.1f}"
+                    f" {after * 1000:>14.1f} {chart * 1000:>11.2f}"
+                )
+            conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import create_database
+from store import (
+    ALL_APPLICATIONS, ARCHIVE_AFTER_DAYS, archive_applications, connect_database, fts_query,
+    load_search_results, search_charts
+)
+
+# Run from the repository root: python -m benchmarks.bench_archive
+
+SIZES = (100000, 1000000)
+REPEAT = 5
+# Rows the window loads for its first view, as in benchmarks.suite
+PAGE = 30
+SEARCHES = {
+    'populate': ALL_APPLICATIONS,
+    'search_text': (fts_query('data engineer'), None, None, False, False),
+    'search_dates': (None, '2023-01-01', '2023-12-31', True, False)
+}
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def time_searches(cursor, archive):
+    # Loading each search's list and its charts, as the window does
+    times = {}
+    for name, search in SEARCHES.items():
+        search = search[:4] + (archive,)
+        times[name] = best_of(REPEAT, load_search_results, cursor, search, PAGE)
+        times[name + ' charts'] = best_of(REPEAT, search_charts, cursor, search)
+    return times
+
+def main():
+    print(f"{'rows':>8} {'operation':>20} {'before (ms)':>12} {'hot (ms)':>9} {'with archive (ms)':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_archive_{size}.db")
+            create_database(path, size)
+            conn = connect_database(path)
+            cursor = conn.cursor()
+            before = time_searches(cursor, False)
+            start = time.perf_counter()
+            archived = archive_applications(cursor, ARCHIVE_AFTER_DAYS)
+            conn.commit()
+            elapsed = time.perf_counter() - start
+            hot = time_searches(cursor, False)
+            everything = time_searches(cursor, True)
+            for name in before:
+                print(f"{size:>8} {name:>20} {before[name] * 1000:>12.2f} {hot[name] * 1000:>9.2f} {everything[name] * 1000:>18.2f}")
+            print(f"Archived {archived} of {size} applications in {elapsed:.2f} s.\n")
+            conn.close()
+
+if __name__ == '__main__':
+    main()
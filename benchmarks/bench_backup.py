@@ -0,0 +1,140 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from backup import BACKUP_PAGES, backup_database
+from benchmarks.synthetic import create_database
+from store import STATUSES, connect_database, update_applications_status
+
+# Run from the repository root: python -m benchmarks.bench_backup
+
+SIZES = (100000, 1000000)
+# The edits going on meanwhile: a committed status update every WRITE_MS
+WRITE_MS = 5
+# A stepped backup without a pinned snapshot is given up after this many steps
+MAX_STEPS = 5000
+
+class Load:
+    # A writer committing status updates, and a thread standing in for the
+    # Tk event loop that wakes up every millisecond; records how long each
+    # commit took and how late each wake-up was
+    def __init__(self, path, size):
+        self.path = path
+        self.size = size
+        self.stop = threading.Event()
+        self.commits = []
+        self.stalls = []
+        self.threads = [threading.Thread(target=self.write), threading.Thread(target=self.tick)]
+
+    def write(self):
+        conn = connect_database(self.path)
+        cursor = conn.cursor()
+        rng = random.Random(0)
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            update_applications_status(cursor, [rng.randint(1, self.size)], rng.choice(STATUSES))
+            conn.commit()
+            self.commits.append(time.perf_counter() - start)
+            time.sleep(WRITE_MS / 1000)
+        conn.close()
+
+    def tick(self):
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            time.sleep(0.001)
+            self.stalls.append(time.perf_counter() - start - 0.001)
+
+    def __enter__(self):
+        for thread in self.threads:
+            thread.start()
+        time.sleep(0.2)
+        self.commits.clear()
+        self.stalls.clear()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        for thread in self.threads:
+            thread.join()
+
+def file_copy(path, target):
+    # Copying the file: fast, but misses what is still in the WAL, and may
+    # copy a page while it is being written
+    shutil.copyfile(path, target)
+    return None
+
+def one_step(path, target):
+    # The whole database in one backup step
+    source = sqlite3.connect(path)
+    destination = sqlite3.connect(target)
+    source.backup(destination)
+    destination.close()
+    source.close()
+    return 1
+
+def unpinned(path, target):
+    # BACKUP_PAGES per step, each step in its own read transaction: every
+    # commit of the writer restarts the copy
+    source = sqlite3.connect(path)
+    destination = sqlite3.connect(target)
+    steps = 0
+
+    def step(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        if steps >= MAX_STEPS:
+            raise TimeoutError()
+
+    try:
+        source.backup(destination, pages=BACKUP_PAGES, progress=step)
+    except TimeoutError:
+        steps = None
+    destination.close()
+    source.close()
+    return steps
+
+def pinned(path, target):
+    # backup.backup_database: BACKUP_PAGES per step from one read snapshot
+    return backup_database(path, target)['steps']
+
+def percentile(values, share):
+    return sorted(values)[int(share * (len(values) - 1))] if values else 0
+
+def main():
+    print(
+        f"{'rows':>8} {'method':>10} {'seconds':>8} {'MB/s':>6} {'steps':>6} "
+        f"{'commits':>8} {'commit p99 (ms)':>16} {'stall max (ms)':>15}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_backup_{size}.db")
+            create_database(path, size)
+            megabytes = os.path.getsize(path) / 1e6
+            target = os.path.join(directory, 'backup.db')
+            with Load(path, size) as load:
+                time.sleep(1)
+            print(
+                f"{size:>8} {'no backup':>10} {'':>8} {'':>6} {'':>6} {len(load.commits):>8} "
+                f"{percentile(load.commits, 0.99) * 1000:>16.1f} {max(load.stalls) * 1000:>15.1f}"
+            )
+            for name, method in (('copy', file_copy), ('one step', one_step), ('unpinned', unpinned), ('pinned', pinned)):
+                with Load(path, size) as load:
+                    start = time.perf_counter()
+                    steps = method(path, target)
+                    elapsed = time.perf_counter() - start
+                os.remove(target)
+                steps = '-' if steps is None and method is file_copy else steps
+                if steps is None:
+                    print(f"{size:>8} {name:>10}  did not finish: restarted by every commit for {MAX_STEPS} steps")
+                    continue
+                print(
+                    f"{size:>8} {name:>10} {elapsed:>8.2f} {megabytes / elapsed:>6.0f} {steps:>6} {len(load.commits):>8} "
+                    f"{percentile(load.commits, 0.99) * 1000:>16.1f} {max(load.stalls) * 1000:>15.1f}"
+                )
+
+if __name__ == '__main__':
+    main()
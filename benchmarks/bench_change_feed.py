@@ -0,0 +1,85 @@
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.synthetic import create_database
+from store import (
+    ALL_APPLICATIONS, STATUSES, connect_database, data_version, fetch_changes, fetch_tree_rows_by_id,
+    latest_change, load_search_results, update_applications_status
+)
+
+# Run from the repository root: python -m benchmarks.bench_change_feed
+
+SIZE = 100000
+# Rows the window loads for its first view, as in benchmarks.suite
+PAGE = 30
+# As in main.py
+CHANGE_FEED_LIMIT = 500
+CHANGES = (1, 10, 100)
+UPDATES = 1000
+REPEAT = 20
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def read_feed(cursor, since):
+    # What a window does on a poll once another instance has committed:
+    # the changed applications and their rows for the list
+    data_version(cursor)
+    _, changes = fetch_changes(cursor, since, CHANGE_FEED_LIMIT)
+    fetch_tree_rows_by_id(cursor, ALL_APPLICATIONS, ('applications.id',), [change[1] for change in changes])
+    cursor.connection.commit()
+
+def time_updates(conn):
+    # UPDATES single-row status changes in one transaction, per update
+    rng = random.Random(0)
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for _ in range(UPDATES):
+        update_applications_status(cursor, [rng.randint(1, SIZE)], rng.choice(STATUSES))
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed / UPDATES
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_change_feed.db')
+        create_database(path, SIZE)
+        conn = connect_database(path)
+        cursor = conn.cursor()
+        other = connect_database(path)
+        rng = random.Random(SIZE)
+
+        idle = best_of(REPEAT, data_version, cursor)
+        print(f"Idle poll (PRAGMA data_version): {idle * 1e6:.1f} us")
+        # Before the change feed, another instance's changes only showed
+        # after a new search: the count, the first page and the charts
+        reload = best_of(REPEAT, load_search_results, cursor, ALL_APPLICATIONS, PAGE)
+        print(f"\n{'changes':>8} {'feed (ms)':>10} {'reload (ms)':>12}")
+        for changes in CHANGES:
+            since = latest_change(cursor)
+            update_applications_status(
+                other.cursor(), rng.sample(range(1, SIZE + 1), changes), rng.choice(STATUSES)
+            )
+            other.commit()
+            feed = best_of(REPEAT, read_feed, cursor, since)
+            print(f"{changes:>8} {feed * 1000:>10.2f} {reload * 1000:>12.2f}")
+
+        # The log's cost for writes: the same updates without its triggers
+        update = min(time_updates(other) for _ in range(5))
+        for event in ('update', 'delete', 'insert'):
+            other.execute(f'DROP TRIGGER application_changes_{event}')
+        bare = min(time_updates(other) for _ in range(5))
+        print(f"\nStatus update: {update * 1e6:.0f} us, {bare * 1e6:.0f} us without the change log")
+        other.close()
+        conn.close()
+
+if __name__ == '__main__':
+    main()
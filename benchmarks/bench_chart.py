@@ -0,0 +1,61 @@
+import random
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from benchmarks.bench_visualization import best_of
+from chart import CHART_COLORS, StatusChart
+
+# Run from the repository root: python -m benchmarks.bench_chart
+
+REFRESHES = 50
+
+def redraw_full(figure, ax, status_counts):
+    # The original refresh: clear the axes, draw a new pie and legend, lay
+    # the figure out and render it
+    labels = [status for status, count in status_counts.items() if count > 0]
+    ax.clear()
+    wedges, texts, autotexts = ax.pie(
+        [status_counts[status] for status in labels],
+        autopct='%1.1f%%',
+        startangle=140,
+        colors=[CHART_COLORS[status] for status in labels]
+    )
+    ax.axis('equal')
+    ax.legend(wedges, labels, title="Statuses", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
+    figure.tight_layout()
+    figure.canvas.draw()
+
+def redraw_reused(chart, status_counts):
+    if chart.update(status_counts):
+        chart.figure.canvas.draw()
+
+def run_full(figure, ax, refreshes):
+    for status_counts in refreshes:
+        redraw_full(figure, ax, status_counts)
+
+def run_reused(chart, refreshes):
+    for status_counts in refreshes:
+        redraw_reused(chart, status_counts)
+
+def main():
+    rng = random.Random(0)
+    changing = [{category: rng.randint(1, 500) for category in CHART_COLORS} for _ in range(REFRESHES)]
+    unchanged = [dict(changing[0]) for _ in range(REFRESHES)]
+
+    full_figure = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(full_figure)
+    full_ax = full_figure.add_subplot(111)
+    chart_figure = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(chart_figure)
+    chart = StatusChart(chart_figure)
+
+    print(f"{'counts':>10} {'full (ms)':>10} {'reused (ms)':>12} {'speedup':>9}")
+    for label, refreshes in (('changing', changing), ('unchanged', unchanged)):
+        before, _ = best_of(3, run_full, full_figure, full_ax, refreshes)
+        after, _ = best_of(3, run_reused, chart, refreshes)
+        before, after = before / REFRESHES, after / REFRESHES
+        print(f"{label:>10} {before * 1000:>10.2f} {after * 1000:>12.2f} {before / after:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
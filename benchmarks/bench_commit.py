@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_visualization import create_applications
+from store import connect_database, update_application_status, update_applications_status
+
+# Run from the repository root: python -m benchmarks.bench_commit
+
+SIZE = 100000
+UPDATES = 500
+
+def per_row_commits(conn, app_ids):
+    # The form's path: one UPDATE and one commit per application
+    cursor = conn.cursor()
+    for app_id in app_ids:
+        update_application_status(cursor, app_id, 'Rejected')
+        conn.commit()
+
+def group_commit(conn, app_ids):
+    # What the writer does with edits made in quick succession: one
+    # transaction, committed once
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    for app_id in app_ids:
+        update_application_status(cursor, app_id, 'Rejected')
+    conn.commit()
+
+def bulk_update(conn, app_ids):
+    # Update Status on a multi-row selection
+    update_applications_status(conn.cursor(), app_ids, 'Rejected')
+    conn.commit()
+
+def main():
+    print(f"{'synchronous':>12} {'per-row (ms)':>13} {'grouped (ms)':>13} {'bulk (ms)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_commit.db')
+        conn = sqlite3.connect(path)
+        create_applications(conn, SIZE)
+        conn.close()
+        conn = connect_database(path)
+        for synchronous in ('FULL', 'NORMAL'):
+            conn.execute(f'PRAGMA synchronous={synchronous}')
+            timings = []
+            for run in (per_row_commits, group_commit, bulk_update):
+                # Fresh "No Answer" rows for every run
+                conn.execute("UPDATE applications SET status='No Answer' WHERE status='Rejected'")
+                conn.commit()
+                app_ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM applications WHERE status='No Answer' ORDER BY id LIMIT ?", (UPDATES,)
+                )]
+                start = time.perf_counter()
+                run(conn, app_ids)
+                timings.append(time.perf_counter() - start)
+            print(f"{synchronous:>12} {timings[0] * 1000:>13.1f} {timings[1] * 1000:>13.1f} {timings[2] * 1000:>10.1f}")
+        conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from benchmarks.bench_visualization import best_of, create_applications
+from store import DATE_SORT, connect_database, count_tree_rows, fetch_tree_rows
+
+# Run from the repository root: python -m benchmarks.bench_dates
+
+SIZES = (10000, 100000, 1000000)
+PAGE = 50
+WINDOW = ('2021-01-01', '2021-03-31')
+
+def window_parsed(cursor, first, last):
+    # Without a sortable column: parse every DD.MM.YYYY date in Python
+    rows = []
+    for row in cursor.execute('SELECT id, company, position, status, date_applied FROM applications'):
+        date = datetime.strptime(row[4], '%d.%m.%Y').date().isoformat()
+        if first <= date <= last:
+            rows.append((date, row[0], row))
+    rows.sort()
+    return len(rows), [row for _, _, row in rows[:PAGE]]
+
+def window_indexed(cursor, first, last):
+    # A range scan on the applied_on index, in date order
+    search = (None, first, last, True, False)
+    return count_tree_rows(cursor, search), fetch_tree_rows(cursor, search, DATE_SORT, PAGE)
+
+def main():
+    print(f"{'rows':>8} {'in window':>10} {'parsed (ms)':>12} {'indexed (ms)':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_{size}.db")
+            conn = sqlite3.connect(path)
+            create_applications(conn, size)
+            conn.close()
+            # Migrates the table, filling in applied_on and its index
+            conn = connect_database(path)
+            cursor = conn.cursor()
+            before, (count, _) = best_of(3, window_parsed, cursor, *WINDOW)
+            after, (indexed_count, _) = best_of(3, window_indexed, cursor, *WINDOW)
+            assert count == indexed_count
+            print(f"{size:>8} {count:>10} {before * 1000:>12.1f} {after * 1000:>13.1f}")
+            conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_visualization import STATUSES, best_of, create_applications
+from store import FUNNEL_STAGES, connect_database, search_funnel, update_applications_status
+
+# Run from the repository root: python -m benchmarks.bench_funnel
+
+SIZES = (10000, 100000)
+# Status changes made after the history starts, as a share of the applications
+CHANGES = 0.5
+UPDATES = 1000
+
+def replay_funnel(cursor):
+    # Without maintained totals: recompute the funnel from the status
+    # history on every refresh
+    events = '''
+        (SELECT application_id, new_status AS status, 0 AS received_interview FROM status_history
+         WHERE application_id IN (SELECT id FROM applications)) AS events
+    '''
+    counts = ', '.join(
+        f"COUNT(DISTINCT application_id) FILTER (WHERE {condition.format(row='events')})"
+        for condition in FUNNEL_STAGES.values()
+    )
+    cursor.execute(f"SELECT {counts} FROM {events}")
+    return dict(zip(FUNNEL_STAGES, cursor.fetchone()))
+
+def make_history(conn, size):
+    rng = random.Random(size)
+    cursor = conn.cursor()
+    for _ in range(int(size * CHANGES)):
+        update_applications_status(cursor, [rng.randint(1, size)], rng.choice(STATUSES))
+    conn.commit()
+
+def time_updates(conn, size):
+    # UPDATES single-row status changes in one transaction, per update
+    rng = random.Random(0)
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for _ in range(UPDATES):
+        update_applications_status(cursor, [rng.randint(1, size)], rng.choice(STATUSES))
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed / UPDATES
+
+def main():
+    print(
+        f"{'rows':>8} {'history':>8} {'replay (ms)':>12} {'summary (ms)':>13} {'1 year (ms)':>12}"
+        f" {'update (us)':>12} {'no triggers (us)':>17}"
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_{size}.db")
+            conn = sqlite3.connect(path)
+            create_applications(conn, size)
+            conn.close()
+            conn = connect_database(path)
+            make_history(conn, size)
+            cursor = conn.cursor()
+            history = cursor.execute('SELECT COUNT(*) FROM status_history').fetchone()[0]
+            replay, _ = best_of(3, replay_funnel, cursor)
+            summary, _ = best_of(3, search_funnel, cursor, (None, None, None, False, False))
+            window, _ = best_of(3, search_funnel, cursor, (None, '2021-01-01', '2021-12-31', False, False))
+            update = time_updates(conn, size)
+            # The same updates without the history and funnel triggers
+            for trigger in ('status_history_update', 'funnel_update'):
+                cursor.execute(f"DROP TRIGGER {trigger}")
+            bare = time_updates(conn, size)
+            print(
+                f"{size:>8} {history:>8} {replay * 1000:>12.1f} {summary * 1000:>13.2f} {window * 1000:>12.1f}"
+                f" {update * 1e6:>12.0f} {bare * 1e6:>17.0f}"
+            )
+            conn.close()
+
+if __name__ == '__main__':
+    main()
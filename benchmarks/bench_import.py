@@ -0,0 +1,48 @@
+import csv
+import os
+import tempfile
+import time
+
+from benchmarks.bench_visualization import STATUSES
+from store import INSERT_APPLICATION, connect_database, import_applications, import_row
+
+# Run from the repository root: python -m benchmarks.bench_import
+
+SIZES = (1000, 10000, 100000)
+
+def write_csv(path, size):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(('company', 'position', 'status', 'date_applied', 'rejection_stage', 'received_interview'))
+        for i in range(size):
+            status = STATUSES[i % len(STATUSES)]
+            writer.writerow((f"Company {i % 5000}", f"Position {i % 300}", status, f"{i % 28 + 1:02d}.{i % 12 + 1:02d}.2023", 'HR', i % 2))
+
+def import_per_row(conn, path):
+    # The form's path: one INSERT and one commit per application
+    with open(path, newline='') as file:
+        for record in csv.DictReader(file):
+            conn.execute(INSERT_APPLICATION, import_row(record))
+            conn.commit()
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    print(f"{'rows':>8} {'per-row (ms)':>13} {'batched (ms)':>13} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_{size}.csv")
+            write_csv(path, size)
+            conn = connect_database(os.path.join(directory, f"per_row_{size}.db"))
+            before = timed(import_per_row, conn, path)
+            conn.close()
+            conn = connect_database(os.path.join(directory, f"batched_{size}.db"))
+            after = timed(import_applications, conn, path)
+            conn.close()
+            print(f"{size:>8} {before * 1000:>13.1f} {after * 1000:>13.1f} {before / after:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
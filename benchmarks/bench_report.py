@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import create_database
+from report import generate_reports
+
+# Run from the repository root: python -m benchmarks.bench_report
+
+SIZE = 100000
+# A week's reports: everything, the archive, searches, date windows
+SPECS = [
+    {'name': 'all'},
+    {'name': 'all-archive', 'archive': True},
+    {'name': 'this-week', 'days': 7},
+    {'name': 'this-month', 'days': 30},
+    {'name': 'this-year', 'days': 365},
+    {'name': 'engineer', 'q': 'engineer', 'field': 'position'},
+    {'name': 'data', 'q': 'data', 'field': 'position'},
+    {'name': 'analyst', 'q': 'analyst'},
+    {'name': 'interviewing', 'q': 'interviewing', 'field': 'status'},
+    {'name': '2022', 'from': '2022-01-01', 'to': '2022-12-31'},
+    {'name': '2023', 'from': '2023-01-01', 'to': '2023-12-31'},
+    {'name': '2024', 'from': '2024-01-01', 'to': '2024-12-31'}
+]
+
+def run(name, specs, output_dir, path, **options):
+    start = time.perf_counter()
+    stats = generate_reports(specs, output_dir, db_path=path, **options)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:>22} {stats['workers']:>8} {stats['rendered']:>6} {stats['cached']:>9} "
+        f"{stats['aggregate_seconds']:>12.2f} {stats['render_seconds']:>11.2f} {elapsed:>9.2f}"
+    )
+
+def main():
+    cores = os.cpu_count() or 1
+    print(f"{len(SPECS)} reports of {len(SPECS) * 3} figures on {SIZE} rows, {cores} cores")
+    print(f"{'run':>22} {'workers':>8} {'drawn':>6} {'unchanged':>9} {'counting (s)':>12} {'drawing (s)':>11} {'total (s)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"bench_report_{SIZE}.db")
+        create_database(path, SIZE)
+        # The first run also warms the page cache for the others
+        run('one process', SPECS, os.path.join(directory, 'sequential'), path, workers=1)
+        run('one process', SPECS, os.path.join(directory, 'sequential'), path, workers=1, force=True)
+        run('process pool', SPECS, os.path.join(directory, 'pool'), path, workers=max(cores, 2))
+        run('unchanged', SPECS, os.path.join(directory, 'pool'), path)
+        run('one report changed', SPECS[:-1] + [dict(SPECS[-1], to='2024-06-30')], os.path.join(directory, 'pool'), path)
+
+if __name__ == '__main__':
+    main()
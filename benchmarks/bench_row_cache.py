@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import create_database
+from cache import ApplicationRecord, RowCache
+from store import APPLICATION_COLUMNS, connect_database, fetch_application, fetch_applications
+
+# Run from the repository root: python -m benchmarks.bench_row_cache
+
+SIZE = 100000
+STEPS = 2000
+# As in main.py
+ROW_CACHE_SIZE = 5000
+PREFETCH_ROWS = 20
+# DatabaseWorker's default
+POLL_MS = 20
+
+def per_row(cursor, app_ids):
+    # A query per selected row, as on_tree_select used to run
+    queries = 0
+    for app_id in app_ids:
+        fetch_application(cursor, app_id)
+        queries += 1
+    return queries
+
+def cached(cursor, app_ids):
+    # The row cache: a selection is served from the cache, and the rows
+    # around it are read ahead in one query once fewer than half of
+    # PREFETCH_ROWS are cached on either side
+    cache = RowCache(ROW_CACHE_SIZE)
+    queries = 0
+    for index, app_id in enumerate(app_ids):
+        nearby = app_ids[max(0, index - PREFETCH_ROWS // 2):index + PREFETCH_ROWS // 2 + 1]
+        if not all(nearby_id in cache for nearby_id in nearby):
+            ahead = app_ids[max(0, index - PREFETCH_ROWS):index + PREFETCH_ROWS + 1]
+            cache.put_rows(fetch_applications(cursor, [i for i in ahead if i not in cache]), cache.version)
+            queries += 1
+        assert cache.get(app_id) is not None
+    return queries
+
+def memory(rows, make):
+    tracemalloc.start()
+    records = [make(row) for row in rows]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size / len(rows)
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_row_cache.db')
+        create_database(path, SIZE)
+        conn = connect_database(path)
+        cursor = conn.cursor()
+        # Arrowing down through a search's result list
+        cursor.execute("SELECT rowid FROM applications_fts WHERE applications_fts MATCH 'engineer' LIMIT ?", (STEPS,))
+        app_ids = [row[0] for row in cursor.fetchall()]
+        print(f"{'lookup':>10} {'queries':>8} {'per step (us)':>14}")
+        for name, func in (('per row', per_row), ('cached', cached)):
+            start = time.perf_counter()
+            queries = func(cursor, app_ids)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {queries:>8} {elapsed / len(app_ids) * 1e6:>14.1f}")
+        # In the window every query is a trip to the reader thread, and its
+        # result is only shown on the worker's next poll
+        print(f"In the window each query delays the details by up to {POLL_MS} ms.")
+
+        cursor.execute(f"SELECT {', '.join(APPLICATION_COLUMNS)} FROM applications LIMIT ?", (ROW_CACHE_SIZE,))
+        rows = cursor.fetchall()
+        # The strings are shared by all three, so this is the record overhead
+        print(f"\n{'record':>10} {'bytes':>6}")
+        for name, make in (
+            ('tuple', lambda row: (*row,)),
+            ('dict', lambda row: dict(zip(ApplicationRecord.__slots__, row))),
+            ('__slots__', ApplicationRecord)
+        ):
+            print(f"{name:>10} {memory(rows, make):>6.0f}")
+        conn.close()
+
+if __name__ == '__main__':
+    main()
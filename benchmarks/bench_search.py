@@ -0,0 +1,56 @@
+import os
+import sqlite3
+import tempfile
+
+from benchmarks.bench_visualization import best_of, create_applications
+from store import RANKED_SEARCH_LIMIT, connect_database, fts_query
+
+# Run from the repository root: python -m benchmarks.bench_search
+
+SIZES = (10000, 100000, 1000000)
+PAGE = 50
+
+def search_like(cursor, term):
+    # The original search: a substring match that scans the whole table
+    cursor.execute('SELECT COUNT(*) FROM applications WHERE company LIKE ?', (f"%{term}%",))
+    count = cursor.fetchone()[0]
+    cursor.execute(
+        'SELECT id, company, position, status, date_applied FROM applications WHERE company LIKE ? ORDER BY id LIMIT ?',
+        (f"%{term}%", PAGE)
+    )
+    return count, cursor.fetchall()
+
+def search_fts(cursor, term):
+    # Same strategy as the Treeview: ranked when the result is small enough
+    match = fts_query(term, 'company')
+    cursor.execute('SELECT COUNT(*) FROM applications_fts WHERE applications_fts MATCH ?', (match,))
+    count = cursor.fetchone()[0]
+    order = 'applications_fts.rank, applications.id' if count <= RANKED_SEARCH_LIMIT else 'applications_fts.rowid'
+    cursor.execute(f'''
+        SELECT applications.id, applications.company, applications.position,
+               applications.status, applications.date_applied
+        FROM applications JOIN applications_fts ON applications_fts.rowid = applications.id
+        WHERE applications_fts MATCH ? ORDER BY {order} LIMIT ?
+    ''', (match, PAGE))
+    return count, cursor.fetchall()
+
+def main():
+    print(f"{'rows':>8} {'term':>10} {'matches':>8} {'LIKE (ms)':>10} {'FTS (ms)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"bench_{size}.db")
+            conn = sqlite3.connect(path)
+            create_applications(conn, size)
+            conn.close()
+            # Adds the full-text index and its triggers to the existing table
+            conn = connect_database(path)
+            cursor = conn.cursor()
+            # Synthetic companies are named "Company <n>": one rare and one common word
+            for term in ('4321', 'company'):
+                before, (count, _) = best_of(3, search_like, cursor, term)
+                after, (fts_count, _) = best_of(3, search_fts, cursor, term)
+                print(f"{size:>8} {term:>10} {fts_count:>8} {before * 1000:>10.1f} {after * 1000:>9.1f}")
+            conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_visualization import STATUSES, create_applications
+from server import ApplicationServer, ConnectionPool
+
+# Run from the repository root: python -m benchmarks.bench_server
+
+SIZE = 100000
+POOL_SIZES = (1, 8)
+CLIENTS = (1, 16, 64)
+REQUESTS_PER_CLIENT = 20
+# Every fifth request adds an application, the others read a page, a
+# filtered chart count or the monthly counts
+READS = (
+    '/applications?limit=50&sort=date&from=2021-01-01',
+    '/stats/statuses?from=2020-01-01&to=2021-12-31',
+    '/stats/monthly?q=company%201'
+)
+
+async def request(reader, writer, method, path, body=None):
+    data = b'' if body is None else json.dumps(body).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = next(int(line.split(b':')[1]) for line in head.split(b'\r\n') if line.lower().startswith(b'content-length'))
+    await reader.readexactly(length)
+    return int(head.split()[1])
+
+async def client(port, number, latencies, failures):
+    # One keep-alive connection sending requests one after another
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for i in range(REQUESTS_PER_CLIENT):
+        start = time.perf_counter()
+        if i % 5 == 4:
+            record = {
+                'company': f"Client {number}", 'position': f"Position {i}",
+                'status': STATUSES[i % len(STATUSES)], 'date_applied': f"{i % 28 + 1:02d}.03.2024"
+            }
+            status = await request(reader, writer, 'POST', '/applications', record)
+        else:
+            status = await request(reader, writer, 'GET', READS[i % len(READS)])
+        latencies.append(time.perf_counter() - start)
+        if status >= 400:
+            failures.append(status)
+    writer.close()
+
+async def run(path, pool_size, clients):
+    pool = ConnectionPool(path, pool_size)
+    server = await asyncio.start_server(ApplicationServer(pool).handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    latencies, failures = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, number, latencies, failures) for number in range(clients)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    pool.close()
+    latencies.sort()
+    return len(latencies) / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.99)], len(failures)
+
+def main():
+    print(f"{'pool':>5} {'clients':>8} {'requests/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_server.db')
+        conn = sqlite3.connect(path)
+        create_applications(conn, SIZE)
+        conn.close()
+        for pool_size in POOL_SIZES:
+            for clients in CLIENTS:
+                rate, p50, p99, failures = asyncio.run(run(path, pool_size, clients))
+                print(f"{pool_size:>5} {clients:>8} {rate:>11.0f} {p50 * 1000:>9.1f} {p99 * 1000:>9.1f} {failures:>7}")
+
+if __name__ == '__main__':
+    main()
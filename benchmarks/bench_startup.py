@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_visualization import create_applications
+from main import connect_database
+
+# Run from the repository root (needs a display): python -m benchmarks.bench_startup
+
+SIZE = 100000
+RUNS = 5
+
+# Started in a fresh interpreter per run so nothing is imported yet. Measures
+# the time from interpreter start-up to the first Expose event of the window
+# and to the first rendering of the chart with counts in it. "eager" imports
+# pyplot up front the way main.py used to, before the window could appear
+CHILD = '''
+import sys
+import time
+started = time.perf_counter()
+if sys.argv[2] == 'eager':
+    import matplotlib.pyplot
+import json
+import tkinter as tk
+import main
+
+main.DB_PATH = sys.argv[1]
+timings = {}
+create_visualization = main.ApplicationTracker.create_visualization
+
+def on_draw(event):
+    if app.chart.counts is not None:
+        timings.setdefault('chart', time.perf_counter() - started)
+
+def traced_create_visualization(self):
+    create_visualization(self)
+    self.canvas.mpl_connect('draw_event', on_draw)
+
+main.ApplicationTracker.create_visualization = traced_create_visualization
+root = tk.Tk()
+root.bind('<Expose>', lambda event: timings.setdefault('first_paint', time.perf_counter() - started))
+app = main.ApplicationTracker(root)
+
+def finish():
+    if len(timings) < 2:
+        root.after(5, finish)
+        return
+    print(json.dumps(timings))
+    app.close_connection()
+    root.destroy()
+
+root.after(5, finish)
+root.mainloop()
+'''
+
+def measure(path, mode):
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD, path, mode],
+        capture_output=True, text=True, check=True, timeout=60
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench_startup.db')
+        conn = sqlite3.connect(path)
+        create_applications(conn, SIZE)
+        conn.close()
+        connect_database(path).close()
+        print(f"{'mode':>6} {'first paint (ms)':>17} {'chart (ms)':>11}")
+        for mode in ('eager', 'lazy'):
+            runs = [measure(path, mode) for _ in range(RUNS)]
+            first_paint = statistics.median(run['first_paint'] for run in runs)
+            chart = statistics.median(run['chart'] for run in runs)
+            print(f"{mode:>6} {first_paint * 1000:>17.1f} {chart * 1000:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from store import count_statuses
+
+# Run from the repository root: python -m benchmarks.bench_visualization
+
+SIZES = (1000, 10000, 100000)
+STATUSES = ('No Answer', 'Interviewing', 'Offered', 'Accepted', 'Rejected', 'Offer Rejected')
+
+def create_applications(conn, size):
+    conn.execute('''
+        CREATE TABLE applications (
+            id INTEGER PRIMARY KEY,
+            company TEXT NOT NULL,
+            position TEXT NOT NULL,
+            status TEXT NOT NULL,
+            date_applied TEXT NOT NULL,
+            rejection_stage TEXT,
+            received_coding_challenge INTEGER DEFAULT 0,
+            received_interview INTEGER DEFAULT 0
+        )
+    ''')
+    rng = random.Random(size)
+    rows = []
+    for i in range(size):
+        status = rng.choice(STATUSES)
+        received_interview = int(status == 'Rejected' and rng.random() < 0.3)
+        received_coding_challenge = int(status == 'Rejected' and not received_interview and rng.random() < 0.3)
+        rows.append((
+            f"Company {i % 5000}", f"Position {i % 300}", status,
+            f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(2018, 2024)}",
+            received_coding_challenge, received_interview
+        ))
+    conn.executemany('''
+        INSERT INTO applications (
+            company, position, status, date_applied, received_coding_challenge, received_interview
+        )
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+    conn.commit()
+
+def refresh_per_row(cursor, app_ids):
+    # The original refresh: one lookup per Treeview item, counted in Python
+    data = []
+    for app_id in app_ids:
+        cursor.execute('SELECT status, received_interview, received_coding_challenge FROM applications WHERE id=?', (app_id,))
+        data.append(cursor.fetchone())
+    status_counts = {}
+    for status, received_interview, received_coding_challenge in data:
+        if status == 'Rejected':
+            if received_interview:
+                status = 'Rejected after Interview'
+            elif received_coding_challenge:
+                status = 'Rejected after Coding Challenge'
+            else:
+                status = 'Rejected without Interview'
+        status_counts[status] = status_counts.get(status, 0) + 1
+    return status_counts
+
+def best_of(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    print(f"{'rows':>8} {'search':>8} {'per-row (ms)':>14} {'aggregate (ms)':>16} {'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            conn = sqlite3.connect(os.path.join(directory, f"bench_{size}.db"))
+            create_applications(conn, size)
+            cursor = conn.cursor()
+            for label, condition, params in (('none', '', ()), ('company', 'company LIKE ?', ('%1%',))):
+                query = 'SELECT id FROM applications'
+                if condition:
+                    query += f" WHERE {condition}"
+                app_ids = [row[0] for row in cursor.execute(query, params)]
+                before, expected = best_of(3, refresh_per_row, cursor, app_ids)
+                after, status_counts = best_of(3, count_statuses, cursor, condition, params)
+                assert expected == {status: count for status, count in status_counts.items() if count}
+                print(f"{size:>8} {label:>8} {before * 1000:>14.1f} {after * 1000:>16.1f} {before / after:>8.1f}x")
+            conn.close()
+
+if __name__ == '__main__':
+    main()
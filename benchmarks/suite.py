@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import create_database
+from store import (
+    ALL_APPLICATIONS, connect_database, delete_application, fetch_tree_rows, fts_query,
+    insert_application, load_search_results, search_charts, update_application_status
+)
+
+# Run from the repository root:
+#   python -m benchmarks.suite [--sizes 1000 10000 100000 1000000] [--output results.json] [--compare baseline.json]
+#
+# Times the app's key operations on synthetic tables through the Tk-free
+# store layer, the queries the window runs on its worker threads. With a
+# display (e.g. under xvfb-run) the window's startup is timed as well.
+
+SIZES = (1000, 10000, 100000)
+REPEAT = 5
+# Rows the window loads for its first view: 10 visible plus the overscan
+PAGE = 30
+ROUND_TRIPS = 20
+# Against a baseline, the best runs are compared; changes of more than
+# TOLERANCE are flagged unless they are under MIN_CHANGE_MS
+TOLERANCE = 0.25
+MIN_CHANGE_MS = 0.5
+
+SEARCHES = {
+    'search_text': (fts_query('data engineer'), None, None, False, False),
+    'search_company': (fts_query('nova', 'company'), None, None, False, False),
+    'search_dates': (None, '2023-01-01', '2023-12-31', True, False)
+}
+
+def startup(path):
+    # Opening the database (schema checks included) and loading the first view
+    conn = connect_database(path)
+    load_search_results(conn.cursor(), ALL_APPLICATIONS, PAGE)
+    conn.close()
+
+def populate(cursor):
+    load_search_results(cursor, ALL_APPLICATIONS, PAGE)
+
+def scroll(cursor):
+    # Dragging the scrollbar to the middle and to the end
+    row_count = cursor.execute('SELECT COUNT(*) FROM applications').fetchone()[0]
+    fetch_tree_rows(cursor, ALL_APPLICATIONS, ('applications.id',), PAGE, offset=row_count // 2)
+    fetch_tree_rows(cursor, ALL_APPLICATIONS, ('applications.id',), PAGE, before=(sys.maxsize,))
+
+def round_trip(conn):
+    # Adding, changing and deleting an application, each committed on its
+    # own with a synced commit, like single edits in the window
+    cursor = conn.cursor()
+    for _ in range(ROUND_TRIPS):
+        cursor.execute('BEGIN IMMEDIATE')
+        app_id = insert_application(
+            cursor, ('Benchmark', 'Engineer', 'No Answer', '01.06.2024', '2024-06-01', None, 0, 0)
+        )
+        conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        update_application_status(cursor, app_id, 'Rejected', 'Phone screen', 0, 0)
+        conn.commit()
+        cursor.execute('BEGIN IMMEDIATE')
+        delete_application(cursor, app_id)
+        conn.commit()
+
+def chart_draw(charts, chart_data):
+    # Redrawing both charts on the Agg backend for each of the chart data in
+    # turn, so every draw has new data
+    figure, chart, funnel_figure, funnel_chart = charts
+    for status_counts, funnel in chart_data:
+        chart.update(status_counts)
+        funnel_chart.update(funnel)
+        figure.canvas.draw()
+        funnel_figure.canvas.draw()
+
+def create_charts():
+    # None if matplotlib is not installed
+    try:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+    except ImportError:
+        return None
+    from chart import FunnelChart, StatusChart
+    from store import FUNNEL_STAGES
+    figure, funnel_figure = Figure(figsize=(6, 4), dpi=100), Figure(figsize=(4, 4), dpi=100)
+    FigureCanvasAgg(figure)
+    FigureCanvasAgg(funnel_figure)
+    return figure, StatusChart(figure), funnel_figure, FunnelChart(funnel_figure, FUNNEL_STAGES)
+
+def measure(repeat, func, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'max_ms': max(timings) * 1000,
+        'runs': repeat
+    }
+
+def per_call(timing, calls):
+    return {name: value / calls if name.endswith('_ms') else value for name, value in timing.items()}
+
+def measure_window(path, repeat):
+    # Time to the window's first paint and first chart in a fresh
+    # interpreter, or nothing without a display
+    if not os.environ.get('DISPLAY'):
+        return {}
+    from benchmarks.bench_startup import measure as measure_startup
+    runs = [measure_startup(path, 'lazy') for _ in range(repeat)]
+    return {
+        f"window_{name}": {
+            'median_ms': statistics.median(run[name] for run in runs) * 1000,
+            'min_ms': min(run[name] for run in runs) * 1000,
+            'max_ms': max(run[name] for run in runs) * 1000,
+            'runs': repeat
+        }
+        for name in ('first_paint', 'chart')
+    }
+
+def run_size(directory, size, repeat):
+    path = os.path.join(directory, f"suite_{size}.db")
+    start = time.perf_counter()
+    create_database(path, size)
+    generated = time.perf_counter() - start
+    results = {'startup': measure(repeat, startup, path)}
+    conn = connect_database(path)
+    cursor = conn.cursor()
+    results['populate'] = measure(repeat, populate, cursor)
+    results['scroll'] = measure(repeat, scroll, cursor)
+    for name, search in SEARCHES.items():
+        results[name] = measure(repeat, load_search_results, cursor, search, PAGE)
+    results['chart_refresh'] = measure(repeat, search_charts, cursor, ALL_APPLICATIONS)
+    results['chart_refresh_search'] = measure(repeat, search_charts, cursor, SEARCHES['search_text'])
+    # Per round trip of three commits
+    results['round_trip'] = per_call(measure(repeat, round_trip, conn), ROUND_TRIPS)
+    charts = create_charts()
+    if charts is not None:
+        chart_data = [search_charts(cursor, ALL_APPLICATIONS), search_charts(cursor, SEARCHES['search_text'])]
+        results['chart_draw'] = per_call(measure(repeat, chart_draw, charts, chart_data), len(chart_data))
+    conn.close()
+    results.update(measure_window(path, repeat))
+    return generated, results
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+def compare(report, baseline):
+    # Timings against a baseline report, for the sizes and operations in
+    # both; returns the number of regressions
+    print(f"\n{'rows':>8} {'operation':>21} {'baseline (ms)':>14} {'now (ms)':>9} {'change':>8}")
+    regressions = 0
+    for size, operations in report['results'].items():
+        for name, timing in operations.items():
+            before = baseline['results'].get(size, {}).get(name)
+            if before is None:
+                continue
+            before_ms, now_ms = before['min_ms'], timing['min_ms']
+            change = now_ms / before_ms - 1 if before_ms else 0
+            flag = ''
+            if abs(now_ms - before_ms) >= MIN_CHANGE_MS:
+                if change > TOLERANCE:
+                    flag = ' slower'
+                    regressions += 1
+                elif change < -TOLERANCE:
+                    flag = ' faster'
+            print(f"{size:>8} {name:>21} {before_ms:>14.2f} {now_ms:>9.2f} {change:>+8.0%}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the application tracker on synthetic data.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="table sizes in rows")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="runs per operation")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare with the JSON results of an earlier run")
+    args = parser.parse_args()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'repeat': args.repeat,
+        'generate_s': {},
+        'results': {}
+    }
+    print(f"{'rows':>8} {'operation':>21} {'median (ms)':>12} {'min (ms)':>9} {'max (ms)':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            generated, results = run_size(directory, size, args.repeat)
+            # JSON object keys are strings; so are the sizes, for --compare
+            report['generate_s'][str(size)] = generated
+            report['results'][str(size)] = results
+            for name, timing in results.items():
+                print(
+                    f"{size:>8} {name:>21} {timing['median_ms']:>12.2f}"
+                    f" {timing['min_ms']:>9.2f} {timing['max_ms']:>9.2f}"
+                )
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(report, json.load(file))
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
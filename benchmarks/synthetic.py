@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+
+from store import IMPORT_BATCH_SIZE, connect_database, import_row, insert_batch, update_applications_status
+
+# Synthetic application tables for the benchmarks: company and position
+# names drawn from skewed pools (a few companies get many applications),
+# statuses weighted like a real job search, rejection details on rejected
+# applications and dates over the last YEARS. The same size and seed give
+# the same table, up to the dates moving along with today.
+
+YEARS = 4
+
+COMPANY_PARTS = (
+    ('Acme', 'Blue', 'North', 'Bright', 'Data', 'Green', 'Hyper', 'Iron', 'Nova', 'Open',
+     'Quantum', 'Red', 'Silver', 'Smart', 'Stone', 'Sun', 'Terra', 'Urban', 'Vertex', 'Zen'),
+    ('bridge', 'cloud', 'forge', 'labs', 'logic', 'mind', 'path', 'soft', 'stack', 'works'),
+    ('', ' GmbH', ' Inc.', ' AG', ' Ltd.', ' Systems', ' Technologies', ' Analytics')
+)
+SENIORITIES = ('Junior', '', '', 'Senior', 'Staff', 'Lead', 'Working Student')
+ROLES = (
+    'Software Engineer', 'Data Scientist', 'Data Engineer', 'Backend Developer',
+    'Frontend Developer', 'Machine Learning Engineer', 'DevOps Engineer', 'Research Scientist',
+    'Product Manager', 'Data Analyst', 'Platform Engineer', 'Site Reliability Engineer'
+)
+TEAMS = ('', '', '', 'Payments', 'Search', 'Infrastructure', 'Analytics', 'Mobile', 'Security')
+# Final statuses and how often they occur
+STATUS_WEIGHTS = {
+    'No Answer': 45, 'Rejected': 38, 'Interviewing': 8, 'Offered': 3, 'Accepted': 2, 'Offer Rejected': 4
+}
+REJECTION_STAGES = ('CV screening', 'Phone screen', 'Coding challenge', 'Technical interview', 'Final round')
+# Share of the answered applications entered as "No Answer" first and
+# changed later, so they have status history and response times. Their
+# answers are timed at the change, so they are all from the last RESPONSE_DAYS
+CHANGED_SHARE = 0.4
+RESPONSE_DAYS = (7, 90)
+
+def generate_records(size, seed=0):
+    # size records as read by store.import_row, plus for each whether its
+    # status is set by a later change
+    rng = random.Random(seed)
+    companies = [
+        f"{first}{second}{suffix}"
+        for first in COMPANY_PARTS[0] for second in COMPANY_PARTS[1] for suffix in COMPANY_PARTS[2]
+    ]
+    rng.shuffle(companies)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    today = date.today()
+    for _ in range(size):
+        # Log-uniform company rank: a few companies get many applications,
+        # with a long tail of rarely used names
+        company = companies[int(len(companies) ** rng.random()) - 1]
+        position = ' '.join(filter(None, (rng.choice(SENIORITIES), rng.choice(ROLES), rng.choice(TEAMS))))
+        status = rng.choices(statuses, weights)[0]
+        changed = status != 'No Answer' and rng.random() < CHANGED_SHARE
+        if changed:
+            applied = today - timedelta(days=rng.randint(*RESPONSE_DAYS))
+        else:
+            applied = today - timedelta(days=rng.randrange(YEARS * 365))
+            if applied > today - timedelta(days=RESPONSE_DAYS[0]):
+                # Too recent for an answer
+                status = 'No Answer'
+        record = {
+            'company': company, 'position': position, 'status': status,
+            'date_applied': applied.strftime('%d.%m.%Y')
+        }
+        if status == 'Rejected':
+            stage = rng.randrange(len(REJECTION_STAGES))
+            record['rejection_stage'] = REJECTION_STAGES[stage]
+            record['received_coding_challenge'] = int(stage >= 2)
+            record['received_interview'] = int(stage >= 3)
+        yield record, changed
+
+def create_database(path, size, seed=0):
+    # Builds a new database through the import path, then applies the later
+    # status changes grouped by their new status
+    conn = connect_database(path)
+    cursor = conn.cursor()
+    batch = []
+    changes = {}
+    for number, (record, changed) in enumerate(generate_records(size, seed), start=1):
+        values = import_row(record)
+        if changed:
+            changes.setdefault(values[2:3] + values[5:], []).append(number)
+            values = values[:2] + ('No Answer',) + values[3:5] + (None, 0, 0)
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            insert_batch(cursor, batch)
+            conn.commit()
+            batch = []
+    if batch:
+        insert_batch(cursor, batch)
+    conn.commit()
+    for (status, rejection_stage, received_coding_challenge, received_interview), app_ids in changes.items():
+        update_applications_status(cursor, app_ids, status, rejection_stage, received_coding_challenge, received_interview)
+    conn.commit()
+    conn.close()
@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+class ApplicationRecord:
+    # One application as shown in the details form. __slots__ keeps a
+    # record to the size of its fields, without a per-instance dict
+    __slots__ = (
+        'id', 'company', 'position', 'status', 'date_applied',
+        'rejection_stage', 'received_coding_challenge', 'received_interview'
+    )
+
+    def __init__(self, row):
+        # row as returned by store.fetch_application
+        (
+            self.id, self.company, self.position, self.status, self.date_applied,
+            self.rejection_stage, self.received_coding_challenge, self.received_interview
+        ) = row
+
+class RowCache:
+    # Bounded cache of application records by id; once full, the least
+    # recently used record is evicted. Rows are read on the worker threads,
+    # so a read may finish after a write that changed one of its rows:
+    # every invalidation bumps version, and rows read before it are dropped
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.records = OrderedDict()
+        self.version = 0
+
+    def __contains__(self, app_id):
+        return app_id in self.records
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, app_id):
+        # The record, or None if it is not cached
+        record = self.records.get(app_id)
+        if record is not None:
+            self.records.move_to_end(app_id)
+        return record
+
+    def put_rows(self, rows, version):
+        # Cache rows read when the cache was at version; returns False if
+        # they were dropped because the cache was invalidated since
+        if version != self.version:
+            return False
+        for row in rows:
+            self.records[row[0]] = ApplicationRecord(row)
+            self.records.move_to_end(row[0])
+        while len(self.records) > self.capacity:
+            self.records.popitem(last=False)
+        return True
+
+    def invalidate(self, app_id):
+        self.records.pop(app_id, None)
+        self.version += 1
+
+    def clear(self):
+        self.records.clear()
+        self.version += 1
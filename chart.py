@@ -0,0 +1,176 @@
+import math
+from matplotlib.patches import Wedge
+
+# Chart categories in legend order, with their colors
+CHART_COLORS = {
+    'No Answer': 'lightgrey',
+    'Interviewing': 'gold',
+    'Offered': 'lightgreen',
+    'Accepted': 'blue',
+    'Offer Rejected': 'lightblue',
+    'Rejected without Interview': 'salmon',
+    'Rejected after Coding Challenge': 'orangered',
+    'Rejected after Interview': 'red'
+}
+
+START_ANGLE = 140
+
+class StatusChart:
+    # Pie chart of the status categories that keeps its artists: an update
+    # moves the wedges and percentage labels instead of clearing the axes,
+    # drawing a new pie and laying the figure out again
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.ax = figure.add_subplot(111)
+        # What ax.pie would set up
+        self.ax.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.25))
+        self.ax.set_aspect('equal', adjustable='datalim')
+        self.wedges = {}
+        self.labels = {}
+        for category, color in CHART_COLORS.items():
+            # Added as full circles so the data limits match those of a pie
+            self.wedges[category] = self.ax.add_patch(Wedge((0, 0), 1, 0, 360, facecolor=color, clip_on=False, visible=False))
+            self.labels[category] = self.ax.text(0, 0, '', horizontalalignment='center', verticalalignment='center', visible=False)
+        self.empty_text = self.ax.text(
+            0.5, 0.5,
+            'No Data Available',
+            horizontalalignment='center',
+            verticalalignment='center',
+            fontsize=16,
+            transform=self.ax.transAxes,
+            visible=False
+        )
+        # Lay the figure out once, with room for a legend of every category
+        self.legend = self.add_legend(list(CHART_COLORS))
+        self.figure.tight_layout()
+        self.legend_categories = None
+        self.counts = None
+
+    def add_legend(self, categories):
+        return self.ax.legend(
+            [self.wedges[category] for category in categories], categories,
+            title="Statuses", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1)
+        )
+
+    def update(self, status_counts):
+        # Show new category counts; returns False if they are already shown
+        counts = {category: status_counts[category] for category in CHART_COLORS if status_counts.get(category, 0) > 0}
+        if counts == self.counts:
+            return False
+        self.counts = counts
+
+        # Same geometry as ax.pie: counterclockwise from START_ANGLE, with
+        # the percentages at 0.6 of the radius
+        total = sum(counts.values())
+        theta = START_ANGLE
+        for category in CHART_COLORS:
+            wedge, label = self.wedges[category], self.labels[category]
+            count = counts.get(category, 0)
+            wedge.set_visible(count > 0)
+            label.set_visible(count > 0)
+            if count:
+                share = count / total
+                wedge.set_theta1(theta)
+                wedge.set_theta2(theta + 360 * share)
+                middle = math.radians(theta + 180 * share)
+                label.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))
+                label.set_text(f"{share * 100:.1f}%")
+                theta += 360 * share
+        self.empty_text.set_visible(not counts)
+
+        # The legend lists the categories present and is only rebuilt when
+        # one appears or disappears
+        if list(counts) != self.legend_categories:
+            self.legend_categories = list(counts)
+            if self.legend is not None:
+                self.legend.remove()
+            self.legend = self.add_legend(self.legend_categories) if counts else None
+        return True
+
+class FunnelChart:
+    # Horizontal bars of the applications that reached each funnel stage,
+    # with the average time to the first response below them. Like
+    # StatusChart, an update edits the bars and labels in place
+
+    def __init__(self, figure, stages):
+        self.figure = figure
+        self.ax = figure.add_subplot(111)
+        self.stages = list(stages)
+        # The first stage at the top
+        positions = list(range(len(self.stages)))[::-1]
+        self.bars = self.ax.barh(positions, [0] * len(self.stages), color='steelblue', tick_label=self.stages)
+        self.labels = [self.ax.text(0, position, '', verticalalignment='center') for position in positions]
+        self.ax.set_title("Funnel")
+        self.ax.set_xticks([])
+        for side in ('top', 'right', 'bottom'):
+            self.ax.spines[side].set_visible(False)
+        # Lay the figure out once, with room for the response time line
+        self.ax.set_xlabel("Average time to first response: 000.0 days (0000 timed)")
+        self.figure.tight_layout()
+        self.ax.set_xlabel('')
+        self.metrics = None
+
+    def update(self, funnel):
+        # Show new funnel metrics as returned by store.search_funnel; returns
+        # False if they are already shown
+        if funnel == self.metrics:
+            return False
+        self.metrics = funnel
+        stage_counts, response_weeks = funnel
+        applied = stage_counts[self.stages[0]]
+        for bar, label, stage in zip(self.bars, self.labels, self.stages):
+            count = stage_counts[stage]
+            bar.set_width(count)
+            label.set_x(count)
+            label.set_text(f" {count} ({count / applied:.0%})" if applied else " 0")
+        # Room to the right of the longest bar for its label
+        self.ax.set_xlim(0, max(applied, 1) * 1.35)
+
+        responses = sum(count for count, _ in response_weeks.values())
+        days = sum(days for _, days in response_weeks.values())
+        if responses:
+            self.ax.set_xlabel(f"Average time to first response: {days / responses:.1f} days ({responses} timed)")
+        else:
+            self.ax.set_xlabel("No response times recorded yet")
+        return True
+
+class TimelineChart:
+    # Applications per month applied, as bars. The months shown change with
+    # the data, so unlike the other charts an update draws new bars
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.ax = figure.add_subplot(111)
+        self.ax.set_title("Applications per Month")
+        for side in ('top', 'right'):
+            self.ax.spines[side].set_visible(False)
+        self.bars = None
+        self.empty_text = self.ax.text(
+            0.5, 0.5,
+            'No Data Available',
+            horizontalalignment='center',
+            verticalalignment='center',
+            fontsize=16,
+            transform=self.ax.transAxes,
+            visible=False
+        )
+        self.months = None
+
+    def update(self, months):
+        # Show new monthly counts as returned by store.count_by_month;
+        # returns False if they are already shown
+        months = [tuple(month) for month in months]
+        if months == self.months:
+            return False
+        self.months = months
+        if self.bars is not None:
+            self.bars.remove()
+        positions = list(range(len(months)))
+        self.bars = self.ax.bar(positions, [count for _, count in months], color='steelblue')
+        # At most about a dozen month labels
+        step = max(1, math.ceil(len(months) / 12))
+        self.ax.set_xticks(positions[::step], [month for month, _ in months][::step], rotation=45, horizontalalignment='right')
+        self.empty_text.set_visible(not months)
+        self.figure.tight_layout()
+        return True
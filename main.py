@@ -1,42 +1,109 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import sqlite3
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import bisect
+import argparse
+import os
+import sys
+import threading
+import time
+from worker import DatabaseWorker
+from backup import (
+    BACKUP_DIR, BACKUP_INTERVAL_MINUTES, BACKUP_KEEP, BackupCancelled, check_backup, create_backup, last_backup_age,
+    restore_backup
+)
+from cache import RowCache
+from metrics import SLOW_MS, Metrics
+from store import (
+    ALL_APPLICATIONS, ARCHIVE_AFTER_DAYS, DB_PATH, FUNNEL_STAGES, ExportCancelled, IMPORT_BATCH_SIZE, RANKED_SORT, SEARCH_COLUMNS, STATUSES, TREE_COLUMNS,
+    archive_applications, check_funnel_summary, check_status_summary, connect_database, count_tree_rows, data_version,
+    delete_application, export_applications, fetch_applications, fetch_changes, fetch_tree_row, fetch_tree_rows, fetch_tree_rows_by_id,
+    fts_query, import_applications, insert_application, insert_batch, latest_change, load_search_results, parse_date,
+    read_import_batches, rebuild_funnel_summary, rebuild_status_summary, search_charts, sort_key, update_application_status,
+    update_applications_status, update_search_status
+)
+
+# Rows kept in memory above and below the visible part of the Treeview
+TREE_OVERSCAN = 20
+
+# Search-as-you-type: wait this long after the last keystroke before searching
+SEARCH_DEBOUNCE_MS = 250
+
+# Chart updates arriving within one frame are drawn together
+CHART_REDRAW_MS = 16
+
+# Applications kept for the details form, and how many rows around the
+# selection are read ahead into the cache
+ROW_CACHE_SIZE = 5000
+PREFETCH_ROWS = TREE_OVERSCAN
+
+# Edits made within this window are committed together, up to this many
+COMMIT_WINDOW_MS = 50
+COMMIT_GROUP_SIZE = 500
+
+# Changes made by other instances (or the HTTP API) are looked for this
+# often; more than CHANGE_FEED_LIMIT at once are applied by reloading the list
+CHANGE_POLL_MS = 500
+CHANGE_FEED_LIMIT = 500
+
+# Scheduled backups wait this long after startup at least, so a backup that
+# is due does not compete with loading the window
+BACKUP_STARTUP_DELAY_MS = 10000
+
+def read_change_feed(cursor, search, sort_keys, since, seen, own):
+    # (data version, feed): the feed is None if no other connection has
+    # committed since data version seen; PRAGMA data_version tells without
+    # any I/O. Otherwise it holds the latest change version, the changes
+    # after version since but outside the version ranges own (None if there
+    # are too many) and their rows for the search, only reading the changed
+    # applications however long the list
+    version = data_version(cursor)
+    if version == seen:
+        return version, None
+    latest, changes = fetch_changes(cursor, since, CHANGE_FEED_LIMIT, own)
+    rows = fetch_tree_rows_by_id(cursor, search, sort_keys, [change[1] for change in changes]) if changes else {}
+    return version, (latest, changes, rows)
 
 class ApplicationTracker:
-    def __init__(self, root):
+    def __init__(
+        self, root, durable=True, metrics=None, metrics_path=None,
+        backup_dir=BACKUP_DIR, backup_interval=BACKUP_INTERVAL_MINUTES, backup_keep=BACKUP_KEEP
+    ):
         self.root = root
+        self.durable = durable
+        # An online backup to backup_dir every backup_interval minutes (never
+        # for 0), on a thread of its own; the newest backup_keep are kept
+        self.backup_dir = backup_dir
+        self.backup_interval = backup_interval
+        self.backup_keep = backup_keep
+        self.backup_thread = None
+        self.backup_after_id = None
+        self.backup_closing = threading.Event()
+        # A running export, on a thread of its own as well
+        self.export_thread = None
+        self.export_cancelled = threading.Event()
+        # Timings of every operation, per phase; F10 writes them to metrics_path
+        self.metrics = metrics or Metrics()
+        self.metrics_path = metrics_path or 'metrics.json'
         self.root.title("Job Application Tracker")
         self.create_database()
         self.create_widgets()
-        self.create_visualization()
         self.populate_treeview()
+        self.change_poll_after_id = self.root.after(CHANGE_POLL_MS, self.poll_changes)
+        self.schedule_backup()
         self.configure_grid()
+        # Importing matplotlib takes longer than building everything else, so
+        # the chart is only created once the window is on screen
+        self.root.after_idle(self.create_visualization)
 
     def create_database(self):
-        self.conn = sqlite3.connect('applications.db')
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS applications (
-                id INTEGER PRIMARY KEY,
-                company TEXT NOT NULL,
-                position TEXT NOT NULL,
-                status TEXT NOT NULL,
-                date_applied TEXT NOT NULL
-            )
-        ''')
-        self.conn.commit()
-        # Ensure new columns exist
-        self.cursor.execute("PRAGMA table_info(applications)")
-        columns = [column_info[1] for column_info in self.cursor.fetchall()]
-        if 'rejection_stage' not in columns:
-            self.cursor.execute("ALTER TABLE applications ADD COLUMN rejection_stage TEXT")
-        if 'received_coding_challenge' not in columns:
-            self.cursor.execute("ALTER TABLE applications ADD COLUMN received_coding_challenge INTEGER DEFAULT 0")
-        if 'received_interview' not in columns:
-            self.cursor.execute("ALTER TABLE applications ADD COLUMN received_interview INTEGER DEFAULT 0")
-        self.conn.commit()
+        # All SQLite work runs on the worker's threads; the writer opens the
+        # database (and migrates it) first
+        self.db = DatabaseWorker(
+            self.root, DB_PATH, connect_database, self.report_error,
+            commit_window_ms=COMMIT_WINDOW_MS, commit_group_size=COMMIT_GROUP_SIZE, durable=self.durable,
+            metrics=self.metrics
+        )
 
     def create_widgets(self):
         # Frame for form inputs
@@ -61,7 +128,7 @@ class ApplicationTracker:
         tk.Label(self.form_frame, text="Status:").grid(row=0, column=2, padx=5, pady=5, sticky='e')
         self.status_var = tk.StringVar()
         self.status_combobox = ttk.Combobox(self.form_frame, textvariable=self.status_var, state='readonly')
-        self.status_combobox['values'] = ('No Answer', 'Interviewing', 'Offered', 'Accepted', 'Rejected', 'Offer Rejected')
+        self.status_combobox['values'] = STATUSES
         self.status_combobox.grid(row=0, column=3, padx=5, pady=5, sticky='ew')
         self.status_combobox.current(0)
         self.status_combobox.bind('<<ComboboxSelected>>', self.on_status_change)
@@ -113,6 +180,8 @@ class ApplicationTracker:
         tk.Label(self.search_frame, text="Search:").grid(row=0, column=0, padx=5, pady=5, sticky='e')
         self.search_entry = tk.Entry(self.search_frame)
         self.search_entry.grid(row=0, column=1, padx=5, pady=5, sticky='ew')
+        self.search_entry.bind('<KeyRelease>', self.schedule_search)
+        self.search_entry.bind('<Return>', lambda event: self.search_entries())
 
         # Search Criteria
         tk.Label(self.search_frame, text="In:").grid(row=0, column=2, padx=5, pady=5, sticky='e')
@@ -122,14 +191,35 @@ class ApplicationTracker:
             textvariable=self.search_criteria_var,
             state='readonly'
         )
-        self.search_criteria_combobox['values'] = ('Company', 'Position', 'Status')
+        self.search_criteria_combobox['values'] = ('All Fields', 'Company', 'Position', 'Status', 'Rejection Stage')
         self.search_criteria_combobox.grid(row=0, column=3, padx=5, pady=5, sticky='ew')
         self.search_criteria_combobox.current(0)
+        self.search_criteria_combobox.bind('<<ComboboxSelected>>', self.schedule_search)
 
         # Search Buttons
         tk.Button(self.search_frame, text="Search", command=self.search_entries).grid(row=0, column=4, padx=5, pady=5)
         tk.Button(self.search_frame, text="Clear Search", command=self.clear_search).grid(row=0, column=5, padx=5, pady=5)
 
+        # Date Range
+        tk.Label(self.search_frame, text="Applied From:").grid(row=1, column=0, padx=5, pady=5, sticky='e')
+        self.date_from_entry = tk.Entry(self.search_frame)
+        self.date_from_entry.grid(row=1, column=1, padx=5, pady=5, sticky='ew')
+        tk.Label(self.search_frame, text="To:").grid(row=1, column=2, padx=5, pady=5, sticky='e')
+        self.date_to_entry = tk.Entry(self.search_frame)
+        self.date_to_entry.grid(row=1, column=3, padx=5, pady=5, sticky='ew')
+        for entry in (self.date_from_entry, self.date_to_entry):
+            entry.bind('<KeyRelease>', self.schedule_search)
+            entry.bind('<Return>', lambda event: self.search_entries())
+
+        # Searches and charts cover the archived applications only when asked to
+        self.include_archive_var = tk.IntVar()
+        tk.Checkbutton(
+            self.search_frame,
+            text="Include Archive",
+            variable=self.include_archive_var,
+            command=lambda: self.start_search(force=True)
+        ).grid(row=1, column=4, columnspan=2, padx=5, pady=5, sticky='w')
+
         # Configure grid weights in search_frame
         self.search_frame.columnconfigure(1, weight=1)
         self.search_frame.columnconfigure(3, weight=1)
@@ -147,6 +237,25 @@ class ApplicationTracker:
         # Delete Entry Button
         tk.Button(self.buttons_frame, text="Delete Entry", command=self.delete_entry).grid(row=0, column=2, padx=5, pady=5)
 
+        # Import Button
+        self.import_button = tk.Button(self.buttons_frame, text="Import...", command=self.import_file)
+        self.import_button.grid(row=0, column=3, padx=5, pady=5)
+
+        # Export Button
+        self.export_button = tk.Button(self.buttons_frame, text="Export...", command=self.export_file)
+        self.export_button.grid(row=0, column=4, padx=5, pady=5)
+
+        # Archive Button
+        tk.Button(self.buttons_frame, text="Archive...", command=self.archive_closed).grid(row=0, column=5, padx=5, pady=5)
+
+        # Backup Button
+        self.backup_button = tk.Button(self.buttons_frame, text="Back Up Now", command=self.start_backup)
+        self.backup_button.grid(row=0, column=6, padx=5, pady=5)
+
+        # Progress of a running import or export
+        self.progress_var = tk.StringVar()
+        tk.Label(self.buttons_frame, textvariable=self.progress_var).grid(row=0, column=7, padx=5, pady=5, sticky='w')
+
         # Treeview for displaying applications
         self.tree_frame = ttk.Frame(self.root)
         self.tree_frame.grid(row=3, column=0, columnspan=4, sticky='nsew', padx=5, pady=5)
@@ -162,23 +271,73 @@ class ApplicationTracker:
         self.tree.heading('Company', text='Company')
         self.tree.heading('Position', text='Position')
         self.tree.heading('Status', text='Status')
-        self.tree.heading('Date Applied', text='Date Applied')
+        self.tree.heading('Date Applied', text='Date Applied', command=self.toggle_date_sort)
         self.tree.column('ID', width=30)
         self.tree.grid(row=0, column=0, sticky='nsew')
 
-        # Scrollbar for the Treeview
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient='vertical', command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        scrollbar.grid(row=0, column=1, sticky='ns')
-
-        # Bind the treeview selection
+        # The Treeview only holds the visible rows; the scrollbar tracks the
+        # position in the whole result set and pages rows in from the database
+        self.tree_scrollbar = ttk.Scrollbar(self.tree_frame, orient='vertical', command=self.on_tree_scroll)
+        self.tree_scrollbar.grid(row=0, column=1, sticky='ns')
+
+        # Virtual list state
+        self.tree_items = {}  # application id -> Treeview item id
+        self.row_buffer = []  # rows fetched around the viewport
+        self.buffer_start = 0  # position of row_buffer[0] in the result set
+        self.view_start = 0  # position of the first visible row
+        self.visible_rows = 10
+        self.row_count = 0
+        self.shown_rows = {}  # application id -> values shown in the Treeview
+        self.buffer_version = 0  # bumped whenever row_buffer changes shape
+        self.row_fetch_pending = False
+        self.pending_focus = None  # position keyboard navigation is moving to
+        self.all_selected = False  # Select All: every row of the search, on screen or not
+        self.row_cache = RowCache(ROW_CACHE_SIZE)  # records for the details form
+        self.prefetch_pending = set()  # application ids being read into the cache
+        self.current_search = ALL_APPLICATIONS
+        self.sort_keys = ('applications.id',)
+        self.change_version = 0  # the latest change the list reflects
+        # The window's own changes applied to the list ahead of
+        # change_version, as version ranges [(after, last)]
+        self.own_changes = []
+        self.data_version = None  # PRAGMA data_version at the last change poll
+
+        # Search state; every search gets a new generation and only the newest
+        # one is applied
+        self.search_generation = 0
+        self.applied_generation = 0
+        self.requested_search = ALL_APPLICATIONS
+        self.sort_by_date = False
+        self.search_after_id = None
+
+        # Bind the treeview selection, scrolling and keyboard navigation
         self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
-
-        # Frame for matplotlib canvas
-        self.canvas_frame = ttk.Frame(self.root)
+        self.tree.bind('<Configure>', self.on_tree_resize)
+        self.tree.bind('<MouseWheel>', self.on_tree_mousewheel)
+        self.tree.bind('<Button-4>', self.on_tree_mousewheel)
+        self.tree.bind('<Button-5>', self.on_tree_mousewheel)
+        self.tree.bind('<Up>', lambda event: self.on_tree_key(-1))
+        self.tree.bind('<Down>', lambda event: self.on_tree_key(1))
+        self.tree.bind('<Prior>', lambda event: self.on_tree_key(-self.visible_rows))
+        self.tree.bind('<Next>', lambda event: self.on_tree_key(self.visible_rows))
+        self.tree.bind('<Home>', lambda event: self.on_tree_key(-self.row_count))
+        self.tree.bind('<End>', lambda event: self.on_tree_key(self.row_count))
+        self.tree.bind('<Control-a>', self.select_all_rows)
+        self.root.bind('<F9>', self.toggle_profile)
+        self.root.bind('<F10>', self.dump_metrics)
+
+        # Frame for the matplotlib canvases, sized like the figures so the
+        # layout does not change when the charts are created
+        self.canvas_frame = ttk.Frame(self.root, width=1000, height=400)
         self.canvas_frame.grid(row=4, column=0, columnspan=4, sticky='nsew', padx=5, pady=5)
         self.canvas_frame.rowconfigure(0, weight=1)
-        self.canvas_frame.columnconfigure(0, weight=1)
+        self.canvas_frame.columnconfigure(0, weight=3)
+        self.canvas_frame.columnconfigure(1, weight=2)
+        self.chart = None
+        self.funnel_chart = None
+        self.chart_data = None  # (status counts, funnel) to draw once the charts exist
+        self.chart_after_id = None
+        self.render_started = {}  # canvas -> when its pending redraw was requested
 
 
     def ensure_exclusive_checks(self):
@@ -221,31 +380,32 @@ class ApplicationTracker:
             received_interview = self.received_interview_var.get()
 
         if company and position and date_applied:
-            try:
-                self.cursor.execute('''
-                    INSERT INTO applications (
-                        company, position, status, date_applied,
-                        rejection_stage, received_coding_challenge, received_interview
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    company, position, status, date_applied,
-                    rejection_stage, received_coding_challenge, received_interview
-                ))
-                self.conn.commit()
-                self.populate_treeview()
-                self.clear_entries()
-                self.update_visualization()
-            except Exception as e:
-                messagebox.showerror("Database Error", f"An error occurred: {e}")
+            date = parse_date(date_applied)
+            if date is None:
+                messagebox.showwarning("Input Error", "Please enter the date applied as DD.MM.YYYY.")
+                return
+            values = (
+                company, position, status, date.strftime('%d.%m.%Y'), date.isoformat(),
+                rejection_stage, received_coding_challenge, received_interview
+            )
+            self.change_application(
+                'add', lambda cursor: insert_application(cursor, values),
+                self.insert_tree_row, self.on_application_added
+            )
         else:
             messagebox.showwarning("Input Error", "Please fill in all required fields.")
 
+    def on_application_added(self, app_id):
+        self.clear_entries()
+        self.update_visualization_with_treeview_data()
+
     def update_status(self):
-        selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            app_id = item['values'][0]
+        selected_items = self.tree.selection()
+        if self.all_selected or len(selected_items) > 1:
+            self.update_selected_statuses(selected_items)
+        elif selected_items:
+            item = self.tree.item(selected_items[0])
+            app_id = int(item['values'][0])
             new_status = self.status_var.get()
 
             # Initialize new fields
@@ -258,211 +418,929 @@ class ApplicationTracker:
                 received_coding_challenge = self.received_coding_challenge_var.get()
                 received_interview = self.received_interview_var.get()
 
-            try:
-                self.cursor.execute('''
-                    UPDATE applications
-                    SET status=?, rejection_stage=?, received_coding_challenge=?, received_interview=?
-                    WHERE id=?
-                ''', (
-                    new_status, rejection_stage, received_coding_challenge, received_interview, app_id
-                ))
-                self.conn.commit()
-                self.populate_treeview()
-                self.update_visualization()
-            except Exception as e:
-                messagebox.showerror("Database Error", f"An error occurred: {e}")
+            def change(cursor):
+                if not update_application_status(
+                    cursor, app_id, new_status, rejection_stage, received_coding_challenge, received_interview
+                ):
+                    raise LookupError(f"application {app_id} is archived or was deleted")
+                return app_id
+
+            self.change_application('update', change, self.update_tree_row, self.on_application_updated)
         else:
             messagebox.showwarning("Selection Error", "Please select an application to update.")
 
+    def on_application_updated(self, app_id):
+        self.update_visualization_with_treeview_data()
+
+    def update_selected_statuses(self, selected_items):
+        # Bulk update of the selected rows, or of every application in the
+        # list after Select All, as a single UPDATE statement
+        new_status = self.status_var.get()
+        status = (new_status, None, 0, 0)
+        if new_status == 'Rejected':
+            status = (
+                new_status, self.rejection_stage_var.get().strip(),
+                self.received_coding_challenge_var.get(), self.received_interview_var.get()
+            )
+        count = self.row_count if self.all_selected else len(selected_items)
+        if not messagebox.askyesno("Update Status", f"Set the status of {count} applications to {new_status}?"):
+            return
+        if self.all_selected:
+            search = self.current_search
+            change = lambda cursor: update_search_status(cursor, search, *status)
+        else:
+            app_ids = [int(self.tree.item(item)['values'][0]) for item in selected_items]
+            change = lambda cursor: update_applications_status(cursor, app_ids, *status)
+        self.write(change, self.on_applications_updated, operation='bulk_update')
+
+    def on_applications_updated(self, updated):
+        self.row_cache.clear()
+        # Rows may have left the search or moved in its order
+        self.reload_tree_window()
+        self.update_visualization_with_treeview_data()
+
     def delete_entry(self):
         selected_item = self.tree.selection()
-        if selected_item:
+        if self.all_selected or len(selected_item) > 1:
+            messagebox.showwarning("Selection Error", "Please select a single application to delete.")
+        elif selected_item:
             confirm = messagebox.askyesno("Delete Entry", "Are you sure you want to delete this entry?")
             if confirm:
                 item = self.tree.item(selected_item)
-                app_id = item['values'][0]
-                try:
-                    self.cursor.execute('DELETE FROM applications WHERE id=?', (app_id,))
-                    self.conn.commit()
-                    self.populate_treeview()
-                    self.update_visualization()
-                    self.clear_entries()
-                except Exception as e:
-                    messagebox.showerror("Database Error", f"An error occurred: {e}")
+                app_id = int(item['values'][0])
+
+                def change(cursor):
+                    if not delete_application(cursor, app_id):
+                        raise LookupError(f"application {app_id} is archived or was deleted")
+                    return app_id
+
+                self.change_application('delete', change, self.remove_tree_row, self.on_application_deleted)
         else:
             messagebox.showwarning("Selection Error", "Please select an application to delete.")
 
-    def populate_treeview(self, search_query=None, search_column=None):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        try:
-            if search_query and search_column:
-                query = f"SELECT id, company, position, status, date_applied FROM applications WHERE {search_column} LIKE ?"
-                self.cursor.execute(query, (f"%{search_query}%",))
+    def on_application_deleted(self, app_id):
+        self.update_visualization_with_treeview_data()
+        self.clear_entries()
+
+    def change_application(self, operation, change, apply_row, on_done):
+        # change(cursor) writes one application and returns its id. The row is
+        # read back in the same job, along with the version of the change, so
+        # the Treeview shows it without waiting for the change feed
+        search, sort_keys, generation = self.current_search, self.sort_keys, self.applied_generation
+
+        def job(cursor):
+            app_id = change(cursor)
+            return app_id, fetch_tree_row(cursor, search, sort_keys, app_id), latest_change(cursor)
+
+        def apply(result):
+            app_id, row, version = result
+            # The cached record, if any, is out of date
+            self.row_cache.invalidate(app_id)
+            if version <= self.change_version:
+                # The list was read after the change already
+                pass
+            elif generation == self.applied_generation:
+                apply_row(app_id, row)
             else:
-                self.cursor.execute('SELECT id, company, position, status, date_applied FROM applications')
-            for row in self.cursor.fetchall():
-                self.tree.insert('', 'end', values=row)
-            # Update visualization based on current treeview data
-            self.update_visualization_with_treeview_data()
-        except Exception as e:
-            messagebox.showerror("Database Error", f"An error occurred: {e}")
+                # Read for a search that has been replaced since
+                self.reload_tree_window()
+            on_done(app_id)
 
-    def update_visualization_with_treeview_data(self):
-        # Collect data from the treeview instead of querying the database
-        tree_items = self.tree.get_children()
-        data = []
-        for item in tree_items:
-            values = self.tree.item(item, 'values')
-            app_id = values[0]
+        self.write(job, apply, operation=operation)
+
+    def archive_closed(self):
+        days = simpledialog.askinteger(
+            "Archive",
+            "Archive the closed applications applied for more than this many days ago:",
+            initialvalue=ARCHIVE_AFTER_DAYS, minvalue=0, parent=self.root
+        )
+        if days is not None:
+            self.write(lambda cursor: archive_applications(cursor, days), self.on_archived, operation='archive')
+
+    def on_archived(self, archived):
+        self.row_cache.clear()
+        self.start_search(force=True)
+        messagebox.showinfo("Archive", f"Archived {archived} applications.")
+
+    def write(self, job, on_done=None, on_error=None, operation=None):
+        # Every write of the window goes through here: once it is committed,
+        # the versions of the changes it logged are noted as its own, so the
+        # change feed does not apply them twice. The writer holds the write
+        # lock from before the job on, so they are all its own
+        def noted(cursor):
+            since = latest_change(cursor)
+            result = job(cursor)
+            return (since, latest_change(cursor)), result
+
+        def done(result):
+            versions, result = result
+            self.note_own_changes(*versions)
+            if on_done is not None:
+                on_done(result)
+
+        self.db.write(noted, done, on_error, operation=operation)
+
+    def note_own_changes(self, after, last):
+        # Versions up to change_version are in the list already
+        after = max(after, self.change_version)
+        if last <= after:
+            return
+        if self.own_changes and self.own_changes[-1][1] == after:
+            # Right after the previous write
+            self.own_changes[-1] = (self.own_changes[-1][0], last)
+        else:
+            self.own_changes.append((after, last))
+
+    def is_own_change(self, version):
+        return any(after < version <= last for after, last in self.own_changes)
+
+    def set_change_version(self, latest, forget_own=False):
+        # The list reflects every change up to version latest. With
+        # forget_own the own changes applied ahead of it are no longer shown,
+        # as the list was read afresh: they come in through the change feed
+        self.change_version = latest
+        if forget_own:
+            self.own_changes = []
+        else:
+            self.own_changes = [(max(after, latest), last) for after, last in self.own_changes if last > latest]
+
+    def import_file(self):
+        path = filedialog.askopenfilename(
+            title="Import Applications",
+            filetypes=[("Application files", "*.csv *.json *.jsonl *.ndjson"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        self.import_button.config(state='disabled')
+        self.progress_var.set("Importing...")
+        # The file is read batch by batch on the writer's thread; the Treeview
+        # and the chart are refreshed once it is done
+        self.import_batch(read_import_batches(path), {'imported': 0, 'errors': [], 'stopped': False})
+
+    def import_batch(self, batches, state):
+        # Every batch is a write job of its own, which queues the next one
+        # once it has run: edits made meanwhile are written in between
+        # instead of waiting for the whole file, and each batch's changes
+        # are noted as the window's own
+        def job(cursor):
+            if state['stopped']:
+                batches.close()
+                return None
+            rows, invalid = next(batches)
+            if rows:
+                insert_batch(cursor, rows)
+            finished = len(rows) < IMPORT_BATCH_SIZE
+            if not finished:
+                self.import_batch(batches, state)
+            return len(rows), invalid, finished
+
+        def done(result):
+            if state['stopped']:
+                return
+            imported, invalid, finished = result
+            state['imported'] += imported
+            state['errors'] += invalid
+            if finished:
+                self.on_import_done((state['imported'], state['errors']))
+            else:
+                self.show_import_progress((state['imported'], len(state['errors'])))
+
+        def failed(error):
+            # Batches queued already find the import stopped
+            if not state['stopped']:
+                state['stopped'] = True
+                self.on_import_error(error)
+
+        self.write(job, done, failed, operation='import')
+
+    def show_import_progress(self, counts):
+        imported, skipped = counts
+        self.progress_var.set(f"Imported {imported} applications, skipped {skipped}...")
+
+    def on_import_done(self, result):
+        imported, errors = result
+        self.import_button.config(state='normal')
+        self.progress_var.set('')
+        self.start_search(force=True)
+        message = f"Imported {imported} applications."
+        if errors:
+            message += f"\n\nSkipped {len(errors)} invalid records:\n"
+            message += '\n'.join(f"Record {number}: {error}" for number, error in errors[:10])
+            if len(errors) > 10:
+                message += f"\n... and {len(errors) - 10} more"
+        messagebox.showinfo("Import", message)
+
+    def on_import_error(self, error):
+        # Batches committed before the error stay imported
+        self.import_button.config(state='normal')
+        self.progress_var.set('')
+        self.start_search(force=True)
+        self.report_error(error)
+
+    def export_file(self):
+        # While an export runs, the button cancels it
+        if self.export_thread is not None and self.export_thread.is_alive():
+            self.export_cancelled.set()
+            self.progress_var.set("Cancelling the export...")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Export Applications",
+            defaultextension='.csv',
+            filetypes=[("CSV", "*.csv"), ("Newline-delimited JSON", "*.ndjson")]
+        )
+        if not path:
+            return
+        self.export_cancelled.clear()
+        self.export_button.config(text="Cancel Export")
+        self.progress_var.set("Exporting...")
+        search, sort_keys, started = self.current_search, self.sort_keys, time.perf_counter()
+
+        def progress(exported, total):
+            self.db.notify(self.show_export_progress, (exported, total, time.perf_counter() - started))
+
+        def run():
+            # Exports what the Treeview lists, in the same order. Like a
+            # backup it has a connection of its own: the worker's reader
+            # goes on paging, searching and polling meanwhile
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                # The total and the rows are read from one snapshot
+                conn.execute('BEGIN')
+                exported = export_applications(
+                    conn.cursor(), path, search, sort_keys, progress, cancelled=self.export_cancelled.is_set
+                )
+            except ExportCancelled:
+                self.db.notify(self.on_export_cancelled, None)
+                return
+            except Exception as e:
+                self.db.notify(self.on_export_error, e)
+                return
+            finally:
+                conn.close()
+            self.db.notify(self.on_export_done, (path, exported, time.perf_counter() - started))
+
+        self.export_thread = threading.Thread(target=run, daemon=True)
+        self.export_thread.start()
+
+    def show_export_progress(self, progress):
+        exported, total, elapsed = progress
+        rate = exported / elapsed if elapsed else 0
+        self.progress_var.set(f"Exported {exported} of {total} applications ({rate:,.0f} rows/s)...")
+
+    def on_export_done(self, result):
+        path, exported, elapsed = result
+        self.export_button.config(text="Export...")
+        self.progress_var.set('')
+        self.metrics.observe('export', 'export', elapsed)
+        messagebox.showinfo("Export", f"Exported {exported} applications to {path} in {elapsed:.1f} s.")
+
+    def on_export_cancelled(self, _):
+        # The file is left as it was
+        self.export_button.config(text="Export...")
+        self.progress_var.set("Export cancelled.")
+
+    def on_export_error(self, error):
+        self.export_button.config(text="Export...")
+        self.progress_var.set('')
+        self.metrics.count('errors', 'export')
+        self.report_error(error)
+
+    def schedule_backup(self, delay_ms=None):
+        # The first backup is due an interval after the newest one on disk
+        if not self.backup_interval:
+            return
+        if delay_ms is None:
+            age = last_backup_age(self.backup_dir, DB_PATH)
+            due = 0 if age is None else self.backup_interval * 60 - age
+            delay_ms = max(BACKUP_STARTUP_DELAY_MS, int(due * 1000))
+        if self.backup_after_id is not None:
+            self.root.after_cancel(self.backup_after_id)
+        self.backup_after_id = self.root.after(delay_ms, self.start_backup)
+
+    def start_backup(self):
+        # Copies the database page by page on a thread of its own; it does
+        # not go through the worker, so reads and writes carry on meanwhile
+        if self.backup_thread is not None and self.backup_thread.is_alive():
+            return
+        self.backup_button.config(state='disabled')
+
+        def run():
             try:
-                self.cursor.execute('SELECT status, received_interview, received_coding_challenge FROM applications WHERE id=?', (app_id,))
-                row = self.cursor.fetchone()
-                data.append(row)
+                stats = create_backup(
+                    DB_PATH, self.backup_dir, self.backup_keep, cancelled=self.backup_closing.is_set
+                )
+            except BackupCancelled:
+                return
             except Exception as e:
-                messagebox.showerror("Database Error", f"An error occurred: {e}")
+                self.db.notify(self.on_backup_error, e)
                 return
+            self.db.notify(self.on_backup_done, stats)
+
+        self.backup_thread = threading.Thread(target=run, daemon=True)
+        self.backup_thread.start()
+
+    def on_backup_done(self, stats):
+        self.backup_button.config(state='normal')
+        self.metrics.observe('backup', 'backup', stats['seconds'])
+        self.metrics.count('backup_bytes', 'backup', stats['bytes'])
+        megabytes = stats['bytes'] / 1e6
+        rate = megabytes / stats['seconds'] if stats['seconds'] else 0
+        self.progress_var.set(
+            f"Backed up {megabytes:.1f} MB to {stats['path']} in {stats['seconds']:.1f} s ({rate:.0f} MB/s)."
+        )
+        self.schedule_backup(self.backup_interval * 60 * 1000)
+
+    def on_backup_error(self, error):
+        self.backup_button.config(state='normal')
+        self.metrics.count('errors', 'backup')
+        messagebox.showerror("Backup Error", f"The backup failed: {error}")
+        self.schedule_backup(self.backup_interval * 60 * 1000)
+
+    def report_error(self, error):
+        # Every database error raised on the worker threads ends up here
+        messagebox.showerror("Database Error", f"An error occurred: {error}")
+
+    def populate_treeview(self, search=ALL_APPLICATIONS):
+        self.requested_search = search
+        self.search_generation += 1
+        generation = self.search_generation
+        limit = self.visible_rows + TREE_OVERSCAN
+        # Abandoned as soon as a newer search is requested
+        self.db.read(
+            lambda cursor: (latest_change(cursor), load_search_results(cursor, search, limit)),
+            lambda results: self.apply_search_results(generation, *results),
+            cancelled=lambda: generation != self.search_generation,
+            operation='search'
+        )
 
-        # Proceed with the visualization using the collected data
-        # Initialize counts
-        status_counts = {
-            'No Answer': 0,
-            'Interviewing': 0,
-            'Offered': 0,
-            'Accepted': 0,
-            'Offer Rejected': 0,
-            'Rejected without Interview': 0,
-            'Rejected after Coding Challenge': 0,
-            'Rejected after Interview': 0
-        }
-
-        # Process data
-        for row in data:
-            status = row[0]
-            received_interview = row[1]
-            received_coding_challenge = row[2]
-
-            if status == 'Rejected':
-                if received_interview:
-                    status_counts['Rejected after Interview'] += 1
-                elif received_coding_challenge:
-                    status_counts['Rejected after Coding Challenge'] += 1
-                else:
-                    status_counts['Rejected without Interview'] += 1
+    def apply_search_results(self, generation, change_version, results):
+        # Only the newest search is applied to the tree
+        if generation != self.search_generation:
+            return
+        self.applied_generation = generation
+        self.set_change_version(change_version, forget_own=True)
+        self.all_selected = False
+        self.current_search, self.sort_keys, self.row_count, self.row_buffer, chart_data = results
+        self.buffer_start = 0
+        self.buffer_version += 1
+        self.scroll_tree_to(0)
+        # Update visualization based on current search results
+        self.draw_charts(chart_data)
+
+    def plan_row_fetch(self, start, end):
+        # The fetch that makes the buffer cover rows [start, end) as
+        # (limit, position), or None if the buffer already covers them
+        end = min(end, self.row_count)
+        buffer_end = self.buffer_start + len(self.row_buffer)
+        if end <= start or (self.row_buffer and self.buffer_start <= start and end <= buffer_end):
+            return None
+        if (not self.row_buffer or start > buffer_end or end < self.buffer_start
+                or (start < self.buffer_start and end > buffer_end)):
+            # Jumping to an unrelated position: seek once, then continue with keysets
+            offset = max(0, start - TREE_OVERSCAN)
+            return end - offset + TREE_OVERSCAN, {'offset': offset}
+        if end > buffer_end:
+            # Scrolling down: page in the rows following the buffer
+            return end - buffer_end + TREE_OVERSCAN, {'after': sort_key(self.row_buffer[-1])}
+        # Scrolling up: page in the rows preceding the buffer
+        return self.buffer_start - start + TREE_OVERSCAN, {'before': sort_key(self.row_buffer[0])}
+
+    def request_rows(self, limit, position):
+        search, sort_keys, version = self.current_search, self.sort_keys, self.buffer_version
+        generation, since, seen, own = self.applied_generation, self.change_version, self.data_version, list(self.own_changes)
+        # While a row is selected, the arrow keys are likely to move the
+        # selection into the rows paged in; their details come along with
+        # them, so the cache has them before they are selected
+        details = self.pending_focus is not None or self.selected_application() is not None
+        cache_version = self.row_cache.version
+
+        def job(cursor):
+            # Other instances' changes are read first and applied before the
+            # rows are merged, as the rows may show them already
+            feed = read_change_feed(cursor, search, sort_keys, since, seen, own)
+            rows = fetch_tree_rows(cursor, search, sort_keys, limit, **position)
+            records = fetch_applications(cursor, [row[0] for row in rows]) if details and rows else []
+            return latest_change(cursor), feed, rows, records
+
+        self.row_fetch_pending = True
+        self.db.read(
+            job,
+            lambda result: self.merge_rows(generation, version, limit, position, *result, cache_version),
+            self.on_row_fetch_error,
+            operation='scroll'
+        )
+
+    def merge_rows(self, generation, version, limit, position, latest, feed, rows, records, cache_version):
+        self.row_fetch_pending = False
+        self.apply_change_feed(generation, *feed)
+        self.row_cache.put_rows(records, cache_version)
+        # Rows planned against a buffer that has changed since are dropped
+        # and the fetch is planned again below, and so are rows read before
+        # an own change the list shows already
+        if version == self.buffer_version and not (self.own_changes and self.own_changes[-1][1] > latest):
+            self.buffer_version += 1
+            if 'offset' in position:
+                if not rows and position['offset']:
+                    # Rows were removed behind our back; start over
+                    self.reload_tree_window()
+                    return
+                self.buffer_start = position['offset']
+                self.row_buffer = rows
+                if len(rows) < limit:
+                    self.row_count = self.buffer_start + len(rows)
+            elif 'after' in position:
+                self.row_buffer += rows
+                if len(rows) < limit:
+                    # Reached the end of the result set
+                    self.row_count = self.buffer_start + len(self.row_buffer)
             else:
-                status_counts[status] += 1
-
-        # Prepare data for plotting
-        labels = []
-        counts = []
-        for status, count in status_counts.items():
-            if count > 0:
-                labels.append(status)
-                counts.append(count)
-
-        # Colors for statuses
-        color_map = {
-            'No Answer': 'lightgrey',
-            'Interviewing': 'gold',
-            'Offered': 'lightgreen',
-            'Accepted': 'blue',
-            'Offer Rejected': 'lightblue',
-            'Rejected without Interview': 'salmon',
-            'Rejected after Coding Challenge': 'orangered',
-            'Rejected after Interview': 'red'
-        }
-        colors = [color_map[status] for status in labels]
-
-        # Clear the previous plot
-        self.ax.clear()
-
-        if counts:
-            # Plot the data
-            wedges, texts, autotexts = self.ax.pie(
-                counts,
-                autopct='%1.1f%%',
-                startangle=140,
-                colors=colors
+                missing = self.buffer_start - len(rows) if len(rows) < limit else 0
+                self.row_buffer = rows + self.row_buffer
+                self.buffer_start -= len(rows)
+                if missing:
+                    # Reached the start of the result set earlier than expected
+                    self.buffer_start = 0
+                    self.view_start -= missing
+                    self.row_count -= missing
+        self.scroll_tree_to(self.view_start)
+
+    def on_row_fetch_error(self, error):
+        self.row_fetch_pending = False
+        self.report_error(error)
+
+    def scroll_tree_to(self, start):
+        self.view_start = max(0, min(start, self.row_count - self.visible_rows))
+        self.update_tree_scrollbar()
+        if self.row_fetch_pending:
+            # Picked up again once the rows in flight arrive
+            return
+        fetch = self.plan_row_fetch(self.view_start, self.view_start + self.visible_rows)
+        if fetch is not None:
+            self.request_rows(*fetch)
+            return
+        # Keep the buffer bounded to the viewport plus overscan on each side
+        trim_front = max(0, self.view_start - TREE_OVERSCAN - self.buffer_start)
+        if trim_front:
+            del self.row_buffer[:trim_front]
+            self.buffer_start += trim_front
+        del self.row_buffer[self.view_start + self.visible_rows + TREE_OVERSCAN - self.buffer_start:]
+        self.render_tree_window()
+
+    def update_tree_scrollbar(self):
+        if self.row_count:
+            self.tree_scrollbar.set(
+                self.view_start / self.row_count,
+                min(1.0, (self.view_start + self.visible_rows) / self.row_count)
             )
-            self.ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-            # Add legend
-            self.ax.legend(wedges, labels, title="Statuses", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
         else:
-            # Display a message when there is no data
-            self.ax.text(
-                0.5, 0.5,
-                'No Data Available',
-                horizontalalignment='center',
-                verticalalignment='center',
-                fontsize=16
+            self.tree_scrollbar.set(0.0, 1.0)
+
+    def render_tree_window(self):
+        offset = self.view_start - self.buffer_start
+        rows = self.row_buffer[offset:offset + self.visible_rows]
+        wanted = {row[0] for row in rows}
+        # Drop the rows that scrolled out of view and insert the ones that
+        # scrolled in, leaving the rows that are still visible untouched
+        for app_id in [app_id for app_id in self.tree_items if app_id not in wanted]:
+            self.tree.delete(self.tree_items.pop(app_id))
+            del self.shown_rows[app_id]
+        for index, row in enumerate(rows):
+            values = row[:len(TREE_COLUMNS)]
+            if row[0] not in self.tree_items:
+                self.tree_items[row[0]] = self.tree.insert('', index, values=values)
+            elif self.shown_rows[row[0]] != values:
+                self.tree.item(self.tree_items[row[0]], values=values)
+            self.shown_rows[row[0]] = values
+        # Rows that changed place in the sort order are moved into position
+        items = [self.tree_items[row[0]] for row in rows]
+        if list(self.tree.get_children()) != items:
+            for index, item in enumerate(items):
+                self.tree.move(item, '', index)
+        if self.all_selected and set(self.tree.selection()) != set(items):
+            self.tree.selection_set(items)
+        self.focus_pending_row()
+
+    def reload_tree_window(self):
+        # Recount and refetch the rows around the viewport; items that are
+        # still visible are kept and only edited if their values changed
+        search, sort_keys, generation = self.current_search, self.sort_keys, self.applied_generation
+        offset = max(0, self.view_start - TREE_OVERSCAN)
+        limit = self.visible_rows + 2 * TREE_OVERSCAN
+
+        def reload(cursor):
+            return (
+                latest_change(cursor), count_tree_rows(cursor, search),
+                fetch_tree_rows(cursor, search, sort_keys, limit, offset=offset)
             )
-            self.ax.axis('off')
 
-        # Adjust layout to make room for legend
-        self.figure.tight_layout()
+        def apply(result):
+            if generation != self.applied_generation:
+                return
+            latest, self.row_count, self.row_buffer = result
+            self.set_change_version(latest, forget_own=True)
+            self.buffer_start = offset
+            self.buffer_version += 1
+            self.scroll_tree_to(self.view_start)
+
+        self.db.read(reload, apply, operation='reload')
+
+    def find_buffered_row(self, app_id):
+        for index, cached in enumerate(self.row_buffer):
+            if cached[0] == app_id:
+                return index
+        return None
+
+    def place_buffered_row(self, row):
+        # Account for a row that joined the result set at its sorted position
+        index = bisect.bisect_left([sort_key(cached) for cached in self.row_buffer], sort_key(row))
+        at_end = self.buffer_start + len(self.row_buffer) == self.row_count
+        self.row_count += 1
+        self.buffer_version += 1
+        if index == 0 and self.buffer_start > 0:
+            # Somewhere in front of the buffer
+            self.buffer_start += 1
+            self.view_start += 1
+        elif index < len(self.row_buffer) or at_end:
+            self.row_buffer.insert(index, row)
+            if self.buffer_start + index < self.view_start:
+                self.view_start += 1
+
+    def drop_buffered_row(self, index):
+        del self.row_buffer[index]
+        self.row_count -= 1
+        self.buffer_version += 1
+        if self.buffer_start + index < self.view_start:
+            self.view_start -= 1
+
+    def insert_tree_row(self, app_id, row):
+        if self.sort_keys == RANKED_SORT:
+            # Relevance scores depend on the whole index, so refetch the window
+            self.reload_tree_window()
+        elif row is not None:
+            self.place_buffered_row(row)
+            self.scroll_tree_to(self.view_start)
+
+    def update_tree_row(self, app_id, row):
+        index = self.find_buffered_row(app_id)
+        if self.sort_keys == RANKED_SORT or index is None:
+            self.reload_tree_window()
+            return
+        if row is not None and sort_key(row) == sort_key(self.row_buffer[index]):
+            self.row_buffer[index] = row
+        else:
+            # The row left the result set or moved within the sort order
+            self.drop_buffered_row(index)
+            if row is not None:
+                self.place_buffered_row(row)
+        self.scroll_tree_to(self.view_start)
+
+    def remove_tree_row(self, app_id, row=None):
+        index = self.find_buffered_row(app_id)
+        if self.sort_keys == RANKED_SORT or index is None:
+            self.reload_tree_window()
+            return
+        self.drop_buffered_row(index)
+        # Close the gap by paging in the next row
+        self.scroll_tree_to(self.view_start)
+
+    def poll_changes(self):
+        # Applies what other instances changed since the last poll. PRAGMA
+        # data_version tells whether another connection committed anything
+        # at all, so an idle poll is a single pragma; otherwise only the
+        # changed applications are read, however long the list. The window's
+        # own changes are left out, they are in the list already
+        search, sort_keys, generation = self.current_search, self.sort_keys, self.applied_generation
+        since, seen, own = self.change_version, self.data_version, list(self.own_changes)
+        self.db.read(
+            lambda cursor: read_change_feed(cursor, search, sort_keys, since, seen, own),
+            lambda result: self.on_changes_polled(generation, result),
+            self.on_change_poll_error,
+            operation='changes'
+        )
+
+    def on_changes_polled(self, generation, result):
+        self.change_poll_after_id = self.root.after(CHANGE_POLL_MS, self.poll_changes)
+        if self.apply_change_feed(generation, *result):
+            self.scroll_tree_to(self.view_start)
+
+    def apply_change_feed(self, generation, version, feed):
+        # Applies a feed read by read_change_feed to the buffered rows and
+        # refreshes the charts; returns True if the rows on screen have to be
+        # shown again
+        self.data_version = version
+        if feed is None:
+            return False
+        latest, changes, rows = feed
+        if changes is not None:
+            # Changes from before the list was last loaded are in it already,
+            # and so are the window's own changes noted since the feed was read
+            changes = [
+                change for change in changes if change[0] > self.change_version and not self.is_own_change(change[0])
+            ]
+            if not changes:
+                self.set_change_version(max(self.change_version, latest))
+                return False
+            for _, app_id, _ in changes:
+                self.row_cache.invalidate(app_id)
+            self.set_change_version(max(self.change_version, latest))
+        else:
+            # Too many to apply one by one, e.g. another instance's import,
+            # or a restored backup, whose log may end before change_version;
+            # the list is reloaded below
+            self.row_cache.clear()
+            # After a restore the versions noted as own are used again
+            self.set_change_version(latest, forget_own=latest < self.change_version)
+        self.update_visualization_with_treeview_data()
+        if (changes is None or generation != self.applied_generation or self.sort_keys == RANKED_SORT
+                or not all(self.apply_change(app_id, added, rows.get(app_id)) for _, app_id, added in changes)):
+            # Or read for a search that has been replaced since, or the
+            # change of a row outside the buffer cannot be placed. Row
+            # fetches in flight are planned against the buffer as it was
+            self.buffer_version += 1
+            self.reload_tree_window()
+            return False
+        return True
+
+    def apply_change(self, app_id, added, row):
+        # Applies another instance's change of an application to the
+        # buffered rows, given the application's row for the search (None if
+        # it was deleted or does not match). Returns False if the change
+        # cannot be placed and the list has to be reloaded
+        index = self.find_buffered_row(app_id)
+        if index is not None:
+            if row is not None and sort_key(row) == sort_key(self.row_buffer[index]):
+                self.row_buffer[index] = row
+            else:
+                self.drop_buffered_row(index)
+                if row is not None:
+                    self.place_buffered_row(row)
+            return True
+        if added:
+            # New since the list was loaded
+            if row is not None:
+                self.place_buffered_row(row)
+            return True
+        if row is not None:
+            # Listed before as well, in the same place: only statuses are ever
+            # changed, and they only decide whether a text search matches
+            return self.current_search[0] is None
+        if self.current_search[:3] != ALL_APPLICATIONS[:3] or self.sort_keys != ('applications.id',):
+            # Deleted, or no longer matching; whether and where it was listed
+            # is not known any more
+            return False
+        # Deleted from the unfiltered list, in front of the buffer or behind it
+        self.row_count -= 1
+        self.buffer_version += 1
+        if self.row_buffer and app_id < self.row_buffer[0][0]:
+            self.buffer_start -= 1
+            self.view_start -= 1
+        return True
+
+    def on_change_poll_error(self, error):
+        self.change_poll_after_id = self.root.after(CHANGE_POLL_MS, self.poll_changes)
+        self.report_error(error)
+
+    def on_tree_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            start = int(float(amount) * self.row_count)
+        elif unit == 'pages':
+            start = self.view_start + int(amount) * self.visible_rows
+        else:
+            start = self.view_start + int(amount)
+        self.scroll_tree_to(start)
+
+    def on_tree_mousewheel(self, event):
+        step = -3 if event.num == 4 or event.delta > 0 else 3
+        self.on_tree_scroll('scroll', step, 'units')
+        return 'break'
+
+    def on_tree_key(self, step):
+        if not self.row_count:
+            return 'break'
+        # Move the selection by position in the result set, scrolling the
+        # window along when the target row is outside the viewport
+        if self.pending_focus is not None:
+            position = self.pending_focus
+        else:
+            children = self.tree.get_children()
+            focus = self.tree.focus()
+            position = self.view_start + (children.index(focus) if focus in children else 0)
+        self.pending_focus = max(0, min(position + step, self.row_count - 1))
+        if self.pending_focus < self.view_start:
+            self.scroll_tree_to(self.pending_focus)
+        elif self.pending_focus >= self.view_start + self.visible_rows:
+            self.scroll_tree_to(self.pending_focus - self.visible_rows + 1)
+        self.focus_pending_row()
+        return 'break'
+
+    def focus_pending_row(self):
+        # Select the row keyboard navigation moved to once it is on screen
+        position = self.pending_focus
+        if position is None or not self.view_start <= position < self.view_start + self.visible_rows:
+            return
+        index = position - self.buffer_start
+        if not 0 <= index < len(self.row_buffer) or self.row_buffer[index][0] not in self.tree_items:
+            return
+        self.pending_focus = None
+        item = self.tree_items[self.row_buffer[index][0]]
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+
+    def on_tree_resize(self, event):
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else ''
+        # Heading height and row height, measured from the first row when possible
+        heading_height, row_height = (bbox[1], bbox[3]) if bbox else (25, 20)
+        visible_rows = max(1, (event.height - heading_height) // row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.scroll_tree_to(self.view_start)
 
-        # Draw the canvas
-        self.canvas.draw()
+    def update_visualization_with_treeview_data(self):
+        # The Treeview only holds the visible rows, so the chart data comes
+        # from aggregate queries over the current search
+        search = self.current_search
+        self.db.read(lambda cursor: search_charts(cursor, search), self.draw_charts, operation='chart')
+
+    def draw_charts(self, chart_data):
+        # Chart updates are coalesced: however many arrive within a frame,
+        # the latest data is drawn once
+        self.chart_data = chart_data
+        if self.chart is not None and self.chart_after_id is None:
+            self.chart_after_id = self.root.after(CHART_REDRAW_MS, self.redraw_charts)
+
+    def redraw_charts(self):
+        self.chart_after_id = None
+        status_counts, funnel = self.chart_data
+        # A chart is only drawn again when its data changed, once Tk is idle.
+        # Its render phase lasts from the update until it is drawn
+        started = time.perf_counter()
+        for chart, canvas, data in ((self.chart, self.canvas, status_counts), (self.funnel_chart, self.funnel_canvas, funnel)):
+            if chart.update(data):
+                self.render_started.setdefault(canvas, started)
+                canvas.draw_idle()
+
+    def on_chart_drawn(self, event):
+        # Drawing for other reasons, e.g. a resize, is not timed
+        started = self.render_started.pop(event.canvas, None)
+        if started is not None:
+            self.metrics.observe('chart', 'render', time.perf_counter() - started)
 
     def search_entries(self):
         search_query = self.search_entry.get().strip()
-        search_criteria = self.search_criteria_var.get().lower()
-
-        column_map = {
-            'company': 'company',
-            'position': 'position',
-            'status': 'status'
-        }
-
-        if search_query:
-            search_column = column_map.get(search_criteria)
-            self.populate_treeview(search_query=search_query, search_column=search_column)
+        date_range = [entry.get().strip() for entry in (self.date_from_entry, self.date_to_entry)]
+        if not search_query and not any(date_range):
+            messagebox.showwarning("Search Error", "Please enter a search term or a date range.")
+        elif any(date and parse_date(date) is None for date in date_range):
+            messagebox.showwarning("Search Error", "Please enter dates as DD.MM.YYYY.")
         else:
-            messagebox.showwarning("Search Error", "Please enter a search term.")
+            self.start_search(force=True)
 
     def clear_search(self):
         self.search_entry.delete(0, tk.END)
+        self.date_from_entry.delete(0, tk.END)
+        self.date_to_entry.delete(0, tk.END)
         self.search_criteria_combobox.current(0)
-        self.populate_treeview()
+        self.start_search(force=True)
+
+    def toggle_date_sort(self):
+        # Clicking the Date Applied heading switches between date order and
+        # the default order of the search
+        self.sort_by_date = not self.sort_by_date
+        self.tree.heading('Date Applied', text='Date Applied \u25b2' if self.sort_by_date else 'Date Applied')
+        self.start_search(force=True)
+
+    def schedule_search(self, event=None):
+        # Debounce keystrokes so a search only starts once typing pauses
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+        self.search_after_id = self.root.after(SEARCH_DEBOUNCE_MS, self.start_search)
+
+    def start_search(self, force=False):
+        if self.search_after_id is not None:
+            self.root.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        search = self.read_search_bar()
+        if search == self.requested_search and not force:
+            # Nothing to do for keys that do not change the search, e.g. arrows
+            return
+        self.populate_treeview(search)
+
+    def read_search_bar(self):
+        # Dates that do not parse (yet, while typing) do not limit the search
+        search_column = SEARCH_COLUMNS.get(self.search_criteria_var.get().lower())
+        match = fts_query(self.search_entry.get(), search_column)
+        date_from, date_to = (parse_date(entry.get()) for entry in (self.date_from_entry, self.date_to_entry))
+        return (
+            match,
+            date_from.isoformat() if date_from else None,
+            date_to.isoformat() if date_to else None,
+            self.sort_by_date,
+            bool(self.include_archive_var.get())
+        )
+
+    def select_all_rows(self, event=None):
+        # Selects every application in the list, not just the rows on screen;
+        # rows scrolled into view are selected as they are shown
+        self.all_selected = True
+        self.tree.selection_set(list(self.tree_items.values()))
+        return 'break'
 
     def on_tree_select(self, event):
         selected_item = self.tree.selection()
-        if selected_item:
-            item = self.tree.item(selected_item)
-            app_id = item['values'][0]
-            try:
-                self.cursor.execute('SELECT * FROM applications WHERE id=?', (app_id,))
-                row = self.cursor.fetchone()
-                # Unpack the row
-                _, company, position, status, date_applied, rejection_stage, received_coding_challenge, received_interview = row
-
-                # Populate the fields
-                self.company_entry.delete(0, tk.END)
-                self.company_entry.insert(0, company)
-                self.position_entry.delete(0, tk.END)
-                self.position_entry.insert(0, position)
-                self.status_var.set(status)
-                self.date_entry.delete(0, tk.END)
-                self.date_entry.insert(0, date_applied)
-
-                if status == 'Rejected':
-                    self.rejection_stage_var.set(rejection_stage if rejection_stage else '')
-                    self.received_coding_challenge_var.set(received_coding_challenge)
-                    self.received_interview_var.set(received_interview)
-                    # Enable the rejection details widgets
-                    self.rejection_stage_entry.config(state='normal')
-                    self.received_coding_challenge_check.config(state='normal')
-                    self.received_interview_check.config(state='normal')
-                else:
-                    # Disable and clear the rejection details widgets
-                    self.rejection_stage_entry.config(state='disabled')
-                    self.received_coding_challenge_check.config(state='disabled')
-                    self.received_interview_check.config(state='disabled')
-                    self.rejection_stage_var.set('')
-                    self.received_coding_challenge_var.set(0)
-                    self.received_interview_var.set(0)
-            except Exception as e:
-                messagebox.showerror("Database Error", f"An error occurred: {e}")
+        if self.all_selected and set(selected_item) != set(self.tree_items.values()):
+            # The selection was changed by hand
+            self.all_selected = False
+        # Details are shown for a single selected application, straight from
+        # the row cache when it holds it
+        app_id = self.selected_application()
+        if app_id is not None:
+            with self.metrics.timer('select', 'widget'):
+                record = self.row_cache.get(app_id)
+                if record is not None:
+                    self.show_application(record)
+            self.metrics.count('cache_hits' if record is not None else 'cache_misses', 'select')
+            self.prefetch_rows(app_id)
+
+    def selected_application(self):
+        # The id of the single selected application, or None
+        selected_item = self.tree.selection()
+        if len(selected_item) != 1 or self.all_selected:
+            return None
+        return int(self.tree.item(selected_item)['values'][0])
+
+    def prefetch_rows(self, app_id):
+        # Reads the selected application into the cache, if it is missing,
+        # along with the buffered rows around it, so moving the selection
+        # with the arrow keys is served from the cache. Rows are read ahead
+        # once fewer than half of PREFETCH_ROWS are cached on either side
+        index = self.find_buffered_row(app_id)
+        if index is None:
+            nearby = ahead = [app_id]
+        else:
+            nearby = [row[0] for row in self.row_buffer[max(0, index - PREFETCH_ROWS // 2):index + PREFETCH_ROWS // 2 + 1]]
+            ahead = [row[0] for row in self.row_buffer[max(0, index - PREFETCH_ROWS):index + PREFETCH_ROWS + 1]]
+        if all(nearby_id in self.row_cache or nearby_id in self.prefetch_pending for nearby_id in nearby):
+            return
+        app_ids = [
+            ahead_id for ahead_id in ahead
+            if ahead_id not in self.row_cache and ahead_id not in self.prefetch_pending
+        ]
+        self.prefetch_pending.update(app_ids)
+        version = self.row_cache.version
+        self.db.read(
+            lambda cursor: fetch_applications(cursor, app_ids),
+            lambda rows: self.on_rows_prefetched(version, app_ids, rows),
+            lambda error: self.on_prefetch_error(app_ids, error),
+            operation='prefetch'
+        )
+
+    def on_rows_prefetched(self, version, app_ids, rows):
+        self.prefetch_pending.difference_update(app_ids)
+        cached = self.row_cache.put_rows(rows, version)
+        app_id = self.selected_application()
+        if app_id not in app_ids:
+            # Shown already, or the selection moved on
+            return
+        if not cached:
+            # Read before an edit; read the selection again
+            self.prefetch_rows(app_id)
+            return
+        record = self.row_cache.get(app_id)
+        if record is not None:
+            # Otherwise deleted in the meantime
+            self.show_application(record)
+
+    def on_prefetch_error(self, app_ids, error):
+        self.prefetch_pending.difference_update(app_ids)
+        self.report_error(error)
+
+    def show_application(self, record):
+        # Populate the fields
+        self.company_entry.delete(0, tk.END)
+        self.company_entry.insert(0, record.company)
+        self.position_entry.delete(0, tk.END)
+        self.position_entry.insert(0, record.position)
+        self.status_var.set(record.status)
+        self.date_entry.delete(0, tk.END)
+        self.date_entry.insert(0, record.date_applied)
+
+        if record.status == 'Rejected':
+            self.rejection_stage_var.set(record.rejection_stage if record.rejection_stage else '')
+            self.received_coding_challenge_var.set(record.received_coding_challenge)
+            self.received_interview_var.set(record.received_interview)
+            # Enable the rejection details widgets
+            self.rejection_stage_entry.config(state='normal')
+            self.received_coding_challenge_check.config(state='normal')
+            self.received_interview_check.config(state='normal')
+        else:
+            # Disable and clear the rejection details widgets
+            self.rejection_stage_entry.config(state='disabled')
+            self.received_coding_challenge_check.config(state='disabled')
+            self.received_interview_check.config(state='disabled')
+            self.rejection_stage_var.set('')
+            self.received_coding_challenge_var.set(0)
+            self.received_interview_var.set(0)
 
     def clear_entries(self):
         self.company_entry.delete(0, tk.END)
@@ -478,95 +1356,26 @@ class ApplicationTracker:
         self.received_interview_check.config(state='disabled')
 
     def create_visualization(self):
-        self.figure = plt.Figure(figsize=(6, 4), dpi=100)
-        self.ax = self.figure.add_subplot(111)
+        # Imported here instead of at module load; the Figure is created
+        # directly rather than through pyplot's global figure manager
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from chart import FunnelChart, StatusChart
+
+        self.figure = Figure(figsize=(6, 4), dpi=100)
+        self.chart = StatusChart(self.figure)
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.canvas_frame)
         self.canvas.get_tk_widget().grid(row=0, column=0, sticky='nsew')
-        self.update_visualization()
-
-    def update_visualization(self):
-        # Fetch data for visualization
-        try:
-            self.cursor.execute('SELECT status, received_interview, received_coding_challenge FROM applications')
-            data = self.cursor.fetchall()
-        except Exception as e:
-            messagebox.showerror("Database Error", f"An error occurred: {e}")
-            return
-
-        # Initialize counts
-        status_counts = {
-            'No Answer': 0,
-            'Interviewing': 0,
-            'Offered': 0,
-            'Accepted': 0,
-            'Offer Rejected': 0,
-            'Rejected without Interview': 0,
-            'Rejected after Coding Challenge': 0,
-            'Rejected after Interview': 0
-        }
-
-        # Process data
-        for row in data:
-            status = row[0]
-            received_interview = row[1]
-            received_coding_challenge = row[2]
-
-            if status == 'Rejected':
-                if received_interview:
-                    status_counts['Rejected after Interview'] += 1
-                elif received_coding_challenge:
-                    status_counts['Rejected after Coding Challenge'] += 1
-                else:
-                    status_counts['Rejected without Interview'] += 1
-            else:
-                status_counts[status] += 1
-
-        # Prepare data for plotting
-        labels = []
-        counts = []
-        for status, count in status_counts.items():
-            if count > 0:
-                labels.append(status)
-                counts.append(count)
-
-        # Colors for statuses
-        color_map = {
-            'No Answer': 'lightgrey',
-            'Interviewing': 'gold',
-            'Offered': 'lightgreen',
-            'Accepted': 'blue',
-            'Offer Rejected': 'lightblue',
-            'Rejected without Interview': 'salmon',
-            'Rejected after Coding Challenge': 'orangered',
-            'Rejected after Interview': 'red'
-        }
-        colors = [color_map[status] for status in labels]
-
-        # Clear the previous plot
-        self.ax.clear()
-
-        if counts:
-            # Plot the data
-            wedges, texts, autotexts = self.ax.pie(counts, autopct='%1.1f%%', startangle=140, colors=colors)
-            self.ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-            # Add legend
-            self.ax.legend(wedges, labels, title="Statuses", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
-        else:
-            # Display a message when there is no data
-            self.ax.text(
-                0.5, 0.5,
-                'No Data Available',
-                horizontalalignment='center',
-                verticalalignment='center',
-                fontsize=16
-            )
-            self.ax.axis('off')
-
-        # Adjust layout to make room for legend
-        self.figure.tight_layout()
-
-        # Draw the canvas
-        self.canvas.draw()
+        self.funnel_figure = Figure(figsize=(4, 4), dpi=100)
+        self.funnel_chart = FunnelChart(self.funnel_figure, FUNNEL_STAGES)
+        self.funnel_canvas = FigureCanvasTkAgg(self.funnel_figure, master=self.canvas_frame)
+        self.funnel_canvas.get_tk_widget().grid(row=0, column=1, sticky='nsew')
+        for canvas in (self.canvas, self.funnel_canvas):
+            canvas.mpl_connect('draw_event', self.on_chart_drawn)
+        # The first search brings the chart data along; until it is done the
+        # charts stay empty
+        if self.chart_data is not None:
+            self.draw_charts(self.chart_data)
 
     def configure_grid(self):
         # Configure root grid weights
@@ -577,11 +1386,187 @@ class ApplicationTracker:
         self.root.columnconfigure(2, weight=1)
         self.root.columnconfigure(3, weight=1)
 
+    def toggle_profile(self, event=None):
+        # F9 starts and stops profiling the Tk thread: widget updates and
+        # chart rendering. The SQL runs on the worker threads; its time is in
+        # the query phase of the metrics
+        path = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        try:
+            summary_path = self.metrics.toggle_profile(path)
+        except OSError as e:
+            messagebox.showerror("Profile", f"Could not write the profile: {e}")
+            return
+        if summary_path is None:
+            self.progress_var.set("Profiling... press F9 to stop.")
+        else:
+            self.progress_var.set(f"Profile written to {path}, its summary to {summary_path}.")
+
+    def dump_metrics(self, event=None):
+        try:
+            self.metrics.dump(self.metrics_path)
+        except OSError as e:
+            messagebox.showerror("Metrics", f"Could not write the metrics: {e}")
+            return
+        self.progress_var.set(f"Metrics written to {self.metrics_path}.")
+
     def close_connection(self):
-        self.conn.close()
+        self.root.after_cancel(self.change_poll_after_id)
+        if self.backup_after_id is not None:
+            self.root.after_cancel(self.backup_after_id)
+        # A running backup stops after its current step and leaves no file behind
+        self.backup_closing.set()
+        self.export_cancelled.set()
+        for thread in (self.backup_thread, self.export_thread):
+            if thread is not None:
+                thread.join()
+        self.db.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job Application Tracker")
+    parser.add_argument('--check-summary', action='store_true', help="verify the chart counts against a full recount and exit")
+    parser.add_argument('--rebuild-summary', action='store_true', help="recompute the chart counts from the applications table and exit")
+    parser.add_argument('--import', dest='import_path', metavar='FILE', help="import applications from a CSV, JSON or NDJSON file and exit")
+    parser.add_argument('--export', dest='export_path', metavar='FILE', help="export applications to a CSV or NDJSON file and exit")
+    parser.add_argument('--search', metavar='TEXT', help="with --export, only export the applications matching this search")
+    parser.add_argument(
+        '--include-archive', action='store_true', help="with --export, export the archived applications as well"
+    )
+    parser.add_argument(
+        '--archive', nargs='?', const=ARCHIVE_AFTER_DAYS, type=int, metavar='DAYS',
+        help="archive the closed applications applied for more than DAYS (default: %(const)s) days ago and exit"
+    )
+    parser.add_argument('--backup', action='store_true', help="write an online backup of the database to --backup-dir and exit")
+    parser.add_argument('--restore', metavar='FILE', help="replace the database with a backup and exit")
+    parser.add_argument(
+        '--backup-dir', default=BACKUP_DIR, metavar='DIR', help="where backups are written (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--backup-keep', type=int, default=BACKUP_KEEP, metavar='N', help="keep the newest N backups (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--backup-interval', type=float, default=BACKUP_INTERVAL_MINUTES, metavar='MINUTES',
+        help="back up the database this often while the window is open (default: %(default)s, 0 disables)"
+    )
+    parser.add_argument(
+        '--durability', choices=('full', 'normal'), default='full',
+        help="full: every commit is synced to disk; normal: faster commits that may be lost on power failure"
+    )
+    parser.add_argument(
+        '--slow-ms', type=float, default=SLOW_MS,
+        help="log operations whose SQL takes longer than this, with their query plans (default: %(default)s, 0 disables)"
+    )
+    parser.add_argument('--slow-log', metavar='FILE', help="append the slow-operation log to this file instead of stderr")
+    parser.add_argument('--metrics', metavar='FILE', help="write the operation timings to this file on exit (.prom: Prometheus text, else JSON)")
+    args = parser.parse_args()
+
+    if args.export_path:
+        conn = connect_database()
+        search = (fts_query(args.search or ''), None, None, False, args.include_archive)
+        started = time.perf_counter()
+
+        def show_progress(exported, total):
+            elapsed = time.perf_counter() - started
+            print(f"\rExported {exported} of {total} ({exported / elapsed:,.0f} rows/s)", end='', file=sys.stderr)
+
+        try:
+            exported = export_applications(conn.cursor(), args.export_path, search, progress=show_progress)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"\nExport failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            conn.close()
+        print(file=sys.stderr)
+        print(f"Exported {exported} applications in {time.perf_counter() - started:.1f} s.")
+        sys.exit(0)
+
+    if args.import_path:
+        conn = connect_database()
+        try:
+            imported, errors = import_applications(
+                conn, args.import_path,
+                progress=lambda imported, skipped: print(f"\rImported {imported}, skipped {skipped}", end='', file=sys.stderr)
+            )
+        except (OSError, ValueError, sqlite3.Error) as e:
+            print(f"\nImport failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            conn.close()
+        print(file=sys.stderr)
+        for number, error in errors:
+            print(f"Record {number}: {error}")
+        print(f"Imported {imported} applications, skipped {len(errors)}.")
+        sys.exit(1 if errors else 0)
+
+    if args.backup:
+        def show_progress(copied, total):
+            print(f"\rBacked up {copied} of {total} pages", end='', file=sys.stderr)
+
+        try:
+            stats = create_backup(DB_PATH, args.backup_dir, args.backup_keep, progress=show_progress)
+        except (OSError, sqlite3.Error) as e:
+            print(f"\nBackup failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(file=sys.stderr)
+        megabytes = stats['bytes'] / 1e6
+        rate = megabytes / stats['seconds'] if stats['seconds'] else 0
+        print(
+            f"Backed up {megabytes:.1f} MB to {stats['path']} in {stats['seconds']:.2f} s "
+            f"({rate:.0f} MB/s, {stats['steps']} steps)."
+        )
+        sys.exit(0)
+
+    if args.restore:
+        try:
+            check_backup(args.restore)
+            # The current contents are backed up first, outside the rotation
+            previous = create_backup(DB_PATH, args.backup_dir, keep=None, label='pre-restore') if os.path.exists(DB_PATH) else None
+            restored = restore_backup(args.restore, DB_PATH)
+            # A backup from an older version is migrated like any database
+            connect_database().close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Restore failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        if previous is not None:
+            print(f"The previous database was backed up to {previous['path']}.")
+        print(f"Restored {restored} applications from {args.restore}.")
+        sys.exit(0)
+
+    if args.archive is not None:
+        conn = connect_database()
+        started = time.perf_counter()
+        try:
+            archived = archive_applications(conn.cursor(), args.archive)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Archiving failed: {e}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            conn.close()
+        print(f"Archived {archived} applications in {time.perf_counter() - started:.1f} s.")
+        sys.exit(0)
+
+    if args.check_summary or args.rebuild_summary:
+        conn = connect_database()
+        cursor = conn.cursor()
+        if args.rebuild_summary:
+            rebuild_status_summary(cursor)
+            rebuild_funnel_summary(cursor)
+            conn.commit()
+        mismatches = {**check_status_summary(cursor), **check_funnel_summary(cursor)}
+        for category, (summary_count, recount) in mismatches.items():
+            print(f"{category}: summary {summary_count}, recount {recount}")
+        print("Summaries are consistent." if not mismatches else "Summaries are inconsistent.")
+        conn.close()
+        sys.exit(1 if mismatches else 0)
+
+    slow_log = open(args.slow_log, 'a') if args.slow_log else None
+    metrics = Metrics(args.slow_ms or None, slow_log)
     root = tk.Tk()
-    app = ApplicationTracker(root)
+    app = ApplicationTracker(
+        root, durable=args.durability == 'full', metrics=metrics, metrics_path=args.metrics,
+        backup_dir=args.backup_dir, backup_interval=args.backup_interval, backup_keep=args.backup_keep
+    )
     root.protocol("WM_DELETE_WINDOW", lambda: (app.close_connection(), root.destroy()))
     root.mainloop()
+    if args.metrics:
+        metrics.dump(args.metrics)
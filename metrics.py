@@ -0,0 +1,224 @@
+import bisect
+import cProfile
+import json
+import os
+import pstats
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Operations slower than this are written to the slow-operation log, with
+# up to this many of their statements
+SLOW_MS = 250
+SLOW_LOG_STATEMENTS = 20
+
+class Metrics:
+    # Counters and latency histograms per operation and phase:
+    #   wait    queued until a worker thread picked the job up
+    #   query   the job's SQL on the worker thread
+    #   commit  a group commit of the writer
+    #   widget  the Tk callback applying the result to the widgets
+    #   render  updating and drawing the charts
+    #   backup  an online backup, on a thread of its own
+    #   export  an export to a file, on a thread of its own
+    # Phases are recorded from the Tk and the worker threads, hence the lock.
+    # A query phase slower than slow_ms is logged with its statements and
+    # their query plans
+
+    def __init__(self, slow_ms=SLOW_MS, slow_log=None):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log or sys.stderr
+        self.lock = threading.Lock()
+        self.histograms = {}  # (operation, phase) -> [bucket counts..., +Inf count, sum]
+        self.counters = {}  # (name, operation) -> count
+        self.profiler = None
+
+    def observe(self, operation, phase, seconds):
+        with self.lock:
+            histogram = self.histograms.get((operation, phase))
+            if histogram is None:
+                histogram = self.histograms[(operation, phase)] = [0] * (len(BUCKETS) + 2)
+            histogram[bisect.bisect_left(BUCKETS, seconds)] += 1
+            histogram[-1] += seconds
+
+    def count(self, name, operation, amount=1):
+        with self.lock:
+            self.counters[(name, operation)] = self.counters.get((name, operation), 0) + amount
+
+    @contextmanager
+    def timer(self, operation, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(operation, phase, time.perf_counter() - started)
+
+    def timed(self, operation, phase, callback):
+        # callback(result), with its run time recorded
+        if callback is None:
+            return None
+
+        def timed_callback(result):
+            with self.timer(operation, phase):
+                callback(result)
+
+        return timed_callback
+
+    def timed_job(self, operation, job):
+        # job(cursor) as run by a worker: records its wait in the queue and
+        # its run time, and logs it with its statements if it is slow
+        submitted = time.perf_counter()
+
+        def run(cursor):
+            started = time.perf_counter()
+            self.observe(operation, 'wait', started - submitted)
+            self.count('operations', operation)
+            traced = TracedCursor(cursor) if self.slow_ms is not None else cursor
+            try:
+                return job(traced)
+            except Exception:
+                self.count('errors', operation)
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                self.observe(operation, 'query', elapsed)
+                if self.slow_ms is not None and elapsed * 1000 >= self.slow_ms:
+                    self.count('slow_operations', operation)
+                    self.log_slow(operation, elapsed, traced)
+
+        return run
+
+    def log_slow(self, operation, elapsed, traced):
+        lines = [f"[{datetime.now():%Y-%m-%d %H:%M:%S}] slow {operation}: {elapsed * 1000:.1f} ms"]
+        for statement, parameters in traced.statements:
+            lines.append('  ' + ' '.join(statement.split()))
+            if parameters:
+                lines.append(f"    parameters: {parameters!r}")
+            if statement.lstrip()[:6].upper() in ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT'):
+                lines.extend('    ' + line for line in explain(traced.connection, statement, parameters))
+        if traced.more:
+            lines.append(f"  ... and {traced.more} more statements")
+        with self.lock:
+            print('\n'.join(lines), file=self.slow_log, flush=True)
+
+    def toggle_profile(self, path):
+        # Starts profiling the calling thread, or stops and writes the
+        # profile to path and the top functions by cumulative time to a .txt
+        # file next to it; returns the path of that summary when stopped
+        if self.profiler is None:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            return None
+        profiler, self.profiler = self.profiler, None
+        profiler.disable()
+        profiler.dump_stats(path)
+        summary_path = os.path.splitext(path)[0] + '.txt'
+        with open(summary_path, 'w') as file:
+            pstats.Stats(profiler, stream=file).sort_stats('cumulative').print_stats(15)
+        return summary_path
+
+    def snapshot(self):
+        # Everything recorded so far, as JSON-compatible data
+        with self.lock:
+            histograms = {key: list(histogram) for key, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+        operations = {}
+        for (operation, phase), histogram in sorted(histograms.items()):
+            count = sum(histogram[:-1])
+            buckets = {str(bound): sum(histogram[:index + 1]) for index, bound in enumerate(BUCKETS)}
+            buckets['+Inf'] = count
+            operations.setdefault(operation, {})[phase] = {
+                'count': count,
+                'sum_ms': histogram[-1] * 1000,
+                'mean_ms': histogram[-1] * 1000 / count if count else 0,
+                'buckets': buckets
+            }
+        return {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'counters': {f"{name}:{operation}": value for (name, operation), value in sorted(counters.items())},
+            'operations': operations
+        }
+
+    def prometheus(self):
+        # The same in the Prometheus text exposition format
+        with self.lock:
+            histograms = {key: list(histogram) for key, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE tracker_{name}_total counter")
+            for (counter, operation), value in sorted(counters.items()):
+                if counter == name:
+                    lines.append(f'tracker_{name}_total{{operation="{operation}"}} {value}')
+        lines.append('# TYPE tracker_phase_seconds histogram')
+        for (operation, phase), histogram in sorted(histograms.items()):
+            labels = f'operation="{operation}",phase="{phase}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram):
+                cumulative += count
+                lines.append(f'tracker_phase_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            count = sum(histogram[:-1])
+            lines.append(f'tracker_phase_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'tracker_phase_seconds_sum{{{labels}}} {histogram[-1]}')
+            lines.append(f'tracker_phase_seconds_count{{{labels}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        # Prometheus text for a .prom or .txt file, JSON otherwise
+        with open(path, 'w') as file:
+            if path.endswith(('.prom', '.txt')):
+                file.write(self.prometheus())
+            else:
+                json.dump(self.snapshot(), file, indent=2)
+
+class TracedCursor:
+    # A cursor that notes the first statements executed through it, with
+    # their parameters, for the slow-operation log; everything else is
+    # passed through. Unlike a trace callback on the connection, it leaves
+    # out the statements SQLite runs internally (triggers, the full-text index)
+    # and costs nothing per statement run by SQLite
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.statements = []
+        self.more = 0
+
+    def note(self, statement, parameters):
+        if len(self.statements) < SLOW_LOG_STATEMENTS:
+            self.statements.append((statement, parameters))
+        else:
+            self.more += 1
+
+    def execute(self, statement, parameters=()):
+        self.note(statement, parameters)
+        return self.cursor.execute(statement, parameters)
+
+    def executemany(self, statement, parameters):
+        # Its parameters are a sequence of rows, and may be a one-shot iterator
+        self.note(statement, None)
+        return self.cursor.executemany(statement, parameters)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+def explain(conn, statement, parameters):
+    # The query plan of a statement as indented lines
+    try:
+        plan = conn.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+    except sqlite3.Error as e:
+        return [f"(no query plan: {e})"]
+    depth = {0: 0}
+    lines = []
+    for node, parent, _, detail in plan:
+        depth[node] = depth.get(parent, 0) + 1
+        lines.append('  ' * (depth[node] - 1) + detail)
+    return lines
@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from urllib.request import pathname2url
+
+from store import DB_PATH, FUNNEL_STAGES, SEARCH_COLUMNS, count_by_month, fts_query, parse_date, search_charts
+
+# Headless reports: for every report in a JSON file of specs, the status
+# pie, the funnel and the timeline of the applications matching its
+# filters, written to <output>/<report>-<figure>.png (or .pdf), e.g. from a
+# weekly cron job. The counts are aggregated with the queries behind the
+# window's charts; the figures are drawn by the same chart classes on the
+# Agg backend, in a pool of processes when there is more than one to draw.
+# A figure is only drawn again when its counts changed since the last run
+#
+# A spec is an object with a name and optional filters:
+#   {"name": "engineering", "q": "engineer", "field": "position",
+#    "from": "2024-01-01", "to": "31.12.2024", "days": 7, "archive": true,
+#    "db": "alice.db"}
+# days limits it to the last days up to today, so a weekly report always
+# covers its week; db reports on another person's tracker database
+
+REPORT_DIR = 'reports'
+FORMATS = ('png', 'pdf')
+# Figure sizes in inches; the pie and the funnel as in the window
+FIGURE_SIZES = {'statuses': (6, 4), 'funnel': (4, 4), 'timeline': (8, 4)}
+DPI = 100
+# Part of every figure's cache key: changed whenever the charts are drawn
+# differently, so the figures of earlier versions are drawn again
+RENDER_VERSION = 1
+CACHE_FILE = '.report-cache.json'
+
+REPORT_NAME = re.compile(r'[\w.-]+')
+
+# What the report queries read; the newest of them, the archive, came last
+REPORT_SCHEMA = (
+    'status_summary', 'application_milestones', 'funnel_summary', 'response_summary', 'applications_fts',
+    'archived_applications', 'archived_fts', 'all_applications'
+)
+
+def report_search(spec):
+    # The search of a report spec's q, field, from, to, days and archive entries
+    field = spec.get('field', 'all fields').lower()
+    if field not in SEARCH_COLUMNS:
+        raise ValueError(f"unknown field {field!r}, expected one of {', '.join(SEARCH_COLUMNS)}")
+    dates = []
+    for name in ('from', 'to'):
+        day = None
+        if spec.get(name):
+            day = parse_date(spec[name])
+            if day is None:
+                raise ValueError(f"invalid date {spec[name]!r} for {name}, expected DD.MM.YYYY or YYYY-MM-DD")
+        dates.append(day.isoformat() if day else None)
+    if spec.get('days'):
+        dates[0] = (date.today() - timedelta(days=int(spec['days']))).isoformat()
+    return (fts_query(spec.get('q', ''), SEARCH_COLUMNS[field]), dates[0], dates[1], False, bool(spec.get('archive')))
+
+def read_report_specs(path):
+    with open(path, encoding='utf-8') as file:
+        specs = json.load(file)
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError("expected a JSON array of report objects")
+    names = set()
+    for spec in specs:
+        name = spec.get('name')
+        if not isinstance(name, str) or not REPORT_NAME.fullmatch(name):
+            raise ValueError(f"invalid report name {name!r}, expected letters, digits, '.', '-' and '_'")
+        if name in names:
+            raise ValueError(f"duplicate report name {name!r}")
+        names.add(name)
+        report_search(spec)
+    return specs
+
+def open_database(path):
+    # Opens a database read-only: a report never changes it, e.g. another
+    # person's tracker. Unlike connect_database it does not migrate an older
+    # schema either, it fails instead
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no such database {path}")
+    conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro", uri=True)
+    try:
+        cursor = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
+        names = {name for name, in cursor.fetchall()}
+        missing = [name for name in REPORT_SCHEMA if name not in names]
+    except BaseException:
+        conn.close()
+        raise
+    if missing:
+        conn.close()
+        raise sqlite3.DatabaseError(
+            f"{path} has the schema of an older version (no {', '.join(missing)}); "
+            "open it once with this version of the tracker to update it"
+        )
+    return conn
+
+def aggregate_reports(specs, db_path=DB_PATH):
+    # The data of every report's figures as [(figure file name, kind,
+    # data)], with one connection per database
+    figures = []
+    connections = {}
+    try:
+        for spec in specs:
+            path = spec.get('db', db_path)
+            if path not in connections:
+                connections[path] = open_database(path)
+            cursor = connections[path].cursor()
+            search = report_search(spec)
+            status_counts, funnel = search_charts(cursor, search)
+            figures.append((f"{spec['name']}-statuses", 'statuses', status_counts))
+            figures.append((f"{spec['name']}-funnel", 'funnel', funnel))
+            figures.append((f"{spec['name']}-timeline", 'timeline', count_by_month(cursor, search)))
+    finally:
+        for conn in connections.values():
+            conn.close()
+    return figures
+
+def figure_key(kind, data, file_format):
+    # What a figure is drawn from; the same key draws the same figure
+    key = json.dumps([RENDER_VERSION, kind, FIGURE_SIZES[kind], DPI, file_format, data], sort_keys=True)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def render_figure(kind, data, path, file_format):
+    # Draws one figure to path, in a pool process or, with a single worker,
+    # in the calling one. matplotlib is imported on the first call, so it is
+    # only loaded where figures are drawn, once per process
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from chart import FunnelChart, StatusChart, TimelineChart
+
+    figure = Figure(figsize=FIGURE_SIZES[kind], dpi=DPI)
+    FigureCanvasAgg(figure)
+    if kind == 'statuses':
+        chart = StatusChart(figure)
+    elif kind == 'funnel':
+        chart = FunnelChart(figure, FUNNEL_STAGES)
+    else:
+        chart = TimelineChart(figure)
+    chart.update(data)
+    partial = path + '.part'
+    figure.savefig(partial, format=file_format)
+    os.replace(partial, path)
+    return path
+
+def read_cache(output_dir):
+    try:
+        with open(os.path.join(output_dir, CACHE_FILE), encoding='utf-8') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def write_cache(output_dir, cache):
+    path = os.path.join(output_dir, CACHE_FILE)
+    with open(path + '.part', 'w', encoding='utf-8') as file:
+        json.dump(cache, file, indent=2, sort_keys=True)
+    os.replace(path + '.part', path)
+
+def generate_reports(specs, output_dir=REPORT_DIR, file_format='png', workers=None, db_path=DB_PATH, force=False):
+    # Writes the figures of every report to output_dir, drawing only those
+    # whose data changed since the last run (all of them with force) on up to
+    # workers processes (one per core by default). Returns {'figures',
+    # 'rendered', 'cached', 'workers', 'aggregate_seconds', 'render_seconds'}
+    if file_format not in FORMATS:
+        raise ValueError(f"unsupported format {file_format!r}, expected one of {', '.join(FORMATS)}")
+    started = time.perf_counter()
+    figures = aggregate_reports(specs, db_path)
+    aggregated = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    cached = {} if force else read_cache(output_dir)
+    # Entries of figures in this format no longer reported are dropped
+    cache = {file_name: key for file_name, key in cached.items() if not file_name.endswith('.' + file_format)}
+    jobs = []
+    for name, kind, data in figures:
+        file_name = f"{name}.{file_format}"
+        key = figure_key(kind, data, file_format)
+        if cached.get(file_name) == key and os.path.exists(os.path.join(output_dir, file_name)):
+            cache[file_name] = key
+        else:
+            jobs.append((file_name, key, kind, data))
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    try:
+        if workers <= 1:
+            # Starting processes would cost more than it saves; matplotlib
+            # is loaded in this process instead
+            for file_name, key, kind, data in jobs:
+                render_figure(kind, data, os.path.join(output_dir, file_name), file_format)
+                cache[file_name] = key
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(render_figure, kind, data, os.path.join(output_dir, file_name), file_format): (file_name, key)
+                    for file_name, key, kind, data in jobs
+                }
+                for future in as_completed(futures):
+                    future.result()
+                    file_name, key = futures[future]
+                    cache[file_name] = key
+    finally:
+        # Figures drawn before an error are not drawn again
+        write_cache(output_dir, cache)
+    return {
+        'figures': len(figures),
+        'rendered': len(jobs),
+        'cached': len(figures) - len(jobs),
+        'workers': max(workers, 1) if jobs else 0,
+        'aggregate_seconds': aggregated - started,
+        'render_seconds': time.perf_counter() - aggregated
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job Application Tracker reports")
+    parser.add_argument(
+        '--specs', metavar='FILE',
+        help="JSON array of reports with a name and optional filters (default: one report of every application)"
+    )
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file of reports without a db of their own (default: %(default)s)")
+    parser.add_argument('--output', default=REPORT_DIR, metavar='DIR', help="where the figures are written (default: %(default)s)")
+    parser.add_argument('--format', choices=FORMATS, default='png', help="file format of the figures (default: %(default)s)")
+    parser.add_argument('--workers', type=int, help="rendering processes (default: one per core)")
+    parser.add_argument('--force', action='store_true', help="draw every figure, including those whose data did not change")
+    args = parser.parse_args()
+
+    try:
+        specs = read_report_specs(args.specs) if args.specs else [{'name': 'all'}]
+        stats = generate_reports(specs, args.output, args.format, args.workers, args.db, args.force)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Reports failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(
+        f"{len(specs)} reports: drew {stats['rendered']} of {stats['figures']} figures, "
+        f"{stats['cached']} unchanged, to {args.output} in "
+        f"{stats['aggregate_seconds'] + stats['render_seconds']:.1f} s "
+        f"(counting {stats['aggregate_seconds']:.1f} s, drawing {stats['render_seconds']:.1f} s on {stats['workers']} processes)."
+    )
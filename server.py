@@ -0,0 +1,427 @@
+import argparse
+import asyncio
+import base64
+import contextvars
+import json
+import queue
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from metrics import SLOW_MS, Metrics
+
+from store import (
+    APPLICATION_COLUMNS, DATE_SORT, DB_PATH, RESPONSE_WEEKS, SEARCH_COLUMNS, connect_database,
+    count_by_month, count_tree_rows, delete_application, fetch_application, fetch_status_history,
+    fetch_tree_rows, fts_query, import_row, insert_application, parse_date, search_funnel,
+    search_status_counts, status_row, update_application_status, update_applications_status,
+    update_search_status
+)
+
+# Reader connections in the pool, and so the number of reads running at once
+POOL_SIZE = 8
+
+# Seconds a connection waits for another one's write lock before giving up
+BUSY_TIMEOUT = 30
+
+# Applications per page of GET /applications, unless ?limit= asks otherwise
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+MAX_BODY_SIZE = 1024 * 1024
+
+# ?sort= -> the keys the pages are ordered and continued by
+LIST_SORTS = {
+    'id': ('applications.id',),
+    'date': DATE_SORT
+}
+
+LIST_COLUMNS = tuple(f"applications.{column}" for column in APPLICATION_COLUMNS)
+
+# The handler of the request being served, which names its queries in the metrics
+current_operation = contextvars.ContextVar('current_operation', default=None)
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ConnectionPool:
+    # SQLite connections for the request handlers. Queries block, so they run
+    # on threads: reads on any free reader connection, each in one snapshot;
+    # writes one at a time on the single writer connection. In WAL mode the
+    # readers never wait for the writer. Writes begin with BEGIN IMMEDIATE,
+    # so a write from another process (e.g. the desktop app) is waited for
+    # through the busy timeout instead of failing with "database is locked"
+
+    def __init__(self, path, size=POOL_SIZE, durable=True, metrics=None):
+        self.metrics = metrics
+        self.write_executor = ThreadPoolExecutor(1, thread_name_prefix='writer')
+        self.read_executor = ThreadPoolExecutor(size, thread_name_prefix='reader')
+        # Opened (and migrated) on the writer thread, which is the only one using it
+        self.writer = self.write_executor.submit(self.connect_writer, path, durable).result()
+        self.readers = queue.Queue()
+        for _ in range(size):
+            self.readers.put(sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False))
+
+    def connect_writer(self, path, durable):
+        conn = connect_database(path)
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}')
+        conn.execute(f"PRAGMA synchronous={'FULL' if durable else 'NORMAL'}")
+        return conn
+
+    async def read(self, job):
+        job = self.instrument(job, 'read')
+        return await asyncio.get_running_loop().run_in_executor(self.read_executor, self.run_read, job)
+
+    async def write(self, job):
+        job = self.instrument(job, 'write')
+        return await asyncio.get_running_loop().run_in_executor(self.write_executor, self.run_write, job)
+
+    def instrument(self, job, default_operation):
+        if self.metrics is None:
+            return job
+        return self.metrics.timed_job(current_operation.get() or default_operation, job)
+
+    def run_read(self, job):
+        conn = self.readers.get()
+        try:
+            # A read transaction, so every query of the job sees the same data
+            conn.execute('BEGIN')
+            try:
+                return job(conn.cursor())
+            finally:
+                conn.rollback()
+        finally:
+            self.readers.put(conn)
+
+    def run_write(self, job):
+        cursor = self.writer.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            result = job(cursor)
+        except BaseException:
+            self.writer.rollback()
+            raise
+        self.writer.commit()
+        return result
+
+    def close(self):
+        self.read_executor.shutdown()
+        while not self.readers.empty():
+            self.readers.get().close()
+        self.write_executor.submit(self.writer.close).result()
+        self.write_executor.shutdown()
+
+def application_json(row):
+    return dict(zip(APPLICATION_COLUMNS, row))
+
+def read_search(query):
+    # The search of a request's ?q=, ?field=, ?from=, ?to= and ?archive= parameters
+    field = query.get('field', 'all fields').lower()
+    if field not in SEARCH_COLUMNS:
+        raise HTTPError(400, f"unknown field {field!r}, expected one of {', '.join(SEARCH_COLUMNS)}")
+    dates = []
+    for name in ('from', 'to'):
+        date = None
+        if query.get(name):
+            date = parse_date(query[name])
+            if date is None:
+                raise HTTPError(400, f"invalid date {query[name]!r} for {name}, expected DD.MM.YYYY or YYYY-MM-DD")
+        dates.append(date.isoformat() if date else None)
+    archive = query.get('archive', '').lower() in ('1', 'true')
+    return (fts_query(query.get('q', ''), SEARCH_COLUMNS[field]), dates[0], dates[1], False, archive)
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(token):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        key = None
+    if not isinstance(key, list):
+        raise HTTPError(400, "invalid cursor")
+    return key
+
+def read_json_body(body):
+    try:
+        record = json.loads(body or b'null')
+    except ValueError as e:
+        raise HTTPError(400, f"invalid JSON: {e}")
+    if not isinstance(record, dict):
+        raise HTTPError(400, "expected a JSON object with application fields")
+    return record
+
+class ApplicationServer:
+    # The HTTP/JSON API. Endpoints:
+    #   GET    /applications               one page, ?q= &field= &from= &to= &sort=id|date &limit= &cursor=
+    #   POST   /applications               add an application
+    #   PATCH  /applications               change the status of the applications listed in "ids",
+    #                                      or of all matching the list's filters, in one UPDATE
+    #   GET    /applications/<id>
+    #   PATCH  /applications/<id>          change the status and rejection details
+    #   DELETE /applications/<id>
+    #   GET    /applications/<id>/history  its status changes, oldest first
+    #   GET    /stats/statuses             chart counts per category, same filters as the list
+    #   GET    /stats/monthly              applications per month applied, same filters
+    #   GET    /stats/funnel               applications per funnel stage and time to first response, same filters
+    #   GET    /metrics                    request and query timings in the Prometheus text format
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.metrics = pool.metrics or Metrics()
+        self.routes = [
+            ('GET', re.compile(r'/applications'), self.list_applications),
+            ('POST', re.compile(r'/applications'), self.add_application),
+            ('PATCH', re.compile(r'/applications'), self.update_statuses),
+            ('GET', re.compile(r'/applications/(\d+)'), self.get_application),
+            ('PATCH', re.compile(r'/applications/(\d+)'), self.update_status),
+            ('DELETE', re.compile(r'/applications/(\d+)'), self.delete_application),
+            ('GET', re.compile(r'/applications/(\d+)/history'), self.status_history),
+            ('GET', re.compile(r'/stats/statuses'), self.status_counts),
+            ('GET', re.compile(r'/stats/monthly'), self.monthly_counts),
+            ('GET', re.compile(r'/stats/funnel'), self.funnel),
+            ('GET', re.compile(r'/metrics'), self.metrics_text)
+        ]
+
+    async def handle_connection(self, reader, writer):
+        # One client connection; requests on it are answered in turn (keep-alive)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if not line.strip():
+                            break
+                        name, _, value = line.decode('latin-1').partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                    connection = headers.get('connection', '').lower()
+                    keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HTTPError(413, "request body too large")
+                    body = await reader.readexactly(length) if length > 0 else b''
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except ValueError:
+                    keep_alive = False
+                    status, payload = 400, {'error': "malformed request"}
+                except Exception as e:
+                    print(f"{request_line!r} failed: {e!r}", file=sys.stderr)
+                    keep_alive = False
+                    status, payload = 500, {'error': "internal error"}
+                writer.write(self.response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def response(self, status, payload, keep_alive):
+        # A str payload is sent as plain text, anything else as JSON
+        content_type = 'application/json'
+        if isinstance(payload, str):
+            body = payload.encode()
+            content_type = 'text/plain; version=0.0.4'
+        else:
+            body = b'' if payload is None else json.dumps(payload).encode()
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode('latin-1') + body
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        allowed = []
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(url.path)
+            if match:
+                if route_method == method:
+                    current_operation.set(handler.__name__)
+                    try:
+                        with self.metrics.timer(handler.__name__, 'request'):
+                            return await handler(query, body, *(int(group) for group in match.groups()))
+                    except ValueError as e:
+                        raise HTTPError(400, str(e))
+                    except sqlite3.Error as e:
+                        print(f"{method} {target} failed: {e}", file=sys.stderr)
+                        raise HTTPError(500, f"database error: {e}")
+                allowed.append(route_method)
+        if allowed:
+            raise HTTPError(405, f"method {method} not allowed, expected {', '.join(allowed)}")
+        raise HTTPError(404, f"no such resource {url.path}")
+
+    async def list_applications(self, query, body):
+        # Keyset pagination: the cursor is the sort key of the last row
+        # served, so a page costs the same wherever it is in the list. The
+        # total is only counted for the first page
+        search = read_search(query)
+        sort = query.get('sort', 'id')
+        if sort not in LIST_SORTS:
+            raise HTTPError(400, f"unknown sort {sort!r}, expected one of {', '.join(LIST_SORTS)}")
+        sort_keys = LIST_SORTS[sort]
+        limit = int(query.get('limit', PAGE_SIZE))
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HTTPError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        after = decode_cursor(query['cursor']) if 'cursor' in query else None
+        if after is not None and len(after) != len(sort_keys):
+            raise HTTPError(400, "invalid cursor")
+
+        def job(cursor):
+            total = count_tree_rows(cursor, search) if after is None else None
+            # One row more than the page tells whether there is a next one
+            rows = fetch_tree_rows(cursor, search, sort_keys, limit + 1, after=after, columns=LIST_COLUMNS)
+            return total, rows
+
+        total, rows = await self.pool.read(job)
+        page = rows[:limit]
+        result = {
+            'applications': [application_json(row[:len(LIST_COLUMNS)]) for row in page],
+            'next_cursor': encode_cursor(list(page[-1][len(LIST_COLUMNS):])) if len(rows) > limit else None
+        }
+        if total is not None:
+            result['total'] = total
+        return 200, result
+
+    async def get_application(self, query, body, app_id):
+        row = await self.pool.read(lambda cursor: fetch_application(cursor, app_id))
+        if row is None:
+            raise HTTPError(404, f"no application {app_id}")
+        return 200, application_json(row)
+
+    async def add_application(self, query, body):
+        values = import_row(read_json_body(body))
+
+        def job(cursor):
+            return fetch_application(cursor, insert_application(cursor, values))
+
+        return 201, application_json(await self.pool.write(job))
+
+    async def update_status(self, query, body, app_id):
+        status = status_row(read_json_body(body))
+
+        def job(cursor):
+            return update_application_status(cursor, app_id, *status), fetch_application(cursor, app_id)
+
+        # Archived applications are found, but only live ones can change
+        updated, row = await self.pool.write(job)
+        if row is None:
+            raise HTTPError(404, f"no application {app_id}")
+        if not updated:
+            raise HTTPError(409, f"application {app_id} is archived")
+        return 200, application_json(row)
+
+    async def update_statuses(self, query, body):
+        record = read_json_body(body)
+        status = status_row(record)
+        app_ids = record.get('ids')
+        if app_ids is not None:
+            if not isinstance(app_ids, list) or not all(isinstance(app_id, int) for app_id in app_ids):
+                raise HTTPError(400, "ids must be a list of application ids")
+            job = lambda cursor: update_applications_status(cursor, app_ids, *status)
+        else:
+            search = read_search(query)
+            if search[:3] == (None, None, None):
+                # Updating every application takes an explicit filter
+                raise HTTPError(400, "expected ids or at least one of q, from and to")
+            job = lambda cursor: update_search_status(cursor, search, *status)
+        return 200, {'updated': await self.pool.write(job)}
+
+    async def delete_application(self, query, body, app_id):
+        def job(cursor):
+            return delete_application(cursor, app_id), fetch_application(cursor, app_id)
+
+        deleted, row = await self.pool.write(job)
+        if row is not None:
+            raise HTTPError(409, f"application {app_id} is archived")
+        if not deleted:
+            raise HTTPError(404, f"no application {app_id}")
+        return 204, None
+
+    async def status_history(self, query, body, app_id):
+        # The history outlives the application; a deleted one ends with a null status
+        changes = await self.pool.read(lambda cursor: fetch_status_history(cursor, app_id))
+        if not changes:
+            raise HTTPError(404, f"no application {app_id}")
+        return 200, {'changes': [
+            {'old_status': old_status, 'new_status': new_status, 'changed_at': changed_at}
+            for old_status, new_status, changed_at in changes
+        ]}
+
+    async def status_counts(self, query, body):
+        search = read_search(query)
+        status_counts = await self.pool.read(lambda cursor: search_status_counts(cursor, search))
+        return 200, {'total': sum(status_counts.values()), 'counts': status_counts}
+
+    async def monthly_counts(self, query, body):
+        search = read_search(query)
+        months = await self.pool.read(lambda cursor: count_by_month(cursor, search))
+        return 200, {'months': [{'month': month, 'count': count} for month, count in months]}
+
+    async def metrics_text(self, query, body):
+        return 200, self.metrics.prometheus()
+
+    async def funnel(self, query, body):
+        search = read_search(query)
+        stage_counts, response_weeks = await self.pool.read(lambda cursor: search_funnel(cursor, search))
+        responses = sum(count for count, _ in response_weeks.values())
+        days = sum(days for _, days in response_weeks.values())
+        return 200, {
+            'stages': [{'stage': stage, 'count': count} for stage, count in stage_counts.items()],
+            # The last week collects every later response
+            'response_weeks': [
+                {'week': week, 'last': week == RESPONSE_WEEKS, 'count': count, 'days': days}
+                for week, (count, days) in sorted(response_weeks.items())
+            ],
+            'average_response_days': days / responses if responses else None
+        }
+
+async def serve(path, host, port, pool_size, durable, metrics):
+    pool = ConnectionPool(path, pool_size, durable, metrics)
+    app = ApplicationServer(pool)
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    print(f"Serving {path} on http://{host}:{port}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        pool.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Job Application Tracker HTTP/JSON API")
+    parser.add_argument('--db', default=DB_PATH, help="SQLite database file (default: %(default)s)")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: %(default)s)")
+    parser.add_argument('--port', type=int, default=8000, help="port to listen on (default: %(default)s)")
+    parser.add_argument('--pool-size', type=int, default=POOL_SIZE, help="reader connections (default: %(default)s)")
+    parser.add_argument(
+        '--durability', choices=('full', 'normal'), default='full',
+        help="full: every commit is synced to disk; normal: faster commits that may be lost on power failure"
+    )
+    parser.add_argument(
+        '--slow-ms', type=float, default=SLOW_MS,
+        help="log requests whose SQL takes longer than this, with their query plans (default: %(default)s, 0 disables)"
+    )
+    parser.add_argument('--slow-log', metavar='FILE', help="append the slow-operation log to this file instead of stderr")
+    args = parser.parse_args()
+    metrics = Metrics(args.slow_ms or None, open(args.slow_log, 'a') if args.slow_log else None)
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.pool_size, args.durability == 'full', metrics))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,1090 @@
+import sqlite3
+import csv
+import json
+import os
+from datetime import date, datetime, timedelta
+
+# The application store: schema, queries and writes on a plain sqlite3
+# connection, shared by the desktop app (main.py) and the HTTP API (server.py)
+
+# Search results up to this size are listed by relevance; ranking needs every
+# match scored, so larger results are listed in index order instead
+RANKED_SEARCH_LIMIT = 10000
+RANKED_SORT = ('applications_fts.rank', 'applications.id')
+# Chronological order, served by the applied_on index
+DATE_SORT = ('applications.applied_on', 'applications.id')
+
+# Search criteria -> full-text column (None searches every column)
+SEARCH_COLUMNS = {
+    'all fields': None,
+    'company': 'company',
+    'position': 'position',
+    'status': 'status',
+    'rejection stage': 'rejection_stage'
+}
+
+# Columns shown in the Treeview; buffered rows carry their sort key after these
+TREE_COLUMNS = (
+    'applications.id', 'applications.company', 'applications.position',
+    'applications.status', 'applications.date_applied'
+)
+
+DB_PATH = 'applications.db'
+
+STATUSES = ('No Answer', 'Interviewing', 'Offered', 'Accepted', 'Rejected', 'Offer Rejected')
+
+# Closed applications can be moved to the archive tables once they were
+# applied for more than ARCHIVE_AFTER_DAYS ago
+CLOSED_STATUSES = ('Accepted', 'Rejected', 'Offer Rejected')
+ARCHIVE_AFTER_DAYS = 365
+
+# An id is never given to a second application: new ids follow the
+# archived ones, and those of deleted applications, which the status
+# history and the change log keep. Each is an index lookup
+INSERT_APPLICATION = '''
+    INSERT INTO applications (
+        id, company, position, status, date_applied, applied_on,
+        rejection_stage, received_coding_challenge, received_interview
+    )
+    VALUES (
+        MAX(
+            (SELECT IFNULL(MAX(id), 0) FROM applications),
+            (SELECT IFNULL(MAX(id), 0) FROM archived_applications),
+            (SELECT IFNULL(MAX(application_id), 0) FROM status_history),
+            (SELECT IFNULL(MAX(application_id), 0) FROM application_changes)
+        ) + 1,
+        ?, ?, ?, ?, ?, ?, ?, ?
+    )
+'''
+
+UPDATE_STATUS = '''
+    UPDATE applications
+    SET status=?, rejection_stage=?, received_coding_challenge=?, received_interview=?
+'''
+
+# Bulk status updates list at most this many ids per statement; SQLite
+# before 3.32 allows no more than 999 parameters
+UPDATE_CHUNK_SIZE = 500
+
+FTS_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS applications_fts_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT INTO applications_fts (rowid, company, position, status, rejection_stage)
+        VALUES (NEW.id, NEW.company, NEW.position, NEW.status, NEW.rejection_stage);
+    END
+'''
+
+# Imports insert this many records per transaction and read files in chunks of this many characters
+IMPORT_BATCH_SIZE = 1000
+IMPORT_CHUNK_SIZE = 65536
+
+# Every column of an application, as exported, imported and served by the
+# API; exports fetch EXPORT_BATCH_SIZE rows at a time
+APPLICATION_COLUMNS = (
+    'id', 'company', 'position', 'status', 'date_applied',
+    'rejection_stage', 'received_coding_challenge', 'received_interview'
+)
+EXPORT_BATCH_SIZE = 1000
+
+class ExportCancelled(Exception):
+    pass
+
+# Dates are entered as DD.MM.YYYY; ISO dates are accepted as well
+DATE_FORMATS = ('%d.%m.%Y', '%Y-%m-%d')
+
+# A search is (full-text query, first date, last date, sorted by date,
+# including the archive); the query and the ISO date bounds are None when not set
+ALL_APPLICATIONS = (None, None, None, False, False)
+
+# A search including the archive lists from the all_applications view, under
+# the name of the applications table so queries can name either one. Its
+# counts are added up from both tables instead, each read from its own
+# indexes, which the view would hide
+ARCHIVE_VIEW = 'all_applications AS applications'
+ARCHIVED_SOURCE = 'archived_applications AS applications'
+
+# Chart categories and the condition an application row ({row}) meets to
+# fall into each. The conditions are mutually exclusive: rejections count
+# after an interview, else after a coding challenge, else without either
+STATUS_CATEGORIES = {
+    'No Answer': "{row}.status = 'No Answer'",
+    'Interviewing': "{row}.status = 'Interviewing'",
+    'Offered': "{row}.status = 'Offered'",
+    'Accepted': "{row}.status = 'Accepted'",
+    'Offer Rejected': "{row}.status = 'Offer Rejected'",
+    'Rejected without Interview': (
+        "{row}.status = 'Rejected' AND NOT IFNULL({row}.received_interview, 0)"
+        " AND NOT IFNULL({row}.received_coding_challenge, 0)"
+    ),
+    'Rejected after Coding Challenge': (
+        "{row}.status = 'Rejected' AND NOT IFNULL({row}.received_interview, 0)"
+        " AND {row}.received_coding_challenge"
+    ),
+    'Rejected after Interview': "{row}.status = 'Rejected' AND {row}.received_interview"
+}
+
+# Rows in none of the categories, e.g. with a status from an older version,
+# are counted together under this one
+OTHER_CATEGORY = 'Other'
+
+# The category of one row, for the status_summary triggers
+STATUS_CATEGORY_SQL = 'CASE\n' + ''.join(
+    f"    WHEN {condition} THEN '{category}'\n" for category, condition in STATUS_CATEGORIES.items()
+) + f"    ELSE '{OTHER_CATEGORY}'\nEND"
+
+# Funnel stages and the condition an application row ({row}) meets once it
+# has reached each. An application counts for every stage it ever reached,
+# also after its status moved on, e.g. from an interview to a rejection
+FUNNEL_STAGES = {
+    'Applied': "1",
+    'Responded': "{row}.status != 'No Answer'",
+    'Interview': (
+        "{row}.status IN ('Interviewing', 'Offered', 'Accepted', 'Offer Rejected')"
+        " OR ({row}.status = 'Rejected' AND IFNULL({row}.received_interview, 0))"
+    ),
+    'Offer': "{row}.status IN ('Offered', 'Accepted', 'Offer Rejected')",
+    'Accepted': "{row}.status = 'Accepted'"
+}
+
+# The stages a row is at as a bit mask, bit i standing for the i-th stage
+FUNNEL_REACHED_SQL = ' | '.join(
+    f"(CASE WHEN {condition} THEN {1 << stage} ELSE 0 END)" for stage, condition in enumerate(FUNNEL_STAGES.values())
+)
+RESPONDED = 1 << list(FUNNEL_STAGES).index('Responded')
+
+# Times to the first response are counted per week, up to this many weeks;
+# longer ones are counted in the last week
+RESPONSE_WEEKS = 12
+
+# Days from the date a row was applied on to today
+RESPONSE_DAYS_SQL = "MAX(0, CAST(julianday('now', 'localtime') - julianday({row}.applied_on) AS INTEGER))"
+
+STATUS_HISTORY_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS status_history_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT INTO status_history (application_id, new_status, changed_at)
+        VALUES (NEW.id, NEW.status, datetime('now', 'localtime'));
+    END
+'''
+
+STATUS_HISTORY_DELETE_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS status_history_delete AFTER DELETE ON applications
+    BEGIN
+        INSERT INTO status_history (application_id, old_status, changed_at)
+        VALUES (OLD.id, OLD.status, datetime('now', 'localtime'));
+    END
+'''
+
+# Applications added with a response already have no known response time
+FUNNEL_INSERT_TRIGGER = f'''
+    CREATE TRIGGER IF NOT EXISTS funnel_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT INTO application_milestones (application_id, reached) VALUES (NEW.id, {FUNNEL_REACHED_SQL.format(row='NEW')});
+        UPDATE funnel_summary SET count = count + ((({FUNNEL_REACHED_SQL.format(row='NEW')}) >> stage) & 1);
+    END
+'''
+
+# Other connections' changes are found through the change log, one row per
+# application that is given a new version on every change. added is the
+# version the application was added at (NULL if it was added before the log)
+CHANGES_INSERT_TRIGGER = '''
+    CREATE TRIGGER IF NOT EXISTS application_changes_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT OR REPLACE INTO application_changes (application_id, added)
+        VALUES (NEW.id, (SELECT IFNULL(MAX(version), 0) + 1 FROM application_changes));
+    END
+'''
+
+def connect_database(path=DB_PATH):
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    # WAL lets readers and the writer work on the file at the same time
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS applications (
+            id INTEGER PRIMARY KEY,
+            company TEXT NOT NULL,
+            position TEXT NOT NULL,
+            status TEXT NOT NULL,
+            date_applied TEXT NOT NULL
+        )
+    ''')
+    conn.commit()
+    # Ensure new columns exist
+    cursor.execute("PRAGMA table_info(applications)")
+    columns = [column_info[1] for column_info in cursor.fetchall()]
+    if 'rejection_stage' not in columns:
+        cursor.execute("ALTER TABLE applications ADD COLUMN rejection_stage TEXT")
+    if 'received_coding_challenge' not in columns:
+        cursor.execute("ALTER TABLE applications ADD COLUMN received_coding_challenge INTEGER DEFAULT 0")
+    if 'received_interview' not in columns:
+        cursor.execute("ALTER TABLE applications ADD COLUMN received_interview INTEGER DEFAULT 0")
+    if 'applied_on' not in columns:
+        # date_applied is free text in DD.MM.YYYY, which neither sorts nor
+        # range-filters in SQL; applied_on holds the same date as YYYY-MM-DD
+        # ('' if it could not be parsed)
+        cursor.execute("ALTER TABLE applications ADD COLUMN applied_on TEXT NOT NULL DEFAULT ''")
+        cursor.execute('SELECT id, date_applied FROM applications')
+        dates = []
+        for app_id, date_applied in cursor.fetchall():
+            date = parse_date(date_applied)
+            if date is not None:
+                dates.append((date.isoformat(), app_id))
+        cursor.executemany('UPDATE applications SET applied_on=? WHERE id=?', dates)
+    # Date order and date windows; the index also covers the category
+    # columns, so chart counts for a date window never read the table
+    cursor.execute('DROP INDEX IF EXISTS applications_applied_on')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS applications_applied_on_categories
+        ON applications (applied_on, id, status, received_interview, received_coding_challenge)
+    ''')
+    conn.commit()
+
+    # Per-category counts for the chart, maintained by triggers so a chart
+    # refresh reads a handful of rows instead of the whole table
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='status_summary'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            CREATE TABLE status_summary (
+                category TEXT PRIMARY KEY,
+                count INTEGER NOT NULL
+            )
+        ''')
+        rebuild_status_summary(cursor)
+    # Earlier versions counted every unknown status under its own name
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name='status_summary_insert'")
+    row = cursor.fetchone()
+    if row is not None and f"'{OTHER_CATEGORY}'" not in row[0]:
+        for trigger in ('status_summary_insert', 'status_summary_update', 'status_summary_delete'):
+            cursor.execute(f'DROP TRIGGER {trigger}')
+        rebuild_status_summary(cursor)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS status_summary_insert AFTER INSERT ON applications
+        BEGIN
+            INSERT INTO status_summary (category, count) VALUES ({STATUS_CATEGORY_SQL.format(row='NEW')}, 1)
+                ON CONFLICT(category) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS status_summary_update
+        AFTER UPDATE OF status, received_interview, received_coding_challenge ON applications
+        BEGIN
+            UPDATE status_summary SET count = count - 1 WHERE category = {STATUS_CATEGORY_SQL.format(row='OLD')};
+            INSERT INTO status_summary (category, count) VALUES ({STATUS_CATEGORY_SQL.format(row='NEW')}, 1)
+                ON CONFLICT(category) DO UPDATE SET count = count + 1;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS status_summary_delete AFTER DELETE ON applications
+        BEGIN
+            UPDATE status_summary SET count = count - 1 WHERE category = {STATUS_CATEGORY_SQL.format(row='OLD')};
+        END
+    ''')
+
+    # Append-only log of status changes: a row when an application is added,
+    # one per change of its status and one when it is deleted (new_status NULL)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='status_history'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            CREATE TABLE status_history (
+                id INTEGER PRIMARY KEY,
+                application_id INTEGER NOT NULL,
+                old_status TEXT,
+                new_status TEXT,
+                changed_at TEXT NOT NULL
+            )
+        ''')
+        # Applications from before the log start out with their current status
+        cursor.execute('''
+            INSERT INTO status_history (application_id, new_status, changed_at)
+            SELECT id, status, datetime('now', 'localtime') FROM applications
+        ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS status_history_application ON status_history (application_id)')
+    cursor.execute(STATUS_HISTORY_INSERT_TRIGGER)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS status_history_update
+        AFTER UPDATE OF status ON applications WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT INTO status_history (application_id, old_status, new_status, changed_at)
+            VALUES (NEW.id, OLD.status, NEW.status, datetime('now', 'localtime'));
+        END
+    ''')
+    cursor.execute(STATUS_HISTORY_DELETE_TRIGGER)
+
+    # Funnel metrics, kept up to date per status change instead of being
+    # recomputed from the history: the stages each application has reached
+    # (FUNNEL_REACHED_SQL bits) and the days to its first response, plus the
+    # totals of both for the unfiltered funnel
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='application_milestones'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            CREATE TABLE application_milestones (
+                application_id INTEGER PRIMARY KEY,
+                reached INTEGER NOT NULL,
+                response_days INTEGER
+            )
+        ''')
+        cursor.execute('CREATE TABLE funnel_summary (stage INTEGER PRIMARY KEY, count INTEGER NOT NULL)')
+        cursor.execute('''
+            CREATE TABLE response_summary (
+                week INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL,
+                days INTEGER NOT NULL
+            )
+        ''')
+        # When applications from before got their response is not known
+        cursor.execute(f'''
+            INSERT INTO application_milestones (application_id, reached)
+            SELECT id, {FUNNEL_REACHED_SQL.format(row='applications')} FROM applications
+        ''')
+        rebuild_funnel_summary(cursor)
+    new_reached = FUNNEL_REACHED_SQL.format(row='NEW')
+    old_reached = 'IFNULL((SELECT reached FROM application_milestones WHERE application_id = {row}.id), 0)'
+    first_response = (
+        f"NEW.applied_on != '' AND (({new_reached}) & {RESPONDED}) AND NOT ({{reached}} & {RESPONDED})"
+    )
+    cursor.execute(FUNNEL_INSERT_TRIGGER)
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS funnel_update AFTER UPDATE OF status, received_interview ON applications
+        BEGIN
+            UPDATE funnel_summary
+            SET count = count + (((({new_reached}) & ~{old_reached.format(row='NEW')}) >> stage) & 1);
+            INSERT INTO response_summary (week, count, days)
+            SELECT MIN({RESPONSE_DAYS_SQL.format(row='NEW')} / 7, {RESPONSE_WEEKS}), 1, {RESPONSE_DAYS_SQL.format(row='NEW')}
+            WHERE {first_response.format(reached=old_reached.format(row='NEW'))}
+            ON CONFLICT(week) DO UPDATE SET count = count + 1, days = days + excluded.days;
+            UPDATE application_milestones
+            SET response_days = CASE
+                    WHEN {first_response.format(reached='reached')} THEN {RESPONSE_DAYS_SQL.format(row='NEW')}
+                    ELSE response_days
+                END,
+                reached = reached | ({new_reached})
+            WHERE application_id = NEW.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS funnel_delete AFTER DELETE ON applications
+        BEGIN
+            UPDATE funnel_summary SET count = count - (({old_reached.format(row='OLD')} >> stage) & 1);
+            UPDATE response_summary
+            SET count = count - 1,
+                days = days - (SELECT response_days FROM application_milestones WHERE application_id = OLD.id)
+            WHERE week = (
+                SELECT MIN(response_days / 7, {RESPONSE_WEEKS}) FROM application_milestones WHERE application_id = OLD.id
+            );
+            DELETE FROM application_milestones WHERE application_id = OLD.id;
+        END
+    ''')
+
+    # Full-text index over the searchable columns. It stores no copy of the
+    # text (external content) and is kept in sync with applications by triggers
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='applications_fts'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE applications_fts USING fts5(
+                company, position, status, rejection_stage,
+                content='applications', content_rowid='id', prefix='2 3'
+            )
+        ''')
+        cursor.execute("INSERT INTO applications_fts (applications_fts) VALUES ('rebuild')")
+    cursor.execute(FTS_INSERT_TRIGGER)
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS applications_fts_update
+        AFTER UPDATE OF company, position, status, rejection_stage ON applications
+        BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, status, rejection_stage)
+            VALUES ('delete', OLD.id, OLD.company, OLD.position, OLD.status, OLD.rejection_stage);
+            INSERT INTO applications_fts (rowid, company, position, status, rejection_stage)
+            VALUES (NEW.id, NEW.company, NEW.position, NEW.status, NEW.rejection_stage);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS applications_fts_delete AFTER DELETE ON applications
+        BEGIN
+            INSERT INTO applications_fts (applications_fts, rowid, company, position, status, rejection_stage)
+            VALUES ('delete', OLD.id, OLD.company, OLD.position, OLD.status, OLD.rejection_stage);
+        END
+    ''')
+
+    # The change log (see CHANGES_INSERT_TRIGGER). AUTOINCREMENT keeps
+    # versions from being reused, so a version seen once stays a valid
+    # starting point; a deleted application keeps its row as a tombstone
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS application_changes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            application_id INTEGER NOT NULL UNIQUE,
+            added INTEGER
+        )
+    ''')
+    cursor.execute(CHANGES_INSERT_TRIGGER)
+    for event, row in (('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS application_changes_{event.lower()} AFTER {event} ON applications
+            BEGIN
+                INSERT OR REPLACE INTO application_changes (application_id, added)
+                VALUES ({row}.id, (SELECT added FROM application_changes WHERE application_id = {row}.id));
+            END
+        ''')
+
+    # Cold storage for closed applications (archive_applications), so the
+    # lists, searches and charts only go through the open and recent ones.
+    # An archived application keeps its funnel milestones and its status
+    # history; it has a full-text index of its own, and the all_applications
+    # view puts both tables together for searches including the archive
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS archived_applications (
+            id INTEGER PRIMARY KEY,
+            company TEXT NOT NULL,
+            position TEXT NOT NULL,
+            status TEXT NOT NULL,
+            date_applied TEXT NOT NULL,
+            rejection_stage TEXT,
+            received_coding_challenge INTEGER DEFAULT 0,
+            received_interview INTEGER DEFAULT 0,
+            applied_on TEXT NOT NULL DEFAULT '',
+            reached INTEGER NOT NULL,
+            response_days INTEGER,
+            archived_at TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS archived_applications_applied_on_categories
+        ON archived_applications (applied_on, id, status, received_interview, received_coding_challenge)
+    ''')
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='archived_fts'")
+    if cursor.fetchone() is None:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE archived_fts USING fts5(
+                company, position, status, rejection_stage,
+                content='archived_applications', content_rowid='id', prefix='2 3'
+            )
+        ''')
+    columns = ', '.join(APPLICATION_COLUMNS + ('applied_on',))
+    cursor.execute(f'''
+        CREATE VIEW IF NOT EXISTS all_applications AS
+        SELECT {columns} FROM applications
+        UNION ALL
+        SELECT {columns} FROM archived_applications
+    ''')
+    conn.commit()
+    return conn
+
+def sort_key(row):
+    return row[len(TREE_COLUMNS):]
+
+def parse_date(text):
+    # The date in one of DATE_FORMATS, or None if it is not a valid date
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text.strip(), date_format).date()
+        except ValueError:
+            pass
+    return None
+
+def fts_query(text, column=None):
+    # Every word becomes a quoted prefix term and all of them have to match,
+    # so "acm eng" finds "Acme" / "Engineer"; optionally limited to one column
+    terms = ['"{}"*'.format(term.replace('"', '""')) for term in text.split()]
+    if not terms:
+        return None
+    query = ' '.join(terms)
+    return f"{{{column}}} : ({query})" if column else query
+
+def rebuild_status_summary(cursor):
+    cursor.execute('DELETE FROM status_summary')
+    cursor.execute(f'''
+        INSERT INTO status_summary (category, count)
+        SELECT {STATUS_CATEGORY_SQL.format(row='applications')}, COUNT(*) FROM applications GROUP BY 1
+    ''')
+
+def check_status_summary(cursor):
+    # Compare the maintained summary against a full recount and return the
+    # categories that disagree as {category: (summary count, recounted)}
+    cursor.execute('SELECT category, count FROM status_summary')
+    summary = dict(cursor.fetchall())
+    recount = count_statuses(cursor)
+    mismatches = {}
+    for category in sorted(set(summary) | set(recount)):
+        if summary.get(category, 0) != recount.get(category, 0):
+            mismatches[category] = (summary.get(category, 0), recount.get(category, 0))
+    return mismatches
+
+def rebuild_funnel_summary(cursor):
+    # Recompute the funnel totals from application_milestones. The
+    # milestones themselves can't be recomputed: which stages an
+    # application went through is only known from its changes as they happened
+    stage_counts, response_weeks = count_funnel(cursor)
+    cursor.execute('DELETE FROM funnel_summary')
+    cursor.executemany(
+        'INSERT INTO funnel_summary (stage, count) VALUES (?, ?)',
+        [(stage, count) for stage, count in enumerate(stage_counts.values())]
+    )
+    cursor.execute('DELETE FROM response_summary')
+    cursor.executemany(
+        'INSERT INTO response_summary (week, count, days) VALUES (?, ?, ?)',
+        [(week, count, days) for week, (count, days) in response_weeks.items()]
+    )
+
+def check_funnel_summary(cursor):
+    # Like check_status_summary, for the funnel and response time totals
+    summary = read_funnel_summary(cursor)
+    recount = count_funnel(cursor)
+    mismatches = {}
+    for stage in FUNNEL_STAGES:
+        if summary[0][stage] != recount[0][stage]:
+            mismatches[f"Funnel stage {stage}"] = (summary[0][stage], recount[0][stage])
+    for week in sorted(set(summary[1]) | set(recount[1])):
+        if summary[1].get(week, (0, 0)) != recount[1].get(week, (0, 0)):
+            mismatches[f"Responses in week {week}"] = (summary[1].get(week, (0, 0)), recount[1].get(week, (0, 0)))
+    return mismatches
+
+def count_funnel(cursor, condition='', params=(), archived=False):
+    # Funnel metrics of the applications matching a condition, from their
+    # milestones: ({stage: applications that reached it}, {week: (responses
+    # in that week after applying, their days in total)}); with archived,
+    # of the archived applications, which hold their milestones themselves
+    if archived:
+        milestones, where = ARCHIVED_SOURCE, condition or '1'
+    else:
+        milestones = 'application_milestones'
+        where = f"application_id IN (SELECT id FROM applications WHERE {condition})" if condition else '1'
+    reached = ', '.join(f"IFNULL(SUM((reached >> {stage}) & 1), 0)" for stage in range(len(FUNNEL_STAGES)))
+    cursor.execute(f"SELECT {reached} FROM {milestones} WHERE {where}", params)
+    stage_counts = dict(zip(FUNNEL_STAGES, cursor.fetchone()))
+    cursor.execute(f'''
+        SELECT MIN(response_days / 7, {RESPONSE_WEEKS}), COUNT(*), SUM(response_days)
+        FROM {milestones}
+        WHERE response_days IS NOT NULL AND {where}
+        GROUP BY 1
+    ''', params)
+    response_weeks = {week: (count, days) for week, count, days in cursor.fetchall()}
+    return stage_counts, response_weeks
+
+def add_funnel(funnel, other):
+    # The funnel metrics of two sets of applications together
+    stage_counts, response_weeks = funnel
+    other_counts, other_weeks = other
+    stage_counts = {stage: count + other_counts[stage] for stage, count in stage_counts.items()}
+    response_weeks = dict(response_weeks)
+    for week, (count, days) in other_weeks.items():
+        total_count, total_days = response_weeks.get(week, (0, 0))
+        response_weeks[week] = (total_count + count, total_days + days)
+    return stage_counts, response_weeks
+
+def read_funnel_summary(cursor):
+    cursor.execute('SELECT stage, count FROM funnel_summary')
+    counts = dict(cursor.fetchall())
+    stage_counts = {name: counts.get(stage, 0) for stage, name in enumerate(FUNNEL_STAGES)}
+    cursor.execute('SELECT week, count, days FROM response_summary WHERE count > 0')
+    response_weeks = {week: (count, days) for week, count, days in cursor.fetchall()}
+    return stage_counts, response_weeks
+
+def search_funnel(cursor, search):
+    # Funnel metrics for a search; without filters the maintained totals
+    # cover every application outside the archive
+    condition, params = search_condition(search)
+    funnel = count_funnel(cursor, condition, params) if condition else read_funnel_summary(cursor)
+    if search[4]:
+        condition, params = search_condition(search, 'archived_fts')
+        funnel = add_funnel(funnel, count_funnel(cursor, condition, params, archived=True))
+    return funnel
+
+def fetch_status_history(cursor, app_id):
+    # The status changes of an application, oldest first, as (old status,
+    # new status, changed at); old status is None for its first entry
+    cursor.execute('''
+        SELECT old_status, new_status, changed_at FROM status_history
+        WHERE application_id=? ORDER BY id
+    ''', (app_id,))
+    return cursor.fetchall()
+
+def count_statuses(cursor, condition='', params=(), source='applications'):
+    # Count the applications matching a condition per chart category. One
+    # filtered COUNT per category counts them all in a single pass, where a
+    # GROUP BY would first sort every matching row. The rest, in none of
+    # the categories, are the OTHER_CATEGORY, as in the summary
+    counts = ', '.join(
+        f"COUNT(*) FILTER (WHERE {category_condition.format(row='applications')})"
+        for category_condition in STATUS_CATEGORIES.values()
+    )
+    query = f"SELECT {counts}, COUNT(*) FROM {source}"
+    if condition:
+        query += f" WHERE {condition}"
+    cursor.execute(query, params)
+    *counts, total = cursor.fetchone()
+    status_counts = dict(zip(STATUS_CATEGORIES, counts))
+    status_counts[OTHER_CATEGORY] = total - sum(counts)
+    return status_counts
+
+def read_status_summary(cursor):
+    cursor.execute('SELECT category, count FROM status_summary')
+    status_counts = dict.fromkeys((*STATUS_CATEGORIES, OTHER_CATEGORY), 0)
+    for category, count in cursor.fetchall():
+        status_counts[category] = count
+    return status_counts
+
+def date_conditions(search):
+    # A date window is a single range scan on the applied_on index; rows
+    # without a known date fall outside every window
+    date_from, date_to = search[1:3]
+    if date_from is None and date_to is None:
+        return [], []
+    return ['applications.applied_on BETWEEN ? AND ?'], [date_from or '0001-01-01', date_to or '9999-12-31']
+
+def search_condition(search, fts='applications_fts'):
+    # The filters of a search as a condition on applications ('' for none),
+    # matching the full-text query in the index fts
+    conditions, params = date_conditions(search)
+    if search[0]:
+        conditions.insert(0, f'applications.id IN (SELECT rowid FROM {fts} WHERE {fts} MATCH ?)')
+        params.insert(0, search[0])
+    return ' AND '.join(conditions), params
+
+def search_status_counts(cursor, search):
+    # Chart counts for a search; without filters the maintained summary
+    # covers every row outside the archive
+    condition, params = search_condition(search)
+    status_counts = count_statuses(cursor, condition, params) if condition else read_status_summary(cursor)
+    if search[4]:
+        condition, params = search_condition(search, 'archived_fts')
+        archived = count_statuses(cursor, condition, params, ARCHIVED_SOURCE)
+        status_counts = {category: count + archived.get(category, 0) for category, count in status_counts.items()}
+    return status_counts
+
+def search_charts(cursor, search):
+    # What the charts show for a search: (status counts, funnel metrics)
+    return search_status_counts(cursor, search), search_funnel(cursor, search)
+
+def tree_query(search, select, conditions=(), params=(), source=None):
+    # Query over the applications matching a search, or all of them; from
+    # the archived applications alone with source=ARCHIVED_SOURCE
+    match = search[0]
+    if source is None:
+        source = ARCHIVE_VIEW if search[4] else 'applications'
+    query = f"SELECT {select} FROM {source}"
+    date_filter, date_params = date_conditions(search)
+    conditions, params = date_filter + list(conditions), date_params + list(params)
+    if match and source == ARCHIVE_VIEW:
+        # Neither index covers the view; the matches of both are looked up by id
+        conditions.insert(0, '''applications.id IN (
+            SELECT rowid FROM applications_fts WHERE applications_fts MATCH ?
+            UNION ALL SELECT rowid FROM archived_fts WHERE archived_fts MATCH ?
+        )''')
+        params[0:0] = [match, match]
+    elif match and source == ARCHIVED_SOURCE:
+        conditions.insert(0, 'applications.id IN (SELECT rowid FROM archived_fts WHERE archived_fts MATCH ?)')
+        params.insert(0, match)
+    elif match:
+        query += ' JOIN applications_fts ON applications_fts.rowid = applications.id'
+        conditions.insert(0, 'applications_fts MATCH ?')
+        params.insert(0, match)
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    return query, params
+
+def search_sources(search):
+    # The tables whose counts add up to a search's
+    return ('applications', ARCHIVED_SOURCE) if search[4] else ('applications',)
+
+def count_tree_rows(cursor, search):
+    count = 0
+    for source in search_sources(search):
+        cursor.execute(*tree_query(search, 'COUNT(*)', source=source))
+        count += cursor.fetchone()[0]
+    return count
+
+def fetch_tree_rows(cursor, search, sort_keys, limit, after=None, before=None, offset=0, columns=TREE_COLUMNS):
+    # Keyset pagination on the sort key: rows after/before a key we already
+    # hold, so scrolling never rescans the rows in front of the viewport.
+    # Rows are the columns followed by their sort key
+    keys = ', '.join(sort_keys)
+    placeholders = ', '.join('?' * len(sort_keys))
+    conditions, params = [], []
+    if after is not None:
+        conditions.append(f"({keys}) > ({placeholders})")
+        params.extend(after)
+    if before is not None:
+        conditions.append(f"({keys}) < ({placeholders})")
+        params.extend(before)
+    query, params = tree_query(search, ', '.join(tuple(columns) + tuple(sort_keys)), conditions, params)
+    direction = 'DESC' if before is not None else 'ASC'
+    query += ' ORDER BY ' + ', '.join(f"{key} {direction}" for key in sort_keys) + ' LIMIT ? OFFSET ?'
+    cursor.execute(query, params + [limit, offset])
+    rows = cursor.fetchall()
+    return rows[::-1] if before is not None else rows
+
+def fetch_tree_row(cursor, search, sort_keys, app_id):
+    # The row as buffered for the Treeview, or None if it does not match the search
+    cursor.execute(*tree_query(search, ', '.join(TREE_COLUMNS + sort_keys), ['applications.id = ?'], [app_id]))
+    return cursor.fetchone()
+
+def fetch_tree_rows_by_id(cursor, search, sort_keys, app_ids):
+    # Like fetch_tree_row for several applications in one query, as
+    # {application id: row}; those not matching the search are left out
+    placeholders = ', '.join('?' * len(app_ids))
+    cursor.execute(*tree_query(
+        search, ', '.join(TREE_COLUMNS + sort_keys), [f"applications.id IN ({placeholders})"], list(app_ids)
+    ))
+    return {row[0]: row for row in cursor.fetchall()}
+
+def load_search_results(cursor, search, limit):
+    # Everything the Treeview and the chart need to show a new search
+    match, date_from, date_to, by_date, archive = search
+    row_count = count_tree_rows(cursor, search)
+    sort_keys = ('applications.id',)
+    if by_date:
+        sort_keys = DATE_SORT
+    elif match and not archive:
+        # Rank by relevance when affordable, otherwise follow the index
+        sort_keys = RANKED_SORT if row_count <= RANKED_SEARCH_LIMIT else ('applications_fts.rowid',)
+    rows = fetch_tree_rows(cursor, search, sort_keys, limit)
+    return search, sort_keys, row_count, rows, search_charts(cursor, search)
+
+def count_by_month(cursor, search):
+    # Applications per month applied as [(YYYY-MM, count)], read from the
+    # date index; applications without a known date are left out
+    months = {}
+    for source in search_sources(search):
+        query, params = tree_query(
+            search, 'substr(applications.applied_on, 1, 7), COUNT(*)', ["applications.applied_on != ''"], source=source
+        )
+        cursor.execute(query + ' GROUP BY 1', params)
+        for month, count in cursor.fetchall():
+            months[month] = months.get(month, 0) + count
+    return sorted(months.items())
+
+def fetch_application(cursor, app_id):
+    # Every column of one application, archived or not, or None if there is
+    # no such application
+    cursor.execute(f"SELECT {', '.join(APPLICATION_COLUMNS)} FROM all_applications WHERE id=?", (app_id,))
+    return cursor.fetchone()
+
+def fetch_applications(cursor, app_ids):
+    # Every column of the listed applications, archived or not, in one
+    # query; ids without an application are left out
+    placeholders = ', '.join('?' * len(app_ids))
+    cursor.execute(
+        f"SELECT {', '.join(APPLICATION_COLUMNS)} FROM all_applications WHERE id IN ({placeholders})", list(app_ids)
+    )
+    return cursor.fetchall()
+
+def insert_application(cursor, values):
+    # values as returned by import_row; returns the new application's id
+    cursor.execute(INSERT_APPLICATION, values)
+    return cursor.lastrowid
+
+def update_application_status(cursor, app_id, status, rejection_stage=None, received_coding_challenge=0, received_interview=0):
+    # Returns False if there is no such application
+    return update_applications_status(
+        cursor, [app_id], status, rejection_stage, received_coding_challenge, received_interview
+    ) > 0
+
+def update_applications_status(cursor, app_ids, status, rejection_stage=None, received_coding_challenge=0, received_interview=0):
+    # One UPDATE ... WHERE id IN (...) per UPDATE_CHUNK_SIZE applications;
+    # returns the number of applications updated
+    updated = 0
+    app_ids = list(app_ids)
+    for start in range(0, len(app_ids), UPDATE_CHUNK_SIZE):
+        chunk = app_ids[start:start + UPDATE_CHUNK_SIZE]
+        cursor.execute(
+            UPDATE_STATUS + f"WHERE id IN ({', '.join('?' * len(chunk))})",
+            [status, rejection_stage, received_coding_challenge, received_interview] + chunk
+        )
+        updated += cursor.rowcount
+    return updated
+
+def update_search_status(cursor, search, status, rejection_stage=None, received_coding_challenge=0, received_interview=0):
+    # Updates every application matching a search in one statement; returns
+    # the number of applications updated
+    query, params = tree_query(search, 'applications.id')
+    cursor.execute(
+        UPDATE_STATUS + f"WHERE id IN ({query})",
+        [status, rejection_stage, received_coding_challenge, received_interview] + params
+    )
+    return cursor.rowcount
+
+def delete_application(cursor, app_id):
+    # Returns False if there is no such application
+    cursor.execute('DELETE FROM applications WHERE id=?', (app_id,))
+    return cursor.rowcount > 0
+
+def data_version(cursor):
+    # Changes whenever another connection commits to the database, and
+    # only then; reading it costs no I/O
+    cursor.execute('PRAGMA data_version')
+    return cursor.fetchone()[0]
+
+def latest_change(cursor):
+    # The version of the latest change in the change log (0 for none)
+    cursor.execute('SELECT IFNULL(MAX(version), 0) FROM application_changes')
+    return cursor.fetchone()[0]
+
+def fetch_changes(cursor, since, limit, own=()):
+    # The applications changed after version since, as (latest version,
+    # [(version, application id, added since)]), oldest first, leaving out
+    # the versions in the ranges own, as [(after, last)], e.g. those of the
+    # reading window's own writes; the list is None if there are more than
+    # limit of them
+    latest = latest_change(cursor)
+    if latest < since:
+        # The database was restored from a backup and the log with it: what
+        # changed is not known
+        return latest, None
+    excluded = ''.join(' AND NOT (version > ? AND version <= ?)' for _ in own)
+    cursor.execute(f'''
+        SELECT version, application_id, IFNULL(added > ?, 0) FROM application_changes
+        WHERE version > ?{excluded}
+        ORDER BY version
+        LIMIT ?
+    ''', [since, since] + [version for versions in own for version in versions] + [limit + 1])
+    changes = cursor.fetchall()
+    return latest, changes if len(changes) <= limit else None
+
+def archive_applications(cursor, days=ARCHIVE_AFTER_DAYS):
+    # Moves the closed applications applied for more than days ago to the
+    # archive, with their funnel milestones; returns how many were moved.
+    # The delete triggers take them out of the chart totals, the full-text
+    # index and the other instances' lists. The status history's would log
+    # them as deleted, so it is dropped and recreated inside the transaction
+    # as in insert_batch. Applications without a known date are kept
+    if not cursor.connection.in_transaction:
+        cursor.execute('BEGIN IMMEDIATE')
+    cutoff = (date.today() - timedelta(days=days)).isoformat()
+    # Served by the applied_on index, which holds the status too
+    closed = f'''
+        applied_on != '' AND applied_on < ? AND status IN ({', '.join('?' * len(CLOSED_STATUSES))})
+    '''
+    params = [cutoff, *CLOSED_STATUSES]
+    columns = ', '.join(f"applications.{column}" for column in APPLICATION_COLUMNS + ('applied_on',))
+    cursor.execute(f'''
+        INSERT INTO archived_applications ({', '.join(APPLICATION_COLUMNS)}, applied_on, reached, response_days, archived_at)
+        SELECT {columns}, IFNULL(reached, {FUNNEL_REACHED_SQL.format(row='applications')}), response_days,
+            datetime('now', 'localtime')
+        FROM applications LEFT JOIN application_milestones ON application_id = applications.id
+        WHERE {closed}
+    ''', params)
+    archived = cursor.rowcount
+    if not archived:
+        return 0
+    cursor.execute(f'''
+        INSERT INTO archived_fts (rowid, company, position, status, rejection_stage)
+        SELECT id, company, position, status, rejection_stage FROM applications WHERE {closed}
+    ''', params)
+    cursor.execute('DROP TRIGGER status_history_delete')
+    cursor.execute(f"DELETE FROM applications WHERE {closed}", params)
+    cursor.execute(STATUS_HISTORY_DELETE_TRIGGER)
+    # The full-text index keeps the deleted rows as delete markers, which
+    # every search would read past; merging its segments drops them
+    for fts in ('applications_fts', 'archived_fts'):
+        cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+    return archived
+
+def import_row(record):
+    # One imported record (a CSV row or JSON object keyed by column name) as
+    # the values for INSERT_APPLICATION; raises ValueError if it is invalid
+    def text(column):
+        value = record.get(column)
+        return '' if value is None else str(value).strip()
+
+    company, position = text('company'), text('position')
+    if not company or not position:
+        raise ValueError("company and position are required")
+    status, rejection_stage, received_coding_challenge, received_interview = status_row(record)
+    date = parse_date(text('date_applied'))
+    if date is None:
+        raise ValueError(f"invalid date {text('date_applied')!r}, expected DD.MM.YYYY")
+    return (
+        company, position, status, date.strftime('%d.%m.%Y'), date.isoformat(),
+        rejection_stage, received_coding_challenge, received_interview
+    )
+
+def status_row(record):
+    # The status and rejection details of a record as (status, rejection_stage,
+    # received_coding_challenge, received_interview); raises ValueError if invalid
+    status = '' if record.get('status') is None else str(record['status']).strip()
+    if status not in STATUSES:
+        raise ValueError(f"unknown status {status!r}")
+    # Rejection details only apply to rejected applications, as in the form
+    if status != 'Rejected':
+        return status, None, 0, 0
+    rejection_stage = record.get('rejection_stage')
+    return (
+        status,
+        '' if rejection_stage is None else str(rejection_stage).strip(),
+        parse_flag(record.get('received_coding_challenge')),
+        parse_flag(record.get('received_interview'))
+    )
+
+def parse_flag(value):
+    if value is None or isinstance(value, (bool, int)):
+        return int(bool(value))
+    flag = str(value).strip().lower()
+    if flag in ('', '0', 'false', 'no'):
+        return 0
+    if flag in ('1', 'true', 'yes'):
+        return 1
+    raise ValueError(f"invalid flag {value!r}, expected 0 or 1")
+
+def read_json_array(file):
+    # Yield the elements of a top-level JSON array, decoding the file a chunk
+    # at a time instead of loading all of it
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    while True:
+        buffer = buffer.lstrip()
+        if started and buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if not started and buffer.startswith('['):
+            started = True
+            buffer = buffer[1:]
+            continue
+        if started and buffer.startswith(']'):
+            return
+        if buffer and not started:
+            raise ValueError("expected a JSON array of applications")
+        try:
+            element, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(IMPORT_CHUNK_SIZE)
+            if not chunk:
+                raise ValueError("unexpected end of JSON file")
+            buffer += chunk
+            continue
+        yield element
+        buffer = buffer[end:]
+
+def read_import_records(path):
+    # Stream the records of a CSV, JSON (array) or NDJSON file as dicts
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.json', '.jsonl', '.ndjson'):
+        raise ValueError(f"unsupported file type {extension!r}, expected .csv, .json or .ndjson")
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        if extension == '.csv':
+            yield from csv.DictReader(file)
+        elif extension == '.json':
+            yield from read_json_array(file)
+        else:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+
+def insert_batch(cursor, rows):
+    # The full-text index, the status history, the funnel and the change log
+    # are brought up to date for the whole batch with one statement each,
+    # several times faster than their per-row triggers. The triggers are
+    # dropped and recreated inside the batch's transaction, so other
+    # connections never miss them. sqlite3 does not open a transaction for
+    # DDL, so it is begun here
+    if not cursor.connection.in_transaction:
+        cursor.execute('BEGIN IMMEDIATE')
+    cursor.execute('SELECT IFNULL(MAX(id), 0) FROM applications')
+    last_id = cursor.fetchone()[0]
+    for trigger in ('applications_fts_insert', 'status_history_insert', 'funnel_insert', 'application_changes_insert'):
+        cursor.execute(f'DROP TRIGGER {trigger}')
+    cursor.executemany(INSERT_APPLICATION, rows)
+    cursor.execute('''
+        INSERT INTO applications_fts (rowid, company, position, status, rejection_stage)
+        SELECT id, company, position, status, rejection_stage FROM applications WHERE id > ?
+    ''', (last_id,))
+    cursor.execute('''
+        INSERT INTO status_history (application_id, new_status, changed_at)
+        SELECT id, status, datetime('now', 'localtime') FROM applications WHERE id > ?
+    ''', (last_id,))
+    cursor.execute(f'''
+        INSERT INTO application_milestones (application_id, reached)
+        SELECT id, {FUNNEL_REACHED_SQL.format(row='applications')} FROM applications WHERE id > ?
+    ''', (last_id,))
+    cursor.execute('''
+        UPDATE funnel_summary SET count = count + (
+            SELECT IFNULL(SUM((reached >> stage) & 1), 0) FROM application_milestones WHERE application_id > ?
+        )
+    ''', (last_id,))
+    cursor.execute('''
+        INSERT OR REPLACE INTO application_changes (application_id, added)
+        SELECT id, (SELECT IFNULL(MAX(version), 0) + 1 FROM application_changes) FROM applications WHERE id > ?
+    ''', (last_id,))
+    for trigger in (FTS_INSERT_TRIGGER, STATUS_HISTORY_INSERT_TRIGGER, FUNNEL_INSERT_TRIGGER, CHANGES_INSERT_TRIGGER):
+        cursor.execute(trigger)
+
+def read_import_batches(path, batch_size=IMPORT_BATCH_SIZE):
+    # The valid records of an import file as values for INSERT_APPLICATION,
+    # batch_size at a time; yields (rows, invalid records read along with
+    # them as (record number, message)). Only the last batch is smaller
+    rows = []
+    errors = []
+    for number, record in enumerate(read_import_records(path), 1):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError("expected an object with application fields")
+            rows.append(import_row(record))
+        except ValueError as e:
+            errors.append((number, str(e)))
+        if len(rows) >= batch_size:
+            yield rows, errors
+            rows, errors = [], []
+    yield rows, errors
+
+def import_applications(conn, path, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    # Insert the valid records of an import file with executemany, one
+    # transaction per batch. Invalid records are skipped and reported as
+    # (record number, message); progress(imported, skipped) runs after every batch
+    cursor = conn.cursor()
+    imported = 0
+    errors = []
+    for rows, invalid in read_import_batches(path, batch_size):
+        errors += invalid
+        if rows:
+            insert_batch(cursor, rows)
+            conn.commit()
+            imported += len(rows)
+        if progress is not None:
+            progress(imported, len(errors))
+    return imported, errors
+
+def export_applications(cursor, path, search=ALL_APPLICATIONS, sort_keys=('applications.id',), progress=None, cancelled=None):
+    # Stream the applications matching a search to a CSV or NDJSON file,
+    # EXPORT_BATCH_SIZE rows at a time; progress(exported, total) runs after
+    # every batch. The file only replaces path once it is complete. Once
+    # cancelled() returns True, checked while the queries run as well, the
+    # export is abandoned with ExportCancelled
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.jsonl', '.ndjson'):
+        raise ValueError(f"unsupported file type {extension!r}, expected .csv or .ndjson")
+    if cancelled is not None:
+        cursor.connection.set_progress_handler(cancelled, 1000)
+    exported = 0
+    partial_path = path + '.part'
+    try:
+        total = count_tree_rows(cursor, search)
+        query, params = tree_query(search, ', '.join(f"applications.{column}" for column in APPLICATION_COLUMNS))
+        cursor.execute(query + ' ORDER BY ' + ', '.join(sort_keys), params)
+        with open(partial_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file) if extension == '.csv' else None
+            if writer is not None:
+                writer.writerow(APPLICATION_COLUMNS)
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                if writer is not None:
+                    writer.writerows(rows)
+                else:
+                    file.writelines(json.dumps(dict(zip(APPLICATION_COLUMNS, row))) + '\n' for row in rows)
+                exported += len(rows)
+                if progress is not None:
+                    progress(exported, total)
+                if cancelled is not None and cancelled():
+                    raise ExportCancelled()
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        # The progress handler interrupts a query with an OperationalError
+        if cancelled is not None and cancelled():
+            raise ExportCancelled() from None
+        raise
+    finally:
+        if cancelled is not None:
+            cursor.connection.set_progress_handler(None, 0)
+    return exported
@@ -0,0 +1,150 @@
+import csv
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from store import (
+    ALL_APPLICATIONS, OTHER_CATEGORY, STATUSES, archive_applications, check_funnel_summary, check_status_summary,
+    connect_database, delete_application, fetch_status_history, import_applications, import_row, insert_application,
+    insert_batch, rebuild_status_summary, search_status_counts, status_row, update_application_status,
+    update_applications_status, update_search_status
+)
+
+# Run from the repository root: python -m pytest
+
+COMPANIES = ('Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli')
+POSITIONS = ('Data Engineer', 'Backend Developer', 'Analyst')
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect_database(str(tmp_path / 'applications.db'))
+    yield conn
+    conn.close()
+
+def random_record(rng):
+    # Applied for up to three years ago, so some are old enough to archive
+    applied = date.today() - timedelta(days=rng.randrange(3 * 365))
+    return {
+        'company': rng.choice(COMPANIES),
+        'position': rng.choice(POSITIONS),
+        'status': rng.choice(STATUSES),
+        'date_applied': applied.strftime('%d.%m.%Y'),
+        'rejection_stage': rng.choice(('', 'Screening', 'Onsite')),
+        'received_coding_challenge': rng.choice(('0', '1')),
+        'received_interview': rng.choice(('0', '1'))
+    }
+
+def live_ids(cursor):
+    cursor.execute('SELECT id FROM applications')
+    return [app_id for app_id, in cursor.fetchall()]
+
+def write_import_file(path, rng, count):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(random_record(rng)))
+        writer.writeheader()
+        for _ in range(count):
+            writer.writerow(random_record(rng))
+        # Skipped by the import
+        writer.writerow(dict(random_record(rng), status='Ghosted'))
+
+def run_operations(conn, rng, tmp_path, steps):
+    cursor = conn.cursor()
+    for step in range(steps):
+        operation = rng.choice(('insert', 'insert', 'update', 'update', 'bulk update', 'search update', 'delete', 'batch', 'import', 'archive'))
+        ids = live_ids(cursor)
+        if operation == 'insert' or not ids:
+            insert_application(cursor, import_row(random_record(rng)))
+        elif operation == 'update':
+            update_application_status(cursor, rng.choice(ids), *status_row(random_record(rng)))
+        elif operation == 'bulk update':
+            update_applications_status(cursor, rng.sample(ids, min(len(ids), 20)), *status_row(random_record(rng)))
+        elif operation == 'search update':
+            since = (date.today() - timedelta(days=rng.randrange(3 * 365))).isoformat()
+            update_search_status(cursor, (None, since, None, False, False), *status_row(random_record(rng)))
+        elif operation == 'delete':
+            delete_application(cursor, rng.choice(ids))
+        elif operation == 'batch':
+            insert_batch(cursor, [import_row(random_record(rng)) for _ in range(rng.randrange(1, 50))])
+        elif operation == 'import':
+            conn.commit()
+            path = str(tmp_path / f'import-{step}.csv')
+            write_import_file(path, rng, rng.randrange(1, 120))
+            import_applications(conn, path, batch_size=25)
+        else:
+            archive_applications(cursor, days=rng.choice((30, 365)))
+        if rng.random() < 0.3:
+            conn.commit()
+    conn.commit()
+
+@pytest.mark.parametrize('seed', range(5))
+def test_summaries_match_a_recount(conn, tmp_path, seed):
+    run_operations(conn, random.Random(seed), tmp_path, 300)
+    cursor = conn.cursor()
+    cursor.execute('SELECT COUNT(*) FROM archived_applications')
+    assert cursor.fetchone()[0] > 0
+    assert check_status_summary(cursor) == {}
+    assert check_funnel_summary(cursor) == {}
+
+def test_summaries_after_rollback(conn, tmp_path):
+    # Changes rolled back must not leave the summaries behind
+    run_operations(conn, random.Random(10), tmp_path, 100)
+    cursor = conn.cursor()
+    cursor.execute('BEGIN IMMEDIATE')
+    update_applications_status(cursor, live_ids(cursor), 'Interviewing')
+    insert_batch(cursor, [import_row(random_record(random.Random(11))) for _ in range(10)])
+    conn.rollback()
+    assert check_status_summary(cursor) == {}
+    assert check_funnel_summary(cursor) == {}
+
+def test_deleted_ids_are_not_reused(conn):
+    cursor = conn.cursor()
+    record = random_record(random.Random(0))
+    deleted = insert_application(cursor, import_row(record))
+    update_application_status(cursor, deleted, 'Rejected')
+    delete_application(cursor, deleted)
+    added = insert_application(cursor, import_row(dict(record, status='No Answer')))
+    conn.commit()
+    assert added != deleted
+    assert [new_status for _, new_status, _ in fetch_status_history(cursor, added)] == ['No Answer']
+    assert fetch_status_history(cursor, deleted)[-1][1] is None
+
+def test_unknown_statuses_are_counted_as_other(conn, tmp_path):
+    # Statuses outside the chart categories, e.g. from an older version,
+    # are counted alike by the summary and by a filtered recount
+    run_operations(conn, random.Random(20), tmp_path, 50)
+    cursor = conn.cursor()
+    values = import_row(random_record(random.Random(21)))
+    ghosted = insert_application(cursor, values[:2] + ('Ghosted',) + values[3:])
+    insert_application(cursor, values[:2] + ('Withdrawn',) + values[3:])
+    update_applications_status(cursor, [ghosted], 'On Hold')
+    conn.commit()
+    assert check_status_summary(cursor) == {}
+    rebuild_status_summary(cursor)
+    assert check_status_summary(cursor) == {}
+    everything = search_status_counts(cursor, ALL_APPLICATIONS)
+    assert everything[OTHER_CATEGORY] == 2
+    # The same totals, with a filter matching every row
+    assert search_status_counts(cursor, (None, '0001-01-01', None, False, False)) == everything
+    delete_application(cursor, ghosted)
+    assert check_status_summary(cursor) == {}
+
+def test_summary_of_unknown_statuses_is_migrated(tmp_path):
+    # Earlier versions counted an unknown status under its own name
+    path = str(tmp_path / 'applications.db')
+    conn = connect_database(path)
+    cursor = conn.cursor()
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='trigger' AND name='status_summary_insert'")
+    legacy = cursor.fetchone()[0].replace(f"'{OTHER_CATEGORY}'", 'NEW.status')
+    cursor.execute('DROP TRIGGER status_summary_insert')
+    cursor.execute(legacy)
+    values = import_row(random_record(random.Random(30)))
+    insert_application(cursor, values[:2] + ('Ghosted',) + values[3:])
+    conn.commit()
+    assert check_status_summary(cursor) != {}
+    conn.close()
+    conn = connect_database(path)
+    try:
+        assert check_status_summary(conn.cursor()) == {}
+    finally:
+        conn.close()
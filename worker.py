@@ -0,0 +1,215 @@
+import queue
+import sqlite3
+import threading
+import time
+
+class DatabaseWorker:
+    # Runs SQLite work off the Tk thread. Writes go through one thread and
+    # connection, reads through another, so in WAL mode a long read never
+    # holds up a write. Jobs are plain functions taking a cursor; their
+    # results are handed back to the Tk thread through a queue polled with
+    # root.after, because Tk must only be used from the thread running it.
+    #
+    # Writes are group-committed: consecutive write jobs share a transaction
+    # that is committed commit_window_ms after its first write, or after
+    # commit_group_size writes, so a burst of edits costs one commit (and
+    # one fsync) instead of one each; writes arriving without a break hold
+    # the write lock for no longer than the window and one more write. With
+    # durable=False commits are not synced to disk at all (PRAGMA
+    # synchronous=NORMAL): a crash of the app loses nothing, a power failure
+    # may lose the last commits.
+    #
+    # With a metrics.Metrics, jobs given an operation name are timed: their
+    # wait in the queue and their SQL, the Tk callback applying the result,
+    # and the group commits.
+
+    def __init__(self, root, path, connect, on_error, poll_ms=20, commit_window_ms=0, commit_group_size=1, durable=True, metrics=None):
+        self.root = root
+        self.metrics = metrics
+        self.path = path
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.commit_window_ms = commit_window_ms
+        self.commit_group_size = commit_group_size
+        self.durable = durable
+        self.write_requests = queue.Queue()
+        self.read_requests = queue.Queue()
+        self.callbacks = queue.Queue()
+        self.ready = threading.Event()
+        self.threads = [
+            threading.Thread(target=self.run_writer, args=(connect,), daemon=True),
+            threading.Thread(target=self.run_reader, daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+        self.poll_after_id = self.root.after(self.poll_ms, self.poll)
+
+    def read(self, job, on_done=None, on_error=None, cancelled=None, operation=None):
+        # cancelled() is checked before the job starts and while it runs;
+        # once it returns True the job is abandoned without any callback.
+        # A read sees every write whose on_done ran before it was requested
+        job, on_done = self.instrument(operation, job, on_done)
+        self.read_requests.put((job, on_done, on_error, cancelled))
+
+    def write(self, job, on_done=None, on_error=None, operation=None):
+        # on_done runs once the write is committed. A job that fails is
+        # rolled back on its own, without the other writes of its group
+        job, on_done = self.instrument(operation, job, on_done)
+        self.write_requests.put((job, on_done, on_error))
+
+    def instrument(self, operation, job, on_done):
+        if self.metrics is None or operation is None:
+            return job, on_done
+        return self.metrics.timed_job(operation, job), self.metrics.timed(operation, 'widget', on_done)
+
+    def notify(self, callback, result):
+        # Called from inside a job to run callback(result) on the Tk thread,
+        # e.g. to report progress
+        self.callbacks.put((callback, result))
+
+    def run_writer(self, connect):
+        # The writer opens the database first so schema migrations are done
+        # before the reader starts
+        try:
+            conn = connect(self.path)
+        except Exception as e:
+            self.callbacks.put((self.on_error, e))
+            return
+        finally:
+            self.ready.set()
+        conn.execute(f"PRAGMA synchronous={'FULL' if self.durable else 'NORMAL'}")
+        self.serve_writes(conn)
+
+    def run_reader(self):
+        self.ready.wait()
+        conn = sqlite3.connect(self.path)
+        cursor = conn.cursor()
+        while True:
+            request = self.read_requests.get()
+            if request is None:
+                break
+            job, on_done, on_error, cancelled = request
+            # Every job reads a single snapshot, so its queries agree with
+            # each other and with the change version it reads along with them
+            cursor.execute('BEGIN')
+            try:
+                callback = self.run_job(conn, cursor, job, on_done, on_error, cancelled)
+            finally:
+                conn.rollback()
+            if callback is not None:
+                self.callbacks.put(callback)
+        conn.close()
+
+    def serve_writes(self, conn):
+        # Callbacks of the open group, as (callback, result, callback if the
+        # commit fails), run in queue order once the group is committed
+        cursor = conn.cursor()
+        group = []
+        deadline = None
+        while True:
+            try:
+                timeout = max(0, deadline - time.monotonic()) if group else None
+                request = self.write_requests.get(timeout=timeout)
+            except queue.Empty:
+                # The window is over
+                self.commit_group(conn, group)
+                continue
+            if request is None:
+                break
+            if not group:
+                deadline = time.monotonic() + self.commit_window_ms / 1000
+            group.append(self.run_write(conn, cursor, *request))
+            if len(group) >= self.commit_group_size or time.monotonic() >= deadline:
+                self.commit_group(conn, group)
+        # Pending writes are committed before the connection is closed
+        self.commit_group(conn, group)
+        conn.close()
+
+    def run_job(self, conn, cursor, job, on_done, on_error, cancelled):
+        # Runs a read job; returns its (callback, result), or None if there is none
+        if cancelled is not None:
+            if cancelled():
+                return None
+            conn.set_progress_handler(cancelled, 1000)
+        try:
+            result = job(cursor)
+        except Exception as e:
+            if cancelled is None or not cancelled():
+                return on_error or self.on_error, e
+            return None
+        finally:
+            if cancelled is not None:
+                conn.set_progress_handler(None, 0)
+        return on_done, result
+
+    def run_write(self, conn, cursor, job, on_done, on_error):
+        # Runs a write job in a savepoint of the group's transaction; returns
+        # its (callback, result, callback if the commit fails)
+        on_error = on_error or self.on_error
+        # BEGIN IMMEDIATE takes the write lock up front: a transaction that
+        # reads before writing cannot wait for another process holding the
+        # lock (e.g. the HTTP API), it fails with "database is locked" at once
+        try:
+            if not conn.in_transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+        except sqlite3.Error as e:
+            return on_error, e, None
+        cursor.execute('SAVEPOINT job')
+        try:
+            result = job(cursor)
+        except Exception as e:
+            self.end_savepoint(conn, cursor, 'ROLLBACK TO job')
+            return on_error, e, None
+        self.end_savepoint(conn, cursor)
+        return on_done, result, on_error
+
+    def end_savepoint(self, conn, cursor, rollback=None):
+        # Jobs must not commit on their own. Some errors (e.g. a full disk)
+        # make SQLite roll back the whole transaction, savepoint included
+        if not conn.in_transaction:
+            return
+        try:
+            if rollback:
+                cursor.execute(rollback)
+            cursor.execute('RELEASE job')
+        except sqlite3.OperationalError:
+            if rollback:
+                conn.rollback()
+
+    def commit_group(self, conn, group):
+        started = time.perf_counter()
+        committing = conn.in_transaction
+        try:
+            conn.commit()
+            if committing and self.metrics is not None:
+                self.metrics.observe('commit', 'commit', time.perf_counter() - started)
+        except Exception as e:
+            conn.rollback()
+            # None of the group's writes are stored
+            group[:] = [
+                (callback, result, None) if on_error is None else (on_error, e, None)
+                for callback, result, on_error in group
+            ]
+        for callback, result, _ in group:
+            if callback is not None:
+                self.callbacks.put((callback, result))
+        group.clear()
+
+    def poll(self):
+        try:
+            while True:
+                try:
+                    callback, result = self.callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                callback(result)
+        finally:
+            self.poll_after_id = self.root.after(self.poll_ms, self.poll)
+
+    def close(self):
+        # Pending writes are finished before the connections are closed
+        self.root.after_cancel(self.poll_after_id)
+        self.write_requests.put(None)
+        self.read_requests.put(None)
+        for thread in self.threads:
+            thread.join()